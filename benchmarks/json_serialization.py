@@ -0,0 +1,106 @@
+"""
+Benchmark de serialização JSON de uma listagem de 10 mil cobranças.
+
+Compara:
+1. caminho atual: dicts no formato de Charge.to_dict() (float/isoformat) + provider JSON padrão do Flask
+2. os mesmos dicts com o OrjsonProvider
+3. OrjsonProvider com datas nativas (Projection.serialize com o provider orjson: só Decimal -> float)
+
+Uso: python benchmarks/json_serialization.py [quantidade] [repetições]
+"""
+import os
+import sys
+import timeit
+import uuid
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from src.services.json_provider import OrjsonProvider
+
+
+def build_charges(count):
+    """Cobranças sintéticas com os tipos das colunas do modelo Charge"""
+    charges = []
+    base_date = date(2024, 1, 1)
+    for number in range(count):
+        total = Decimal('1250.37') + number
+        charges.append({
+            'id': str(uuid.uuid4()),
+            'chargeCode': f'COB20240101{number:06d}',
+            'clientId': str(uuid.uuid4()),
+            'debtorId': str(uuid.uuid4()),
+            'unitId': str(uuid.uuid4()),
+            'chargeDate': base_date + timedelta(days=number % 365),
+            'dueDate': base_date + timedelta(days=number % 365 + 10),
+            'status': 'PENDING',
+            'category': 'CONDOMINIUM_FEE',
+            'description': 'Taxa condominial mensal',
+            'referencePeriod': '01/2024',
+            'principalAmount': total,
+            'expensesAmount': Decimal('35.00'),
+            'extrajudicialFees': Decimal('125.04'),
+            'executionFees': Decimal('0.00'),
+            'art523Fine': Decimal('0.00'),
+            'totalAmount': total + Decimal('160.04'),
+            'paidAmount': Decimal('0.00'),
+            'balanceAmount': total + Decimal('160.04'),
+            'createdAt': datetime(2024, 1, 1, 12, 0, 0),
+            'updatedAt': datetime(2024, 1, 2, 8, 30, 0),
+            'isActive': True
+        })
+    return charges
+
+
+def to_dict_style(charge):
+    """Conversões feitas hoje em to_dict(): float() e isoformat()"""
+    converted = {}
+    for key, value in charge.items():
+        if isinstance(value, Decimal):
+            value = float(value)
+        elif isinstance(value, (date, datetime)):
+            value = value.isoformat()
+        converted[key] = value
+    return converted
+
+
+def native_style(charge):
+    """Conversões de Projection.serialize(native=True): datas seguem nativas até os bytes"""
+    return {key: float(value) if isinstance(value, Decimal) else value for key, value in charge.items()}
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    app = Flask(__name__)
+    default_provider = DefaultJSONProvider(app)
+    orjson_provider = OrjsonProvider(app)
+    orjson_provider.sort_keys = False
+
+    charges = build_charges(count)
+
+    scenarios = {
+        'to_dict + Flask padrão': lambda: default_provider.response(
+            {'data': [to_dict_style(c) for c in charges], 'total': count}).get_data(),
+        'to_dict + orjson': lambda: orjson_provider.response(
+            {'data': [to_dict_style(c) for c in charges], 'total': count}).get_data(),
+        'datas nativas + orjson': lambda: orjson_provider.response(
+            {'data': [native_style(c) for c in charges], 'total': count}).get_data(),
+    }
+
+    with app.app_context():
+        baseline = None
+        print(f'{count} cobranças, melhor de {repeat} execuções')
+        for name, scenario in scenarios.items():
+            best = min(timeit.repeat(scenario, number=1, repeat=repeat))
+            baseline = baseline or best
+            size = len(scenario())
+            print(f'{name:<28} {best * 1000:8.1f} ms  {baseline / best:5.1f}x  {size / 1024:8.0f} KiB')
+
+
+if __name__ == '__main__':
+    main()
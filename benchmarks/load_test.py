@@ -0,0 +1,380 @@
+"""
+Teste de carga local com uma mistura ponderada de cenários reais.
+
+Semeia um condomínio sintético (src.services.synthetic_data.seed_tenant) e dispara,
+por --duration segundos e com --concurrency usuários simultâneos:
+login, busca de clientes, listagem de unidades, criação de cobrança, criação em lote,
+timeline, rajadas do webhook do WhatsApp e exportação em PDF.
+
+Modos:
+- em processo (padrão): create_app() + test client, sem rede, sobre um banco SQLite e
+  arquivos de estado (cache compartilhado, eventos, perfis) temporários, removidos ao
+  final; --database-url usa outro banco
+- localhost: --base-url http://127.0.0.1:5000 (o servidor deve usar o mesmo banco,
+  pois a semeadura é feita diretamente nele pelas variáveis de ambiente atuais ou
+  --database-url, e deve rodar com RATELIMIT_ENABLED=false)
+
+Relatório: requisições, vazão, p50/p95/p99, erros (5xx/falhas) e respostas 429
+(limite de requisições) por cenário. As 429 ficam fora das latências e dos erros.
+--save-baseline grava o resultado; nas execuções seguintes ele é comparado com a
+linha de base e o processo termina com código 1 se houver regressão acima de
+--tolerance (p95 maior ou vazão menor).
+
+Uso: python benchmarks/load_test.py [--duration 30] [--concurrency 8] [--base-url URL]
+                                    [--database-url URL] [--units 200] [--seed 42]
+                                    [--baseline ARQ] [--save-baseline]
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import date, timedelta
+from urllib.parse import urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DEFAULT_BASELINE = os.path.join(ROOT, 'benchmarks', 'load_test_baseline.json')
+# seed_tenant usa a semente como namespace dos documentos (synthetic_data.MAX_NAMESPACE)
+MAX_SEED = 99
+LOGIN = {'email': 'admin@negociacondominio.com.br', 'password': 'demo123'}
+
+# (cenário, peso)
+SCENARIOS = (
+    ('login', 4),
+    ('client_search', 18),
+    ('unit_listing', 18),
+    ('charge_create', 8),
+    ('bulk_create', 2),
+    ('timeline', 30),
+    ('webhook_burst', 18),
+    ('pdf_export', 2),
+)
+
+
+class InProcessTransport:
+    """Requisições pelo test client do Flask (um por usuário virtual)"""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, body=None, headers=None):
+        response = self.client.open(path, method=method, json=body, headers=headers or {})
+        data = response.get_data()
+        return response.status_code, data
+
+
+class HttpTransport:
+    """Requisições HTTP com conexão keep-alive (um por usuário virtual)"""
+
+    def __init__(self, base_url):
+        parts = urlsplit(base_url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.prefix = parts.path.rstrip('/')
+        self.connection = http.client.HTTPConnection(self.host, self.port, timeout=60)
+
+    def request(self, method, path, body=None, headers=None):
+        headers = dict(headers or {})
+        payload = None
+        if body is not None:
+            payload = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        try:
+            self.connection.request(method, self.prefix + path, body=payload, headers=headers)
+            response = self.connection.getresponse()
+            return response.status, response.read()
+        except (http.client.HTTPException, OSError):
+            self.connection.close()
+            self.connection = http.client.HTTPConnection(self.host, self.port, timeout=60)
+            raise
+
+
+class VirtualUser:
+    """Usuário virtual: escolhe cenários pelos pesos e monta as requisições"""
+
+    def __init__(self, transport, tenant, token, rng):
+        self.transport = transport
+        self.tenant = tenant
+        self.rng = rng
+        self.headers = {'Authorization': f'Bearer {token}'}
+
+    def run(self, scenario):
+        return getattr(self, scenario)()
+
+    def login(self):
+        return self.transport.request('POST', '/api/auth/login', LOGIN)
+
+    def client_search(self):
+        term = self.rng.choice(['Silva', 'Santos', 'Ltda', self.tenant['clientCode'], 'xyz'])
+        return self.transport.request('GET', f'/api/clients/?search={term}&limit=20', headers=self.headers)
+
+    def unit_listing(self):
+        return self.transport.request('GET', f"/api/clients/{self.tenant['clientId']}/units", headers=self.headers)
+
+    def charge_create(self):
+        debtor_id, _ = self.rng.choice(self.tenant['people'])
+        due_date = date.today() + timedelta(days=10)
+        body = {
+            'clientId': self.tenant['clientId'],
+            'debtorId': debtor_id,
+            'chargeDate': date.today().isoformat(),
+            'dueDate': due_date.isoformat(),
+            'category': 'CONDOMINIUM_FEE',
+            'description': 'Cobrança de teste de carga',
+            'items': [{
+                'category': 'PRINCIPAL',
+                'dueDate': due_date.isoformat(),
+                'description': 'Taxa condominial',
+                'nominalAmount': round(self.rng.uniform(350, 2500), 2)
+            }]
+        }
+        return self.transport.request('POST', '/api/charges/', body, headers=self.headers)
+
+    def bulk_create(self):
+        units = self.rng.sample(list(zip(self.tenant['unitIds'], self.tenant['people'])), k=min(20, len(self.tenant['unitIds'])))
+        body = {
+            'clientId': self.tenant['clientId'],
+            'chargeDate': date.today().isoformat(),
+            'dueDate': (date.today() + timedelta(days=10)).isoformat(),
+            'category': 'CONDOMINIUM_FEE',
+            'description': 'Rateio extra (teste de carga)',
+            'units': [
+                {'unitId': unit_id, 'debtorId': person[0], 'amount': round(self.rng.uniform(100, 900), 2)}
+                for unit_id, person in units
+            ]
+        }
+        return self.transport.request('POST', '/api/charges/bulk-create', body, headers=self.headers)
+
+    def timeline(self):
+        charge_id = self.rng.choice(self.tenant['chargeIds'])
+        return self.transport.request('GET', f'/api/progress/charge/{charge_id}/timeline', headers=self.headers)
+
+    def webhook_burst(self):
+        messages = []
+        for _ in range(20):
+            _, phone = self.rng.choice(self.tenant['people'])
+            messages.append({
+                'id': f'wamid.{uuid.UUID(int=self.rng.getrandbits(128))}',
+                'from': f'whatsapp:{phone}',
+                'body': 'Bom dia, gostaria de negociar o débito',
+                'type': 'text',
+                'profile': {'name': 'Teste de carga'}
+            })
+        return self.transport.request('POST', '/api/progress/whatsapp/webhook', {'messages': messages})
+
+    def pdf_export(self):
+        charge_id = self.rng.choice(self.tenant['chargeIds'])
+        return self.transport.request('GET', f'/api/charges/{charge_id}/spreadsheet/pdf', headers=self.headers)
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(samples, duration):
+    report = {}
+    for scenario, _ in SCENARIOS:
+        entries = samples.get(scenario, [])
+        # Respostas 429 são rápidas e distorceriam as latências: ficam só na contagem
+        latencies = sorted(latency for latency, status in entries if status != 429)
+        statuses = {}
+        for _, status in entries:
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+        errors = sum(count for status, count in statuses.items() if status == 'error' or status.startswith('5'))
+        report[scenario] = {
+            'requests': len(entries),
+            'throughput': round(len(latencies) / duration, 2),
+            'p50': percentile(latencies, 0.50),
+            'p95': percentile(latencies, 0.95),
+            'p99': percentile(latencies, 0.99),
+            'errors': errors,
+            'rateLimited': statuses.get('429', 0),
+            'statuses': statuses
+        }
+    total = sum(len(entries) for entries in samples.values())
+    rate_limited = sum(report[scenario]['rateLimited'] for scenario, _ in SCENARIOS)
+    report['_total'] = {
+        'requests': total,
+        'throughput': round((total - rate_limited) / duration, 2),
+        'rateLimited': rate_limited
+    }
+    return report
+
+
+def print_report(report, duration, concurrency):
+    print(f'{duration:.0f} s, {concurrency} usuários simultâneos')
+    print(f"{'cenário':<15} {'req':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'erros':>6} {'429':>6}  status")
+    for scenario, _ in SCENARIOS:
+        row = report[scenario]
+        if not row['requests']:
+            continue
+        latencies = ' '.join(
+            f'{row[key] * 1000:>8.1f}' if row[key] is not None else f"{'-':>8}" for key in ('p50', 'p95', 'p99')
+        )
+        print(
+            f"{scenario:<15} {row['requests']:>7} {row['throughput']:>8.1f} {latencies} "
+            f"{row['errors']:>6} {row['rateLimited']:>6}  "
+            + ', '.join(f'{status}={count}' for status, count in sorted(row['statuses'].items()))
+        )
+    print(f"{'total':<15} {report['_total']['requests']:>7} {report['_total']['throughput']:>8.1f}")
+    if report['_total']['rateLimited']:
+        print(
+            f"Atenção: {report['_total']['rateLimited']} respostas 429 (limite de requisições); "
+            'rode o servidor com RATELIMIT_ENABLED=false para medir a aplicação'
+        )
+
+
+def compare(report, baseline, tolerance):
+    """Regressões em relação à linha de base: p95 maior ou vazão menor que a tolerância"""
+    regressions = []
+    for scenario, _ in SCENARIOS:
+        current, previous = report.get(scenario), baseline.get(scenario)
+        if not current or not previous or not current['requests'] or not previous['requests']:
+            continue
+        if current.get('rateLimited', 0) > current['requests'] * 0.01:
+            regressions.append(f"{scenario}: {current['rateLimited']} respostas 429 (resultado não comparável)")
+        if current['p95'] is None or previous['p95'] is None:
+            continue
+        if current['p95'] > previous['p95'] * (1 + tolerance):
+            regressions.append(
+                f"{scenario}: p95 {previous['p95'] * 1000:.1f} ms -> {current['p95'] * 1000:.1f} ms"
+            )
+        if current['errors'] > previous['errors'] and current['errors'] > current['requests'] * 0.01:
+            regressions.append(f"{scenario}: erros {previous['errors']} -> {current['errors']}")
+    previous_total = baseline.get('_total', {}).get('throughput')
+    if previous_total and report['_total']['throughput'] < previous_total * (1 - tolerance):
+        regressions.append(f"vazão total {previous_total:.1f} -> {report['_total']['throughput']:.1f} req/s")
+    return regressions
+
+
+def seed_value(text):
+    seed = int(text)
+    if not 0 <= seed <= MAX_SEED:
+        raise argparse.ArgumentTypeError(f'deve estar entre 0 e {MAX_SEED}')
+    return seed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Teste de carga local')
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--base-url', help='Servidor em execução (padrão: em processo)')
+    parser.add_argument('--database-url', help='Banco a semear (padrão: SQLite temporário em processo, '
+                                               'banco do ambiente com --base-url)')
+    parser.add_argument('--units', type=int, default=200)
+    parser.add_argument('--seed', type=seed_value, default=42,
+                        help=f'Semente do condomínio sintético (0 a {MAX_SEED})')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args()
+
+    workdir = None
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+    elif not args.base_url:
+        # Em processo: banco e todo o estado local (normalmente em instance/) temporários,
+        # para não semear o banco da aplicação nem poluir os caches lidos por um servidor local
+        workdir = tempfile.mkdtemp(prefix='load_test_')
+        os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(workdir, 'load_test.db')
+        for name, filename in (
+            ('TIMELINE_EVENTS_PATH', 'timeline_events.db'),
+            ('ENTITY_CACHE_SHARED_PATH', 'entity_cache.db'),
+            ('PROFILER_DIR', 'profiles'),
+            ('RATELIMIT_STORAGE', 'ratelimit.bin'),
+            ('WEBHOOK_QUEUE_PATH', 'webhook_queue.db'),
+        ):
+            os.environ[name] = os.path.join(workdir, filename)
+
+    try:
+        run(args)
+    finally:
+        if workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def run(args):
+    if not args.base_url:
+        # Em processo: sem limites de requisição e sem threads da fila (o webhook processa inline)
+        os.environ.setdefault('RATELIMIT_ENABLED', 'false')
+        os.environ.setdefault('WEBHOOK_QUEUE_ENABLED', 'false')
+
+    from src.main import create_app
+    from src.commands import create_schema
+    from src.services.synthetic_data import seed_tenant
+
+    app = create_app()
+    with app.app_context():
+        create_schema()
+        tenant = seed_tenant(units=args.units, seed=args.seed)
+
+    def make_transport():
+        return HttpTransport(args.base_url) if args.base_url else InProcessTransport(app)
+
+    status, body = make_transport().request('POST', '/api/auth/login', LOGIN)
+    if status != 200:
+        raise SystemExit(f'Falha no login de demonstração ({status}): {body[:200]!r}')
+    token = json.loads(body)['token']
+
+    scenarios = [name for name, _ in SCENARIOS]
+    weights = [weight for _, weight in SCENARIOS]
+    samples = {}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.duration
+
+    def worker(number):
+        rng = random.Random(args.seed * 1000 + number)
+        user = VirtualUser(make_transport(), tenant, token, rng)
+        local = {}
+        while time.perf_counter() < deadline:
+            scenario = rng.choices(scenarios, weights)[0]
+            started = time.perf_counter()
+            try:
+                status, _ = user.run(scenario)
+            except Exception:
+                status = 'error'
+            local.setdefault(scenario, []).append((time.perf_counter() - started, status))
+        with lock:
+            for scenario, entries in local.items():
+                samples.setdefault(scenario, []).extend(entries)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(number,)) for number in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duration = time.perf_counter() - started
+
+    report = summarize(samples, duration)
+    print_report(report, duration, args.concurrency)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as baseline_file:
+            json.dump(report, baseline_file, indent=2)
+        print(f'Linha de base gravada em {args.baseline}')
+        return
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as baseline_file:
+            regressions = compare(report, json.load(baseline_file), args.tolerance)
+        if regressions:
+            print('Regressões em relação à linha de base:')
+            for regression in regressions:
+                print(f'  - {regression}')
+            sys.exit(1)
+        print('Sem regressões em relação à linha de base')
+
+
+if __name__ == '__main__':
+    main()
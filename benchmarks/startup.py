@@ -0,0 +1,68 @@
+"""
+Benchmark de inicialização da aplicação (cada execução em um interpretador novo).
+
+Mede:
+1. import de src.main (rotas, serviços e dependências carregadas no import)
+2. create_app()
+3. primeira requisição (test client) até a resposta
+e lista as bibliotecas pesadas (reportlab, openpyxl) já carregadas após a primeira
+requisição; elas só devem aparecer depois da primeira exportação.
+
+Uso: python benchmarks/startup.py [execuções] [rota]
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ('reportlab', 'openpyxl')
+
+CHILD = """
+import json, os, sys, time
+started = time.perf_counter()
+sys.path.insert(0, {root!r})
+from src.main import create_app
+imported = time.perf_counter()
+app = create_app()
+created = time.perf_counter()
+response = app.test_client().get({path!r})
+responded = time.perf_counter()
+print(json.dumps({{
+    'import': imported - started,
+    'create_app': created - imported,
+    'first_request': responded - created,
+    'total': responded - started,
+    'status': response.status_code,
+    'heavy': [name for name in {heavy!r} if name in sys.modules]
+}}))
+sys.stdout.flush()
+os._exit(0)
+"""
+
+
+def run_once(path):
+    code = CHILD.format(root=ROOT, path=path, heavy=HEAVY_MODULES)
+    process = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True)
+    if process.returncode != 0:
+        raise SystemExit(f'Falha ao iniciar a aplicação:\n{process.stderr}')
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    path = sys.argv[2] if len(sys.argv) > 2 else '/api/metrics'
+
+    results = [run_once(path) for _ in range(runs)]
+
+    print(f'Inicialização, mediana de {runs} execuções (primeira requisição: GET {path} -> {results[-1]["status"]})')
+    for phase in ('import', 'create_app', 'first_request', 'total'):
+        values = [result[phase] for result in results]
+        print(f'{phase:<14} {statistics.median(values) * 1000:8.1f} ms  (mín {min(values) * 1000:.1f} ms)')
+    heavy = sorted({name for result in results for name in result['heavy']})
+    print(f"bibliotecas pesadas carregadas: {', '.join(heavy) if heavy else 'nenhuma'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+import csv
+import time
+import click
+from src.models.database import db, Client, EconomicIndex
+from src.services.economic_index_import import EconomicIndexImportService, EconomicIndexImportError
+from src.services.phone_index import PhoneIndexService
+from src.services.token_revocation import token_revocation
+from src.services.index_advisor import IndexAdvisor
+from src.services.synthetic_data import SyntheticDataSeeder, MAX_NAMESPACE
+from src.services.onboarding_import import OnboardingImportService, OnboardingImportError, read_rows
+from src import migrations
+
+
+def create_schema():
+    """Cria as tabelas ausentes e aplica as migrações pendentes. Retorna as migrações aplicadas."""
+    db.create_all()
+    return migrations.upgrade(db.engine)
+
+
+def register_commands(app):
+    """Registra os comandos de linha de comando (flask <comando>)"""
+
+    @app.cli.command('init-db')
+    def init_db():
+        """Cria as tabelas do banco de dados e aplica as migrações (executar no deploy)"""
+        applied = create_schema()
+        click.echo('✅ Tabelas do banco de dados criadas com sucesso!')
+        if applied:
+            click.echo(f"✅ Migrações aplicadas: {', '.join(applied)}")
+
+    @app.cli.command('rebuild-phone-index')
+    def rebuild_phone_index():
+        """Reconstrói o índice de telefones normalizados (E.164) das pessoas"""
+        total = PhoneIndexService().rebuild()
+        click.echo(f'✅ Índice de telefones reconstruído: {total} entradas')
+
+    @app.cli.command('purge-revoked-tokens')
+    def purge_revoked_tokens():
+        """Remove as revogações de JWTs já expirados (agendar periodicamente, ex.: cron diário)"""
+        total = token_revocation.purge_expired()
+        click.echo(f'✅ Revogações expiradas removidas: {total}')
+
+    @app.cli.command('import-economic-index')
+    @click.argument('index')
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--layout', type=click.Choice(['generic', 'bcb', 'ibge', 'fgv']), default='generic',
+                  help='Layout do arquivo (genérico ou oficial BCB/IBGE/FGV)')
+    def import_economic_index(index, path, layout):
+        """Importa uma série de índice econômico (INDEX = id ou nome, ex.: IPCA)"""
+        economic_index = EconomicIndex.query.get(int(index)) if index.isdigit() else \
+            EconomicIndex.query.filter_by(name=index).first()
+        if not economic_index:
+            raise click.ClickException(f'Índice econômico não encontrado: {index}')
+
+        service = EconomicIndexImportService()
+        with open(path, 'rb') as series_file:
+            content = series_file.read()
+
+        try:
+            values = service.parse(content, layout=layout, file_format='json' if path.lower().endswith('.json') else 'csv')
+            summary = service.upsert(economic_index.id, values)
+            db.session.commit()
+        except EconomicIndexImportError as e:
+            db.session.rollback()
+            for error in e.errors[:20]:
+                click.echo(f"  linha {error['row']}: {error['error']}", err=True)
+            raise click.ClickException(str(e))
+
+        click.echo(
+            f"✅ {economic_index.name}: {summary['inserted']} inseridos, "
+            f"{summary['updated']} atualizados, {summary['unchanged']} inalterados"
+        )
+
+    @app.cli.command('db-upgrade')
+    def db_upgrade():
+        """Aplica as migrações de esquema pendentes"""
+        applied = migrations.upgrade(db.engine)
+        if applied:
+            click.echo(f"✅ Migrações aplicadas: {', '.join(applied)}")
+        else:
+            click.echo('✅ Esquema já está atualizado')
+
+    @app.cli.command('db-downgrade')
+    @click.argument('version')
+    def db_downgrade(version):
+        """Reverte uma migração de esquema (ex.: 0001)"""
+        try:
+            reverted = migrations.downgrade(db.engine, version)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        click.echo(f'✅ Migração {version} revertida' if reverted else f'Migração {version} não estava aplicada')
+
+    @app.cli.command('db-migrations')
+    def db_migrations():
+        """Lista as migrações de esquema e sua situação"""
+        for version, description, applied in migrations.status(db.engine):
+            click.echo(f"{'[x]' if applied else '[ ]'} {version} {description}")
+
+    @app.cli.command('index-advisor')
+    @click.option('--strict', is_flag=True, help='Retorna código de erro se houver varredura completa')
+    def index_advisor(strict):
+        """Executa EXPLAIN nas consultas registradas e aponta varreduras completas"""
+        results = IndexAdvisor().analyze()
+        flagged = 0
+        for result in results:
+            if result['fullScans']:
+                flagged += 1
+                click.echo(f"⚠️  {result['query']}")
+                for line in result['fullScans']:
+                    click.echo(f'      {line}')
+            else:
+                click.echo(f"✅ {result['query']}: {' | '.join(result['plan'])}")
+
+        click.echo(f'{flagged} de {len(results)} consultas com varredura completa')
+        if strict and flagged:
+            raise SystemExit(1)
+
+    @app.cli.command('seed-synthetic')
+    @click.option('--charges', type=int, default=100000, show_default=True, help='Total de cobranças a gerar')
+    @click.option('--seed', type=int, default=42, show_default=True, help='Semente (mesma semente -> mesmos dados)')
+    @click.option('--namespace', type=click.IntRange(0, MAX_NAMESPACE), default=1, show_default=True,
+                  help='Prefixo de documentos e códigos (cargas com namespaces diferentes não colidem)')
+    @click.option('--batch-size', type=int, default=10000, show_default=True, help='Linhas por lote/commit')
+    @click.option('--defer-indexes/--keep-indexes', default=False, show_default=True,
+                  help='Remove os índices secundários durante a carga e os recria ao final (somente com tabelas vazias)')
+    def seed_synthetic(charges, seed, namespace, batch_size, defer_indexes):
+        """Carrega um grande volume de condomínios sintéticos para testes de desempenho"""
+        if Client.query.filter_by(client_code=f'C{namespace:04d}{1:06d}').first():
+            raise click.ClickException(f'Namespace {namespace} já carregado; use outro --namespace')
+
+        started = time.perf_counter()
+
+        def report(counts):
+            elapsed = time.perf_counter() - started
+            click.echo(f"  {counts['charges']} cobranças, {sum(counts.values())} linhas "
+                       f"({sum(counts.values()) / elapsed:.0f} linhas/s)")
+
+        with db.engine.connect() as connection:
+            seeder = SyntheticDataSeeder(connection, seed=seed, namespace=namespace, batch_size=batch_size)
+            try:
+                counts = seeder.run(charges, progress=report, defer_indexes=defer_indexes)
+            except ValueError as e:
+                raise click.ClickException(str(e))
+
+        elapsed = time.perf_counter() - started
+        for table, total in counts.items():
+            click.echo(f'  {table:<20} {total:>10}')
+        click.echo(f'✅ {sum(counts.values())} linhas em {elapsed:.1f} s')
+
+    @app.cli.command('import-units')
+    @click.argument('client_code')
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--batch-size', type=int, default=1000, show_default=True, help='Linhas por transação')
+    @click.option('--encoding', default='utf-8-sig', show_default=True, help='Codificação do CSV')
+    @click.option('--errors', 'errors_path', type=click.Path(dir_okay=False, writable=True),
+                  help='Grava o relatório de erros por linha em CSV')
+    def import_units(client_code, path, batch_size, encoding, errors_path):
+        """Importa unidades, proprietários/inquilinos e vínculos de um cliente (CSV ou XLSX)"""
+        client = Client.query.filter_by(client_code=client_code).first()
+        if not client:
+            raise click.ClickException(f'Cliente não encontrado: {client_code}')
+
+        started = time.perf_counter()
+        with open(path, 'rb') as import_file:
+            try:
+                rows = read_rows(import_file, 'xlsx' if path.lower().endswith('.xlsx') else 'csv', encoding)
+                report = OnboardingImportService(client.id, batch_size=batch_size).run(rows)
+            except OnboardingImportError as e:
+                db.session.rollback()
+                raise click.ClickException(str(e))
+
+        for entity in ('people', 'units', 'unitOwners'):
+            click.echo(f"  {entity:<11} {report[entity]['inserted']:>8} inseridos {report[entity]['updated']:>8} atualizados")
+        if errors_path:
+            with open(errors_path, 'w', newline='', encoding='utf-8') as errors_file:
+                writer = csv.writer(errors_file)
+                writer.writerow(['row', 'error'])
+                writer.writerows((error['row'], error['error']) for error in report['errors'])
+        else:
+            for error in report['errors'][:20]:
+                click.echo(f"  linha {error['row']}: {error['error']}", err=True)
+        if report['readError']:
+            raise click.ClickException(
+                f"Importação interrompida na linha {report['readError']['row']} "
+                f"({report['rows']} linhas lidas antes, {report['errorCount']} com erro): {report['readError']['error']}"
+            )
+        if report['rows'] and report['errorCount'] == report['rows']:
+            raise click.ClickException(f"Nenhuma das {report['rows']} linhas foi importada")
+        click.echo(f"✅ {report['rows']} linhas em {time.perf_counter() - started:.1f} s, {report['errorCount']} com erro")
@@ -7,19 +7,33 @@ from flask import Flask, send_from_directory, jsonify
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 from dotenv import load_dotenv
+from werkzeug.exceptions import NotFound
 
 # Carregar variáveis de ambiente
 load_dotenv()
 
 # Importar modelos e rotas
-from src.models.database import db
+from src.models.database import db, Charge
+from src.models.user import User
+from src.models.engine import configure_database
 from src.routes.auth import auth_bp
 from src.routes.people import people_bp
 from src.routes.clients import clients_bp
 from src.routes.charges import charges_bp
-from src.routes.progress import progress_bp
+from src.routes.progress import progress_bp, process_whatsapp_payload
 from src.routes.economic_indices import economic_indices_bp
 from src.routes.temp_routes import financial_bp, communication_bp, reports_bp
+from src.routes.admin import admin_bp
+from src.services.webhook_queue import WebhookQueue, WebhookWorkerPool
+from src.commands import register_commands
+from src.services.query_stats import init_query_stats
+from src.services.metrics import init_metrics
+from src.services.profiler import init_profiler
+from src.services.json_provider import init_json_provider
+from src.services.entity_cache import init_entity_cache
+from src.services.token_revocation import init_token_revocation
+from src.services.rate_limit import init_rate_limiter
+from src.services.timeline_events import init_timeline_events
 
 def create_app():
     app = Flask(__name__, static_folder=os.path.join(os.path.dirname(os.path.dirname(__file__)), 'negociacondominio-frontend/dist'))
@@ -27,15 +41,32 @@ def create_app():
     # Configurações
     app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'negociacondominio-secret-key-2024')
     app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'jwt-secret-key-negociacondominio')
+    # Somente cabeçalhos; os streams SSE aceitam ?jwt=<ticket> via stream_jwt_required
+    app.config['JWT_TOKEN_LOCATION'] = ['headers']
     
-    # Configuração do banco de dados SQLite para demonstração
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///negociacondominio.db'
+    # Configuração do banco de dados (SQLite para demonstração, PostgreSQL/MySQL via ambiente)
+    configure_database(app)
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     
+    # Download de documentos: delegar a transferência ao servidor web, se configurado
+    app.config['USE_X_SENDFILE'] = os.getenv('USE_X_SENDFILE', 'false').lower() == 'true'
+    app.config['DOCUMENT_ACCEL_REDIRECT_PREFIX'] = os.getenv('DOCUMENT_ACCEL_REDIRECT_PREFIX')
+    app.config['DOCUMENT_STORAGE_ROOT'] = os.getenv('DOCUMENT_STORAGE_ROOT', os.getcwd())
+    
+    # Serialização JSON rápida (orjson)
+    init_json_provider(app)
+    
     # Inicializar extensões
     CORS(app, origins="*")  # Permitir CORS para todas as origens
-    JWTManager(app)
+    jwt = JWTManager(app)
+    init_token_revocation(app, jwt)
     db.init_app(app)
+    init_entity_cache(app, Charge, User)
+    init_query_stats(app)
+    init_metrics(app)
+    init_profiler(app)
+    init_rate_limiter(app)
+    init_timeline_events(app)
     
     # Registrar blueprints
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
@@ -47,7 +78,28 @@ def create_app():
     app.register_blueprint(financial_bp, url_prefix='/api/financial')
     app.register_blueprint(communication_bp, url_prefix='/api/communication')
     app.register_blueprint(reports_bp, url_prefix='/api/reports')
+    app.register_blueprint(admin_bp, url_prefix='/api/admin')
+    
+    # Comandos de linha de comando (flask <comando>)
+    register_commands(app)
 
+    # Fila durável de webhooks (ack imediato, processamento pelos workers)
+    if os.getenv('WEBHOOK_QUEUE_ENABLED', 'true').lower() == 'true':
+        webhook_queue = WebhookQueue(
+            os.getenv('WEBHOOK_QUEUE_PATH', os.path.join(app.instance_path, 'webhook_queue.db')),
+            max_attempts=int(os.getenv('WEBHOOK_QUEUE_MAX_ATTEMPTS', '5'))
+        )
+        app.extensions['webhook_queue'] = webhook_queue
+        worker_pool = WebhookWorkerPool(
+            app,
+            webhook_queue,
+            handlers={'whatsapp': process_whatsapp_payload},
+            workers=int(os.getenv('WEBHOOK_QUEUE_WORKERS', '2')),
+            batch_size=int(os.getenv('WEBHOOK_QUEUE_BATCH_SIZE', '50'))
+        )
+        # As threads só são iniciadas pelos pontos de entrada do servidor (post_fork do
+        # gunicorn e __main__), nunca por comandos da CLI, scripts ou testes
+        app.extensions['webhook_worker_pool'] = worker_pool
     
     # Rota de health check
     @app.route('/api/health')
@@ -66,28 +118,27 @@ def create_app():
         if static_folder_path is None:
             return "Static folder not configured", 404
 
-        if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
-            return send_from_directory(static_folder_path, path)
-        else:
-            index_path = os.path.join(static_folder_path, 'index.html')
-            if os.path.exists(index_path):
-                return send_from_directory(static_folder_path, 'index.html')
-            else:
-                return jsonify({'message': 'NegocIA Condomínio API is running'}), 200
-    
-    # Criar tabelas do banco de dados
-    with app.app_context():
+        if path != "":
+            try:
+                return send_from_directory(static_folder_path, path)
+            except NotFound:
+                pass
+        
         try:
-            db.create_all()
-            print("✅ Tabelas do banco de dados criadas com sucesso!")
-        except Exception as e:
-            print(f"❌ Erro ao criar tabelas: {e}")
+            return send_from_directory(static_folder_path, 'index.html')
+        except NotFound:
+            return jsonify({'message': 'NegocIA Condomínio API is running'}), 200
     
     return app
 
 if __name__ == '__main__':
     app = create_app()
     
+    # Servidor de desenvolvimento: garantir o esquema (em produção, flask init-db)
+    from src.commands import create_schema
+    with app.app_context():
+        create_schema()
+    
     # Criar usuário admin de demonstração, se não existir
     from src.models.user import User  # ← Aqui está o import corrigido
     from werkzeug.security import generate_password_hash
@@ -104,4 +155,10 @@ if __name__ == '__main__':
             db.session.commit()
             print("✅ Usuário admin de demonstração criado.")
 
+    # Com o reloader, só o processo filho (WERKZEUG_RUN_MAIN) atende requisições
+    worker_pool = app.extensions.get('webhook_worker_pool')
+    if worker_pool is not None and os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        worker_pool.start()
+
+    # Servidor de desenvolvimento; em produção: gunicorn -c gunicorn.conf.py src.wsgi:app
     app.run(host='0.0.0.0', port=5000, debug=True)
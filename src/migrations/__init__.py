@@ -0,0 +1,68 @@
+"""
+Migrações versionadas do esquema. Cada módulo define VERSION, DESCRIPTION,
+upgrade(connection) e downgrade(connection); a tabela schema_migrations
+registra as versões aplicadas.
+"""
+from datetime import datetime
+from importlib import import_module
+from sqlalchemy import text
+
+MIGRATIONS = [
+    'src.migrations.m0001_charge_domain_indexes',
+    'src.migrations.m0002_person_phone_index_backfill',
+]
+
+
+def load_migrations():
+    return [import_module(name) for name in MIGRATIONS]
+
+
+def _ensure_table(connection):
+    connection.execute(text(
+        'CREATE TABLE IF NOT EXISTS schema_migrations ('
+        'version VARCHAR(50) PRIMARY KEY, description VARCHAR(255), applied_at TIMESTAMP NOT NULL)'
+    ))
+
+
+def applied_versions(connection):
+    _ensure_table(connection)
+    return {row[0] for row in connection.execute(text('SELECT version FROM schema_migrations'))}
+
+
+def upgrade(engine):
+    """Aplica as migrações pendentes, cada uma em sua transação. Retorna as versões aplicadas."""
+    applied = []
+    with engine.begin() as connection:
+        done = applied_versions(connection)
+
+    for migration in load_migrations():
+        if migration.VERSION in done:
+            continue
+        with engine.begin() as connection:
+            migration.upgrade(connection)
+            connection.execute(
+                text('INSERT INTO schema_migrations (version, description, applied_at) VALUES (:v, :d, :t)'),
+                {'v': migration.VERSION, 'd': migration.DESCRIPTION, 't': datetime.utcnow()}
+            )
+        applied.append(migration.VERSION)
+    return applied
+
+
+def downgrade(engine, version):
+    """Reverte uma migração aplicada"""
+    migration = next((m for m in load_migrations() if m.VERSION == version), None)
+    if migration is None:
+        raise ValueError(f'Migração desconhecida: {version}')
+
+    with engine.begin() as connection:
+        if version not in applied_versions(connection):
+            return False
+        migration.downgrade(connection)
+        connection.execute(text('DELETE FROM schema_migrations WHERE version = :v'), {'v': version})
+    return True
+
+
+def status(engine):
+    with engine.begin() as connection:
+        done = applied_versions(connection)
+    return [(m.VERSION, m.DESCRIPTION, m.VERSION in done) for m in load_migrations()]
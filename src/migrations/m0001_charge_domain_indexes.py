@@ -0,0 +1,48 @@
+"""Índices compostos e parciais (somente registros ativos) das tabelas de cobrança"""
+from sqlalchemy import text
+
+VERSION = '0001'
+DESCRIPTION = 'Índices compostos e parciais do domínio de cobranças'
+
+# (nome, tabela, colunas, somente ativos)
+INDEXES = [
+    ('ix_charges_unit_status_active', 'charges', ['unit_id', 'status'], True),
+    ('ix_charges_debtor_status_active', 'charges', ['debtor_id', 'status'], True),
+    ('ix_charges_client_id', 'charges', ['client_id'], False),
+    ('ix_charge_items_charge_category_active', 'charge_items', ['charge_id', 'category'], True),
+    ('ix_charge_fees_charge_fee_type', 'charge_fees', ['charge_id', 'fee_type'], False),
+    ('ix_charge_progress_charge_date_active', 'charge_progress', ['charge_id', 'progress_date'], True),
+    ('ix_charge_documents_charge_date_active', 'charge_documents', ['charge_id', 'upload_date'], True),
+    ('ix_whatsapp_messages_charge_sent_active', 'whatsapp_messages', ['charge_id', 'sent_at'], True),
+    ('ix_units_client_unit_code', 'units', ['client_id', 'unit_code'], False),
+    ('ix_unit_owners_unit_active', 'unit_owners', ['unit_id'], True),
+    ('ix_calculation_parameters_client_start_active', 'calculation_parameters', ['client_id', 'start_date'], True),
+]
+
+
+def _active_predicate(dialect):
+    if dialect == 'postgresql':
+        return ' WHERE is_active = true'
+    if dialect == 'sqlite':
+        return ' WHERE is_active = 1'
+    # MySQL não suporta índices parciais: índice composto completo
+    return ''
+
+
+def upgrade(connection):
+    dialect = connection.dialect.name
+    if_not_exists = '' if dialect == 'mysql' else 'IF NOT EXISTS '
+    for name, table, columns, active_only in INDEXES:
+        predicate = _active_predicate(dialect) if active_only else ''
+        connection.execute(text(
+            f'CREATE INDEX {if_not_exists}{name} ON {table} ({", ".join(columns)}){predicate}'
+        ))
+
+
+def downgrade(connection):
+    dialect = connection.dialect.name
+    for name, table, columns, active_only in INDEXES:
+        if dialect == 'mysql':
+            connection.execute(text(f'DROP INDEX {name} ON {table}'))
+        else:
+            connection.execute(text(f'DROP INDEX IF EXISTS {name}'))
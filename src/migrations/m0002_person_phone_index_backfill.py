@@ -0,0 +1,15 @@
+"""Preenche o índice de telefones normalizados com as pessoas já cadastradas"""
+from sqlalchemy import text
+
+VERSION = '0002'
+DESCRIPTION = 'Preenchimento do índice de telefones (E.164) das pessoas existentes'
+
+
+def upgrade(connection):
+    # Importação tardia: o serviço depende dos modelos da aplicação
+    from src.services.phone_index import rebuild_phone_index
+    rebuild_phone_index(connection)
+
+
+def downgrade(connection):
+    connection.execute(text('DELETE FROM person_phone_index'))
@@ -0,0 +1,13 @@
+from datetime import datetime
+from src.models.database import db
+
+
+class DocumentBlob(db.Model):
+    """Conteúdo de documento armazenado uma única vez, endereçado pelo hash SHA-256"""
+    __tablename__ = 'document_blobs'
+
+    sha256 = db.Column(db.String(64), primary_key=True)
+    size = db.Column(db.BigInteger, nullable=False)
+    storage_path = db.Column(db.String(500), nullable=False)
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
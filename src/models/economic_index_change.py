@@ -0,0 +1,18 @@
+from datetime import datetime
+from src.models.database import db
+
+
+class EconomicIndexChange(db.Model):
+    """
+    Log de alterações dos valores de índices econômicos. O maior id de um índice
+    é a sua versão (usada em ETag e na sincronização incremental ?since=).
+    """
+    __tablename__ = 'economic_index_changes'
+    __table_args__ = (
+        db.Index('ix_economic_index_changes_index_version', 'index_id', 'id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    index_id = db.Column(db.Integer, nullable=False)
+    reference_date = db.Column(db.Date, nullable=False)
+    changed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
@@ -0,0 +1,131 @@
+import os
+from functools import wraps
+from flask import g, has_app_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import URL, Engine
+from sqlalchemy.sql import Select
+
+
+def build_database_url():
+    """
+    URL do banco a partir do ambiente:
+    - DATABASE_URL, se definida
+    - DB_ENGINE=postgresql|mysql com DB_HOST/DB_PORT/DB_NAME/DB_USERNAME/DB_PASSWORD
+    - caso contrário, SQLite local (demonstração)
+    """
+    url = os.getenv('DATABASE_URL')
+    if url:
+        # Heroku/Render ainda usam o prefixo antigo postgres://
+        return url.replace('postgres://', 'postgresql://', 1)
+
+    engine = os.getenv('DB_ENGINE', 'sqlite').lower()
+    if engine in ('postgresql', 'postgres'):
+        driver, default_port = 'postgresql+psycopg2', '5432'
+    elif engine == 'mysql':
+        driver, default_port = 'mysql+pymysql', '3306'
+    else:
+        return os.getenv('SQLITE_URL', 'sqlite:///negociacondominio.db')
+
+    # URL.create escapa usuário/senha com caracteres especiais (@, :, /, %)
+    return URL.create(
+        driver,
+        username=os.getenv('DB_USERNAME', 'postgres'),
+        password=os.getenv('DB_PASSWORD') or None,
+        host=os.getenv('DB_HOST', 'localhost'),
+        port=int(os.getenv('DB_PORT', default_port)),
+        database=os.getenv('DB_NAME', 'negociacondominio')
+    ).render_as_string(hide_password=False)
+
+
+def build_engine_options(url):
+    """Opções de engine/pool ajustadas para cada banco"""
+    statement_timeout_ms = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', '30000'))
+
+    if url.startswith('sqlite'):
+        return {
+            'connect_args': {
+                'timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000')) / 1000,
+                'check_same_thread': False
+            }
+        }
+
+    options = {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', '10')),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', '20')),
+        'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', '10')),
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', '1800')),
+        'pool_pre_ping': True
+    }
+
+    if url.startswith('postgresql'):
+        options['connect_args'] = {
+            'options': f'-c statement_timeout={statement_timeout_ms}',
+            'connect_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', '5')),
+            'application_name': os.getenv('DB_APPLICATION_NAME', 'negociacondominio-backend')
+        }
+    elif url.startswith('mysql'):
+        options['pool_recycle'] = min(options['pool_recycle'], 280)
+        options['connect_args'] = {
+            'init_command': f'SET SESSION max_execution_time={statement_timeout_ms}',
+            'connect_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', '5')),
+            'charset': 'utf8mb4'
+        }
+
+    return options
+
+
+def configure_database(app):
+    """Aplica URL, opções de engine e réplica de leitura (DATABASE_REPLICA_URL) na app"""
+    url = build_database_url()
+    app.config['SQLALCHEMY_DATABASE_URI'] = url
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = build_engine_options(url)
+
+    replica_url = os.getenv('DATABASE_REPLICA_URL')
+    if replica_url:
+        replica_url = replica_url.replace('postgres://', 'postgresql://', 1)
+        binds = app.config.setdefault('SQLALCHEMY_BINDS', {})
+        binds['replica'] = {'url': replica_url, **build_engine_options(replica_url)}
+
+
+@event.listens_for(Engine, 'connect')
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """PRAGMAs do SQLite: WAL (leitores não bloqueiam o escritor), busy_timeout, mmap"""
+    module = type(dbapi_connection).__module__
+    if not module.startswith('sqlite3'):
+        return
+
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute(f"PRAGMA busy_timeout={int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000'))}")
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute(f"PRAGMA mmap_size={int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))}")
+    cursor.execute(f"PRAGMA cache_size=-{int(os.getenv('SQLITE_CACHE_SIZE_KB', '65536'))}")
+    cursor.execute('PRAGMA temp_store=MEMORY')
+    cursor.close()
+
+
+class RoutingSession(Session):
+    """Sessão que envia SELECTs de endpoints marcados com @read_replica para a réplica"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None
+            and not self._flushing
+            and isinstance(clause, Select)
+            and has_app_context()
+            and g.get('use_read_replica')
+        ):
+            replica = self._db.engines.get('replica')
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def read_replica(view):
+    """Marca um endpoint somente leitura para usar a réplica, se configurada"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.use_read_replica = True
+        return view(*args, **kwargs)
+    return wrapper
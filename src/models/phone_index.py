@@ -0,0 +1,9 @@
+from src.models.database import db
+
+
+class PersonPhoneIndex(db.Model):
+    """Índice de telefones normalizados (E.164) das pessoas (devedores, proprietários, inquilinos)"""
+    __tablename__ = 'person_phone_index'
+
+    person_id = db.Column(db.String(36), db.ForeignKey('people.id'), primary_key=True)
+    phone_e164 = db.Column(db.String(20), nullable=False, index=True)
@@ -0,0 +1,13 @@
+from datetime import datetime
+from src.models.database import db
+
+
+class RevokedToken(db.Model):
+    """Tokens JWT revogados (logout). Removidos após expires_at, quando o token já seria recusado."""
+    __tablename__ = 'revoked_tokens'
+
+    jti = db.Column(db.String(36), primary_key=True)
+    user_id = db.Column(db.String(36))
+    token_type = db.Column(db.String(10), nullable=False, default='access')
+    revoked_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
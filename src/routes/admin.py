@@ -0,0 +1,61 @@
+from flask import Blueprint, jsonify, current_app, request, send_file, Response
+from flask_jwt_extended import jwt_required
+from src.services.permissions import admin_required
+
+admin_bp = Blueprint('admin', __name__)
+
+@admin_bp.route('/profiles', methods=['GET'])
+@jwt_required()
+@admin_required
+def list_profiles():
+    """Lista os perfis de requisições gravados mais recentes"""
+    profiler = current_app.extensions['request_profiler']
+    profiles = profiler.list()
+    return jsonify({'data': profiles, 'total': len(profiles)})
+
+@admin_bp.route('/profiles/<name>', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_profile(name):
+    """Download do perfil (.prof) ou resumo textual com ?format=text"""
+    profiler = current_app.extensions['request_profiler']
+    path = profiler.path_for(name)
+    if path is None:
+        return jsonify({'error': 'Perfil não encontrado'}), 404
+
+    if request.args.get('format') == 'text':
+        try:
+            summary = profiler.summary(name, sort=request.args.get('sort', 'cumulative'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return Response(summary, mimetype='text/plain')
+
+    return send_file(path, as_attachment=True, download_name=name, mimetype='application/octet-stream')
+
+@admin_bp.route('/entity-cache', methods=['GET'])
+@jwt_required()
+@admin_required
+def entity_cache_stats():
+    """Estatísticas do cache de entidades (taxa de acerto por camada)"""
+    return jsonify({'data': current_app.extensions['entity_cache'].stats()})
+
+@admin_bp.route('/entity-cache', methods=['PUT'])
+@jwt_required()
+@admin_required
+def toggle_entity_cache():
+    """Liga/desliga o cache de entidades em tempo de execução ({"enabled": false})"""
+    data = request.get_json() or {}
+    if not isinstance(data.get('enabled'), bool):
+        return jsonify({'error': 'Campo enabled (booleano) é obrigatório'}), 400
+
+    cache = current_app.extensions['entity_cache']
+    cache.set_enabled(data['enabled'])
+    return jsonify({'data': cache.stats()})
+
+@admin_bp.route('/entity-cache', methods=['DELETE'])
+@jwt_required()
+@admin_required
+def clear_entity_cache():
+    """Esvazia o cache de entidades (todas as camadas)"""
+    current_app.extensions['entity_cache'].clear()
+    return '', 204
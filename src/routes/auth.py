@@ -3,11 +3,14 @@ from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identi
 from werkzeug.security import check_password_hash, generate_password_hash
 from src.models.database import db
 from src.models.user import User
+from src.services.token_revocation import current_identity, revoke_current_token
+from src.services.rate_limit import rate_limit
 from datetime import datetime, timedelta
 
 auth_bp = Blueprint('auth', __name__)
 
 @auth_bp.route('/login', methods=['POST'])
+@rate_limit('login', by=('ip', 'user'))
 def login():
     try:
         data = request.get_json()
@@ -58,13 +61,13 @@ def login():
 @jwt_required()
 def get_current_user():
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        # Identidade em cache por token: sem consulta ao banco no caso comum
+        user = current_identity()
         
         if not user:
             return jsonify({'error': 'Usuário não encontrado'}), 404
         
-        return jsonify({'user': user.to_dict()})
+        return jsonify({'user': user})
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -73,14 +76,11 @@ def get_current_user():
 @jwt_required()
 def refresh_token():
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
-        
-        if not user:
+        if not current_identity():
             return jsonify({'error': 'Usuário não encontrado'}), 404
         
         new_token = create_access_token(
-            identity=user.id,
+            identity=get_jwt_identity(),
             expires_delta=timedelta(hours=24)
         )
         
@@ -92,6 +92,13 @@ def refresh_token():
 @auth_bp.route('/logout', methods=['POST'])
 @jwt_required()
 def logout():
-    # Em uma implementação real, você poderia adicionar o token a uma blacklist
-    return jsonify({'message': 'Logout realizado com sucesso'})
+    try:
+        # Token revogado até expirar (verificado pelo token_in_blocklist_loader)
+        revoke_current_token()
+        db.session.commit()
+        return jsonify({'message': 'Logout realizado com sucesso'})
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
 
@@ -1,8 +1,11 @@
 from flask import Blueprint, request, jsonify, send_file
 from flask_jwt_extended import jwt_required
 from src.models.database import db, Charge, ChargeItem, ChargeFees, Unit
+from src.models.engine import read_replica
+from src.services.batch_loader import get_batch_loader
 from src.services.charge_calculator import ChargeCalculatorService
-from src.services.debt_spreadsheet_generator import DebtSpreadsheetGenerator
+from src.services.metrics import track_export
+from src.services.projection import Projection, ProjectionError
 from sqlalchemy import or_, and_
 from datetime import datetime, date
 import uuid
@@ -26,6 +29,7 @@ def check_unit_charge_status(unit_id):
                 Charge.status.in_(['PENDING', 'OVERDUE', 'NEGOTIATED', 'NEGOTIATING'])
             )
         ).all()
+        get_batch_loader().prefetch(active_charges, 'client.person', 'debtor', 'unit')
         
         can_create_new_charge = len(active_charges) == 0
         
@@ -153,20 +157,23 @@ def negotiate_charge(charge_id):
 def generate_debt_spreadsheet(charge_id):
     """Gera planilha do débito"""
     try:
+        # Leitura do banco: calculate_charge grava saldos a partir desta instância
         charge = Charge.query.get(charge_id)
         
         if not charge:
             return jsonify({'error': 'Cobrança não encontrada'}), 404
         
-        # Gerar planilha usando o serviço
+        # Gerar planilha usando o serviço (com projeção opcional dos dados da cobrança)
         calculator = ChargeCalculatorService()
-        spreadsheet_data = calculator.generate_debt_spreadsheet(charge_id)
+        spreadsheet_data = calculator.generate_debt_spreadsheet(charge_id, projection=Projection.from_request(Charge))
         
         return jsonify({
             'message': 'Planilha do débito gerada com sucesso',
             'data': spreadsheet_data
         })
         
+    except ProjectionError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -181,8 +188,11 @@ def export_debt_spreadsheet_pdf(charge_id):
             return jsonify({'error': 'Cobrança não encontrada'}), 404
         
         # Gerar PDF da planilha
+        # Import tardio: reportlab/openpyxl só são carregados na primeira exportação
+        from src.services.debt_spreadsheet_generator import DebtSpreadsheetGenerator
         generator = DebtSpreadsheetGenerator()
-        pdf_path = generator.generate_pdf(charge_id)
+        with track_export('pdf'):
+            pdf_path = generator.generate_pdf(charge_id)
         
         return send_file(
             pdf_path,
@@ -205,8 +215,10 @@ def export_debt_spreadsheet_excel(charge_id):
             return jsonify({'error': 'Cobrança não encontrada'}), 404
         
         # Gerar Excel da planilha
+        from src.services.debt_spreadsheet_generator import DebtSpreadsheetGenerator
         generator = DebtSpreadsheetGenerator()
-        excel_path = generator.generate_excel(charge_id)
+        with track_export('excel'):
+            excel_path = generator.generate_excel(charge_id)
         
         return send_file(
             excel_path,
@@ -220,6 +232,7 @@ def export_debt_spreadsheet_excel(charge_id):
 
 @charges_bp.route('/unit/<unit_id>/history', methods=['GET'])
 @jwt_required()
+@read_replica
 def get_unit_charge_history(unit_id):
     """Histórico completo de cobranças de uma unidade"""
     try:
@@ -227,11 +240,19 @@ def get_unit_charge_history(unit_id):
         if not unit:
             return jsonify({'error': 'Unidade não encontrada'}), 404
         
-        # Buscar todas as cobranças da unidade
-        charges = Charge.query.filter(
+        # Projeção opcional (?fields= / ?include=); as estatísticas precisam destas colunas
+        projection = Projection.from_request(Charge)
+        query = Charge.query.filter(
             Charge.unit_id == unit_id,
             Charge.is_active == True
-        ).order_by(Charge.created_at.desc()).all()
+        ).order_by(Charge.created_at.desc())
+        if projection:
+            query = projection.apply(query, Charge.status, Charge.total_amount, Charge.paid_amount)
+        
+        # Buscar todas as cobranças da unidade
+        charges = query.all()
+        if not projection:
+            get_batch_loader().prefetch(charges, 'client.person', 'debtor')
         
         # Estatísticas
         total_charges = len(charges)
@@ -245,7 +266,7 @@ def get_unit_charge_history(unit_id):
         
         return jsonify({
             'unit': unit.to_dict(),
-            'charges': [charge.to_dict() for charge in charges],
+            'charges': [projection.serialize(charge) if projection else charge.to_dict() for charge in charges],
             'statistics': {
                 'totalCharges': total_charges,
                 'paidCharges': paid_charges,
@@ -258,6 +279,8 @@ def get_unit_charge_history(unit_id):
             }
         })
         
+    except ProjectionError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
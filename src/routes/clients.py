@@ -1,12 +1,17 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required
-from src.models.database import db, Client, Person, Unit, UnitOwner
+from src.models.database import db, Client, ClientDocument, Person, Unit, UnitOwner
+from src.models.engine import read_replica
+from src.services.batch_loader import get_batch_loader
+from src.services.document_download import send_document
+from src.services.onboarding_import import OnboardingImportService, OnboardingImportError, read_rows
 from sqlalchemy import or_
 
 clients_bp = Blueprint('clients', __name__)
 
 @clients_bp.route('/', methods=['GET'])
 @jwt_required()
+@read_replica
 def get_clients():
     try:
         # Parâmetros de consulta
@@ -30,6 +35,7 @@ def get_clients():
         # Paginação
         total = query.count()
         clients = query.offset((page - 1) * limit).limit(limit).all()
+        get_batch_loader().prefetch(clients, 'person')
         
         # Adicionar estatísticas para cada cliente
         clients_data = []
@@ -126,6 +132,7 @@ def create_client():
 
 @clients_bp.route('/<client_id>/units', methods=['GET'])
 @jwt_required()
+@read_replica
 def get_client_units(client_id):
     try:
         client = Client.query.get(client_id)
@@ -135,18 +142,19 @@ def get_client_units(client_id):
         
         units = Unit.query.filter_by(client_id=client_id, is_active=True).all()
         
+        # Proprietários/responsáveis de todas as unidades em uma consulta, pessoas em outra
+        loader = get_batch_loader()
+        owners_by_unit = loader.children(
+            UnitOwner, UnitOwner.unit_id, [unit.id for unit in units], UnitOwner.is_active == True,
+            joins=(Person,)
+        )
+        loader.prefetch([owner for owners in owners_by_unit.values() for owner in owners], 'person')
+        
         # Adicionar informações dos proprietários
         units_data = []
         for unit in units:
             unit_dict = unit.to_dict()
-            
-            # Buscar proprietários/responsáveis
-            owners = UnitOwner.query.filter_by(
-                unit_id=unit.id, 
-                is_active=True
-            ).join(Person).all()
-            
-            unit_dict['owners'] = [owner.to_dict() for owner in owners]
+            unit_dict['owners'] = [owner.to_dict() for owner in owners_by_unit[unit.id]]
             units_data.append(unit_dict)
         
         return jsonify({
@@ -207,3 +215,63 @@ def create_unit(client_id):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@clients_bp.route('/<client_id>/units/import', methods=['POST'])
+@jwt_required()
+def import_client_units(client_id):
+    """
+    Importação em lote (CSV ou XLSX, campo 'file') de unidades, proprietários/inquilinos
+    e vínculos. Linhas inválidas não interrompem a importação e voltam em 'errors'.
+    """
+    try:
+        client = Client.query.get(client_id)
+        
+        if not client:
+            return jsonify({'error': 'Cliente não encontrado'}), 404
+        
+        uploaded = request.files.get('file')
+        if not uploaded:
+            return jsonify({'error': 'Arquivo (file) é obrigatório'}), 400
+        
+        file_format = 'xlsx' if uploaded.filename.lower().endswith('.xlsx') else 'csv'
+        rows = read_rows(uploaded.stream, file_format, encoding=request.args.get('encoding', 'utf-8-sig'))
+        report = OnboardingImportService(client.id, batch_size=request.args.get('batchSize', 1000, type=int)).run(rows)
+        
+        # Relatório completo pode ser grande: a resposta traz os primeiros erros
+        errors = report.pop('errors')
+        report['errors'] = errors[:1000]
+        report['errorsTruncated'] = len(errors) > 1000
+        if report['readError']:
+            # Lotes anteriores ao erro de leitura já foram gravados: o relatório diz quanto
+            return jsonify({'error': 'Importação interrompida por erro de leitura do arquivo', 'data': report}), 422
+        if report['rows'] and report['errorCount'] == report['rows']:
+            return jsonify({'error': 'Nenhuma linha importada', 'data': report}), 422
+        return jsonify({'message': 'Importação concluída', 'data': report})
+        
+    except OnboardingImportError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@clients_bp.route('/<client_id>/documents/<document_id>/download', methods=['GET'])
+@jwt_required()
+def download_client_document(client_id, document_id):
+    """Download de documento de um cliente (suporta Range e GET condicional)"""
+    try:
+        document = ClientDocument.query.filter_by(
+            id=document_id,
+            client_id=client_id,
+            is_active=True
+        ).first()
+        if not document:
+            return jsonify({'error': 'Documento não encontrado'}), 404
+        
+        response = send_document(document.file_path, document.file_name, document.file_type)
+        if response is None:
+            return jsonify({'error': 'Arquivo do documento não encontrado'}), 404
+        
+        return response
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
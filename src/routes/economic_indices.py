@@ -1,6 +1,9 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, make_response
 from flask_jwt_extended import jwt_required
 from src.models.database import db, EconomicIndex, EconomicIndexValue
+from src.services.economic_index_import import EconomicIndexImportService, EconomicIndexImportError
+from src.services.economic_index_store import economic_index_store, validate_monthly_variation
+from src.services.http_cache import is_not_modified, compress_response
 
 economic_indices_bp = Blueprint("economic_indices", __name__)
 
@@ -71,27 +74,108 @@ def add_economic_index_value(index_id):
     reference_date = data.get("reference_date")
     value = data.get("value")
 
-    if not reference_date or not value:
+    if not reference_date or value is None or value == "":
         return jsonify({"message": "Data de referência e valor são obrigatórios"}), 400
 
+    try:
+        # Variação mensal em % (ex.: 0.42), não o número-índice
+        value = validate_monthly_variation(value)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
     new_value = EconomicIndexValue(index_id=index.id, reference_date=reference_date, value=value)
     db.session.add(new_value)
     db.session.commit()
     return jsonify({"message": "Valor do índice adicionado com sucesso!", "id": new_value.id}), 201
 
+@economic_indices_bp.route("/<int:index_id>/values/import", methods=["POST"])
+@jwt_required()
+def import_economic_index_values(index_id):
+    """Importa uma série (CSV ou JSON) com upsert por mês de referência"""
+    index = EconomicIndex.query.get_or_404(index_id)
+    layout = request.args.get("layout", "generic")
+    service = EconomicIndexImportService()
+
+    try:
+        if "file" in request.files:
+            uploaded = request.files["file"]
+            file_format = "json" if uploaded.filename.lower().endswith(".json") else "csv"
+            values = service.parse(uploaded.read(), layout=layout, file_format=file_format)
+        elif request.is_json:
+            values = service.parse(request.get_json(), layout=layout)
+        else:
+            values = service.parse(request.get_data(), layout=layout)
+
+        summary = service.upsert(index.id, values)
+        db.session.commit()
+        # Inserções em lote não passam pelo flush do ORM
+        economic_index_store.invalidate(index.id)
+    except EconomicIndexImportError as e:
+        db.session.rollback()
+        return jsonify({"message": str(e), "errors": e.errors[:100]}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"message": str(e)}), 500
+
+    return jsonify({"message": "Série importada com sucesso!", "summary": summary}), 200
+
 @economic_indices_bp.route("/<int:index_id>/values", methods=["GET"])
 @jwt_required()
 def get_economic_index_values(index_id):
     index = EconomicIndex.query.get_or_404(index_id)
-    values = EconomicIndexValue.query.filter_by(index_id=index.id).order_by(EconomicIndexValue.reference_date).all()
-    output = []
-    for val in values:
-        output.append({
-            "id": val.id,
-            "reference_date": str(val.reference_date),
-            "value": str(val.value)
-        })
-    return jsonify({"data": output}), 200
+    start = request.args.get("start")
+    end = request.args.get("end")
+    since = request.args.get("since", type=int)
+
+    # ETag pela versão do índice (maior id do log de alterações) e pelos filtros
+    version = economic_index_store.current_version(index.id)
+    etag = f"index-{index.id}-v{version}-{start or ''}-{end or ''}-{since if since is not None else ''}"
+    if is_not_modified(etag):
+        response = make_response("", 304)
+        response.set_etag(etag, weak=True)
+        return response
+
+    series = economic_index_store.get(index.id, version=version)
+    try:
+        if since is not None:
+            # Sincronização incremental: somente os meses alterados após a versão informada
+            output, deleted = series.changes_since(economic_index_store.changed_dates(index.id, since))
+            payload = {"data": output, "deleted": deleted, "version": version, "since": since}
+        else:
+            payload = {"data": series.to_list(start, end), "version": version}
+    except ValueError:
+        return jsonify({"message": "Período inválido (use AAAA-MM)"}), 400
+
+    response = jsonify(payload)
+    response.set_etag(etag, weak=True)
+    response.headers["X-Index-Version"] = str(version)
+    response.cache_control.no_cache = True
+    return compress_response(response)
+
+@economic_indices_bp.route("/<int:index_id>/accumulated", methods=["GET"])
+@jwt_required()
+def get_economic_index_accumulated(index_id):
+    index = EconomicIndex.query.get_or_404(index_id)
+    start = request.args.get("start")
+    end = request.args.get("end")
+
+    if not start or not end:
+        return jsonify({"message": "Parâmetros start e end são obrigatórios (AAAA-MM)"}), 400
+
+    try:
+        variation = economic_index_store.get(index.id).accumulated_variation(start, end)
+    except ValueError:
+        return jsonify({"message": "Período inválido (use AAAA-MM)"}), 400
+
+    if variation is None:
+        return jsonify({"message": "Série sem valores para todo o período solicitado"}), 404
+
+    return jsonify({
+        "index_id": index.id,
+        "start": start,
+        "end": end,
+        "accumulated_variation": str(round(variation * 100, 6))
+    }), 200
 
 @economic_indices_bp.route("/values/<int:value_id>", methods=["PUT"])
 @jwt_required()
@@ -99,8 +183,12 @@ def update_economic_index_value(value_id):
     value_entry = EconomicIndexValue.query.get_or_404(value_id)
     data = request.get_json()
 
+    if "value" in data:
+        try:
+            value_entry.value = validate_monthly_variation(data["value"])
+        except ValueError as e:
+            return jsonify({"message": str(e)}), 400
     value_entry.reference_date = data.get("reference_date", value_entry.reference_date)
-    value_entry.value = data.get("value", value_entry.value)
 
     db.session.commit()
     return jsonify({"message": "Valor do índice atualizado com sucesso!"}), 200
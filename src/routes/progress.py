@@ -1,18 +1,26 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required
-from src.models.database import db, ChargeProgress, ChargeDocument, WhatsAppMessage, Charge
-from datetime import datetime
-import uuid
-import os
+from flask import Blueprint, request, jsonify, Response, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity, create_access_token
+from src.models.database import db, ChargeProgress, ChargeDocument, WhatsAppMessage, Charge, Client
+from src.models.engine import read_replica
+from src.services.batch_loader import get_batch_loader
+from src.services.entity_cache import entity_cache
+from src.services.rate_limit import rate_limit
+from src.services.document_storage import DocumentStorageService
+from src.services.document_download import send_document
+from src.services.whatsapp_ingestion import WhatsAppIngestionService
+from src.services.permissions import admin_required, stream_jwt_required, STREAM_TICKET_SCOPE
+from src.services.timeline_events import timeline_broker, publish_timeline_event, format_sse
+from datetime import datetime, timedelta
 
 progress_bp = Blueprint('progress', __name__)
 
 @progress_bp.route('/charge/<charge_id>/progress', methods=['GET'])
 @jwt_required()
+@read_replica
 def get_charge_progress(charge_id):
     """Busca andamentos de uma cobrança"""
     try:
-        charge = Charge.query.get(charge_id)
+        charge = entity_cache.get(Charge, charge_id)
         if not charge:
             return jsonify({'error': 'Cobrança não encontrada'}), 404
         
@@ -21,6 +29,7 @@ def get_charge_progress(charge_id):
             ChargeProgress.charge_id == charge_id,
             ChargeProgress.is_active == True
         ).order_by(ChargeProgress.progress_date.desc()).all()
+        get_batch_loader().prefetch(progress_entries, 'user')
         
         return jsonify({
             'chargeId': charge_id,
@@ -67,6 +76,8 @@ def add_charge_progress(charge_id):
         db.session.add(progress)
         db.session.commit()
         
+        publish_timeline_event('PROGRESS', charge, progress.to_dict(), progress.progress_date)
+        
         return jsonify({
             'message': 'Andamento adicionado com sucesso',
             'data': progress.to_dict()
@@ -78,10 +89,11 @@ def add_charge_progress(charge_id):
 
 @progress_bp.route('/charge/<charge_id>/documents', methods=['GET'])
 @jwt_required()
+@read_replica
 def get_charge_documents(charge_id):
     """Busca documentos de uma cobrança"""
     try:
-        charge = Charge.query.get(charge_id)
+        charge = entity_cache.get(Charge, charge_id)
         if not charge:
             return jsonify({'error': 'Cobrança não encontrada'}), 404
         
@@ -89,6 +101,7 @@ def get_charge_documents(charge_id):
             ChargeDocument.charge_id == charge_id,
             ChargeDocument.is_active == True
         ).order_by(ChargeDocument.upload_date.desc()).all()
+        get_batch_loader().prefetch(documents, 'uploaded_by', 'progress')
         
         return jsonify({
             'chargeId': charge_id,
@@ -122,17 +135,8 @@ def upload_charge_document(charge_id):
         description = request.form.get('description', '')
         progress_id = request.form.get('progressId')
         
-        # Criar diretório se não existir
-        upload_dir = os.path.join('uploads', 'charges', charge_id)
-        os.makedirs(upload_dir, exist_ok=True)
-        
-        # Gerar nome único para o arquivo
-        file_extension = os.path.splitext(file.filename)[1]
-        unique_filename = f"{uuid.uuid4()}{file_extension}"
-        file_path = os.path.join(upload_dir, unique_filename)
-        
-        # Salvar arquivo
-        file.save(file_path)
+        # Gravar conteúdo em blocos, deduplicado pelo hash SHA-256
+        blob = DocumentStorageService().store(file.stream)
         
         # Criar registro no banco
         document = ChargeDocument(
@@ -142,8 +146,8 @@ def upload_charge_document(charge_id):
             title=title,
             description=description,
             file_name=file.filename,
-            file_path=file_path,
-            file_size=os.path.getsize(file_path),
+            file_path=blob.storage_path,
+            file_size=blob.size,
             file_type=file.content_type,
             uploaded_by_id=request.form.get('uploadedById')
         )
@@ -151,93 +155,144 @@ def upload_charge_document(charge_id):
         db.session.add(document)
         db.session.commit()
         
+        publish_timeline_event('DOCUMENT', charge, document.to_dict(), document.upload_date)
+        
         return jsonify({
             'message': 'Documento enviado com sucesso',
-            'data': document.to_dict()
+            'data': {**document.to_dict(), 'sha256': blob.sha256}
         }), 201
         
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@progress_bp.route('/charge/<charge_id>/documents/<document_id>/download', methods=['GET'])
+@jwt_required()
+def download_charge_document(charge_id, document_id):
+    """Download de documento de uma cobrança (suporta Range e GET condicional)"""
+    try:
+        document = ChargeDocument.query.filter_by(
+            id=document_id,
+            charge_id=charge_id,
+            is_active=True
+        ).first()
+        if not document:
+            return jsonify({'error': 'Documento não encontrado'}), 404
+        
+        response = send_document(document.file_path, document.file_name, document.file_type)
+        if response is None:
+            return jsonify({'error': 'Arquivo do documento não encontrado'}), 404
+        
+        return response
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@progress_bp.route('/charge/<charge_id>/documents/<document_id>', methods=['DELETE'])
+@jwt_required()
+def delete_charge_document(charge_id, document_id):
+    """Remove (desativa) um documento e libera a referência ao conteúdo armazenado"""
+    try:
+        document = ChargeDocument.query.filter_by(
+            id=document_id,
+            charge_id=charge_id,
+            is_active=True
+        ).first()
+        if not document:
+            return jsonify({'error': 'Documento não encontrado'}), 404
+        
+        document.is_active = False
+        # O arquivo só é apagado após o commit, quando nenhum outro documento usa o mesmo conteúdo
+        DocumentStorageService().release(DocumentStorageService.sha256_from_path(document.file_path))
+        db.session.commit()
+        
+        return jsonify({'message': 'Documento removido com sucesso'})
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+def process_whatsapp_payload(data):
+    """Processa um payload do webhook do WhatsApp (usado pelos workers da fila)"""
+    try:
+        summary = None
+        timeline_events = []
+        
+        if 'messages' in data:
+            service = WhatsAppIngestionService()
+            summary, timeline_events = service.ingest(data['messages'])
+        
+        db.session.commit()
+        
+    except Exception:
+        db.session.rollback()
+        raise
+    
+    # Notificar streams de timeline somente após o commit
+    for charge, whatsapp_message, progress in timeline_events:
+        publish_timeline_event('WHATSAPP', charge, whatsapp_message.to_dict(), whatsapp_message.sent_at)
+        publish_timeline_event('PROGRESS', charge, progress.to_dict(), progress.progress_date)
+    
+    return summary
+
 @progress_bp.route('/whatsapp/webhook', methods=['POST'])
+@rate_limit('webhook', by=('ip',))
 def whatsapp_webhook():
     """Webhook para receber mensagens do WhatsApp"""
     try:
         data = request.get_json()
+        if data is None:
+            return jsonify({'error': 'Payload JSON inválido'}), 400
         
-        # Processar mensagem do WhatsApp
-        # Estrutura pode variar dependendo do provedor (Twilio, WhatsApp Business API, etc.)
+        # Com a fila habilitada, o payload é gravado no journal e confirmado imediatamente
+        webhook_queue = current_app.extensions.get('webhook_queue')
+        if webhook_queue is not None:
+            entry_id = webhook_queue.enqueue('whatsapp', data)
+            return jsonify({'status': 'accepted', 'message': 'Webhook enfileirado', 'queueId': entry_id}), 202
         
-        if 'messages' in data:
-            for message_data in data['messages']:
-                # Extrair dados da mensagem
-                message_id = message_data.get('id')
-                phone_number = message_data.get('from', '').replace('whatsapp:', '')
-                content = message_data.get('body', '')
-                message_type = message_data.get('type', 'text')
-                
-                # Verificar se mensagem já existe
-                existing_message = WhatsAppMessage.query.filter_by(message_id=message_id).first()
-                if existing_message:
-                    continue
-                
-                # Criar registro da mensagem
-                whatsapp_message = WhatsAppMessage(
-                    message_id=message_id,
-                    phone_number=phone_number,
-                    contact_name=message_data.get('profile', {}).get('name', ''),
-                    message_type=message_type.upper(),
-                    direction='INBOUND',
-                    content=content,
-                    media_url=message_data.get('media_url'),
-                    media_type=message_data.get('media_type'),
-                    status='RECEIVED',
-                    sent_at=datetime.utcnow(),
-                    webhook_data=message_data
-                )
-                
-                db.session.add(whatsapp_message)
-                
-                # Tentar associar a uma cobrança baseado no telefone
-                # Buscar cobrança ativa para este telefone
-                charge = Charge.query.join(Charge.debtor).filter(
-                    Charge.debtor.has(phone=phone_number),
-                    Charge.status.in_(['PENDING', 'OVERDUE', 'NEGOTIATING']),
-                    Charge.is_active == True
-                ).first()
-                
-                if charge:
-                    whatsapp_message.charge_id = charge.id
-                    
-                    # Criar andamento automático
-                    progress = ChargeProgress(
-                        charge_id=charge.id,
-                        progress_type='WHATSAPP_CONTACT',
-                        title=f'Mensagem WhatsApp recebida de {phone_number}',
-                        description=f'Conteúdo: {content[:100]}...' if len(content) > 100 else content,
-                        responsible_name='Sistema WhatsApp',
-                        whatsapp_message_id=message_id,
-                        phone_number=phone_number,
-                        priority='MEDIUM'
-                    )
-                    
-                    db.session.add(progress)
+        summary = process_whatsapp_payload(data)
         
-        db.session.commit()
+        return jsonify({'status': 'success', 'message': 'Webhook processado', 'summary': summary}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@progress_bp.route('/whatsapp/webhook/queue', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_webhook_queue_status():
+    """Situação da fila de webhooks (pendentes, em retentativa e dead-letter)"""
+    webhook_queue = current_app.extensions.get('webhook_queue')
+    if webhook_queue is None:
+        return jsonify({'enabled': False})
+    
+    return jsonify({'enabled': True, **webhook_queue.stats()})
+
+@progress_bp.route('/whatsapp/webhook/dead-letter/requeue', methods=['POST'])
+@jwt_required()
+@admin_required
+def requeue_webhook_dead_letters():
+    """Devolve payloads da dead-letter para a fila de processamento"""
+    try:
+        webhook_queue = current_app.extensions.get('webhook_queue')
+        if webhook_queue is None:
+            return jsonify({'error': 'Fila de webhooks desabilitada'}), 400
+        
+        data = request.get_json(silent=True) or {}
+        requeued = webhook_queue.requeue_dead_letters(data.get('ids'))
         
-        return jsonify({'status': 'success', 'message': 'Webhook processado'}), 200
+        return jsonify({'message': f'{requeued} webhooks devolvidos para a fila', 'requeued': requeued})
         
     except Exception as e:
-        db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @progress_bp.route('/charge/<charge_id>/whatsapp', methods=['GET'])
 @jwt_required()
+@read_replica
 def get_charge_whatsapp_messages(charge_id):
     """Busca mensagens WhatsApp de uma cobrança"""
     try:
-        charge = Charge.query.get(charge_id)
+        charge = entity_cache.get(Charge, charge_id)
         if not charge:
             return jsonify({'error': 'Cobrança não encontrada'}), 404
         
@@ -257,10 +312,11 @@ def get_charge_whatsapp_messages(charge_id):
 
 @progress_bp.route('/charge/<charge_id>/timeline', methods=['GET'])
 @jwt_required()
+@read_replica
 def get_charge_timeline(charge_id):
     """Timeline completa de uma cobrança (andamentos + mensagens + documentos)"""
     try:
-        charge = Charge.query.get(charge_id)
+        charge = entity_cache.get(Charge, charge_id)
         if not charge:
             return jsonify({'error': 'Cobrança não encontrada'}), 404
         
@@ -282,6 +338,10 @@ def get_charge_timeline(charge_id):
             ChargeDocument.is_active == True
         ).all()
         
+        loader = get_batch_loader()
+        loader.prefetch(progress_entries, 'user')
+        loader.prefetch(documents, 'uploaded_by', 'progress')
+        
         # Criar timeline unificada
         timeline = []
         
@@ -326,3 +386,90 @@ def get_charge_timeline(charge_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _timeline_stream(charge_id=None, client_id=None):
+    """Gera a resposta SSE de eventos de timeline, com retomada via Last-Event-ID"""
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('lastEventId')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        return jsonify({'error': 'Last-Event-ID inválido'}), 400
+    
+    try:
+        subscription, replay, reset = timeline_broker.subscribe(
+            charge_id=charge_id,
+            client_id=client_id,
+            last_event_id=last_event_id
+        )
+    except OverflowError as e:
+        return jsonify({'error': str(e)}), 503
+    
+    keepalive = request.args.get('keepalive', 15, type=int)
+    
+    def generate():
+        try:
+            yield 'retry: 3000\n\n'
+            if reset:
+                # Eventos perdidos já saíram do log (ou id desconhecido): o cliente recarrega a timeline completa
+                yield 'event: reset\ndata: {}\n\n'
+            for event in replay:
+                yield format_sse(event)
+            while True:
+                event = subscription.get(timeout=keepalive)
+                if event is not None:
+                    yield format_sse(event)
+                elif subscription.overflowed:
+                    break
+                else:
+                    yield ': keepalive\n\n'
+        finally:
+            subscription.close()
+    
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+@progress_bp.route('/timeline/stream-ticket', methods=['POST'])
+@jwt_required()
+def create_timeline_stream_ticket():
+    """Emite um ticket de curta duração para abrir streams de timeline via ?jwt=<ticket>"""
+    try:
+        expires_in = 60
+        ticket = create_access_token(
+            identity=get_jwt_identity(),
+            expires_delta=timedelta(seconds=expires_in),
+            additional_claims={'scope': STREAM_TICKET_SCOPE}
+        )
+        
+        return jsonify({'ticket': ticket, 'expiresIn': expires_in})
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@progress_bp.route('/charge/<charge_id>/timeline/stream', methods=['GET'])
+@stream_jwt_required
+def stream_charge_timeline(charge_id):
+    """Stream SSE de novos eventos da timeline de uma cobrança"""
+    try:
+        charge = entity_cache.get(Charge, charge_id)
+        if not charge:
+            return jsonify({'error': 'Cobrança não encontrada'}), 404
+        
+        return _timeline_stream(charge_id=charge_id)
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@progress_bp.route('/client/<client_id>/timeline/stream', methods=['GET'])
+@stream_jwt_required
+def stream_client_timeline(client_id):
+    """Stream SSE de novos eventos de timeline de todas as cobranças de um cliente"""
+    try:
+        client = Client.query.get(client_id)
+        if not client:
+            return jsonify({'error': 'Cliente não encontrado'}), 404
+        
+        return _timeline_stream(client_id=client_id)
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,118 @@
+from flask import g, has_app_context
+from sqlalchemy import inspect
+from sqlalchemy.orm.attributes import set_committed_value
+
+IN_CHUNK_SIZE = 500
+
+
+class EntityLoader:
+    """Carrega entidades de um modelo por chave primária, em lote e com memoização"""
+
+    def __init__(self, model):
+        self.model = model
+        self.primary_key = inspect(model).primary_key[0]
+        self.cache = {}
+
+    def load_many(self, ids):
+        """Retorna {id: entidade ou None}, com uma consulta IN para os ids ainda não carregados"""
+        ids = {i for i in ids if i is not None}
+        missing = [i for i in ids if i not in self.cache]
+
+        for start in range(0, len(missing), IN_CHUNK_SIZE):
+            chunk = missing[start:start + IN_CHUNK_SIZE]
+            for entity in self.model.query.filter(self.primary_key.in_(chunk)).all():
+                self.cache[getattr(entity, self.primary_key.key)] = entity
+            for entity_id in chunk:
+                self.cache.setdefault(entity_id, None)
+
+        return {entity_id: self.cache[entity_id] for entity_id in ids}
+
+    def load(self, entity_id):
+        return self.load_many([entity_id]).get(entity_id)
+
+
+class BatchLoader:
+    """
+    Carregamento em lote de entidades relacionadas, no escopo da requisição.
+
+    prefetch(objetos, 'client.person', 'debtor') coleta as FKs dos objetos, busca
+    cada tipo de entidade com uma consulta IN e preenche os relacionamentos sem
+    disparar lazy load; qualquer to_dict() chamado depois usa os objetos já carregados.
+    Caminhos que não são relacionamentos mapeados geram ValueError; entidades sem
+    relacionamento (ex.: User, em outro registry) são buscadas direto com
+    loader(Model).load_many(ids).
+    """
+
+    def __init__(self):
+        self.loaders = {}
+
+    def loader(self, model):
+        if model not in self.loaders:
+            self.loaders[model] = EntityLoader(model)
+        return self.loaders[model]
+
+    def prefetch(self, objects, *paths):
+        objects = [obj for obj in objects if obj is not None]
+        for path in paths:
+            self._prefetch_path(objects, path.split('.'))
+        return objects
+
+    def children(self, model, foreign_key, parent_ids, *criteria, joins=()):
+        """
+        Agrupa filhos (um-para-muitos) por FK com uma única consulta: {parent_id: [filhos]}.
+        joins: alvos de INNER JOIN (ex.: Person), que também filtram os filhos sem o registro relacionado.
+        """
+        grouped = {parent_id: [] for parent_id in parent_ids}
+        parent_ids = list(grouped)
+        for start in range(0, len(parent_ids), IN_CHUNK_SIZE):
+            chunk = parent_ids[start:start + IN_CHUNK_SIZE]
+            query = model.query
+            for target in joins:
+                query = query.join(target)
+            for child in query.filter(foreign_key.in_(chunk), *criteria).all():
+                grouped[getattr(child, foreign_key.key)].append(child)
+        return grouped
+
+    def _prefetch_path(self, objects, parts):
+        if not objects or not parts:
+            return
+
+        name = parts[0]
+        mapper = inspect(type(objects[0]))
+        if name not in mapper.relationships:
+            # Ignorar o caminho esconderia um N+1 (o to_dict() carregaria por linha)
+            raise ValueError(
+                f'{mapper.class_.__name__}.{name} não é um relacionamento mapeado; '
+                f'use loader(Model).load_many(ids)'
+            )
+        relationship = mapper.relationships[name]
+        if relationship.uselist:
+            raise ValueError(f'prefetch suporta apenas relacionamentos muitos-para-um ({name})')
+
+        foreign_key = mapper.get_property_by_column(next(iter(relationship.local_columns))).key
+        pending = [obj for obj in objects if name not in inspect(obj).dict]
+        related = self.loader(relationship.mapper.class_).load_many(
+            getattr(obj, foreign_key) for obj in pending
+        )
+
+        loaded = []
+        for obj in objects:
+            state = inspect(obj)
+            if name in state.dict:
+                child = state.dict[name]
+            else:
+                child = related.get(getattr(obj, foreign_key))
+                set_committed_value(obj, name, child)
+            if child is not None:
+                loaded.append(child)
+
+        self._prefetch_path(loaded, parts[1:])
+
+
+def get_batch_loader():
+    """BatchLoader da requisição/contexto atual (novo, se fora de contexto)"""
+    if not has_app_context():
+        return BatchLoader()
+    if 'batch_loader' not in g:
+        g.batch_loader = BatchLoader()
+    return g.batch_loader
@@ -2,6 +2,7 @@ from decimal import Decimal
 from datetime import datetime, date
 from dateutil.relativedelta import relativedelta
 from src.models.database import db, Charge, ChargeItem, ChargeFees, CalculationParameter
+from src.services.economic_index_store import economic_index_store
 import uuid
 
 class ChargeCalculatorService:
@@ -153,13 +154,20 @@ class ChargeCalculatorService:
     
     def _calculate_monetary_correction(self, amount, due_date, index_type):
         """Calcula correção monetária"""
-        # Implementação simplificada - em produção, integrar com APIs de índices
         months_diff = self._get_months_difference(due_date, self.calculation_date)
         
         if months_diff <= 0:
             return Decimal('0')
         
-        # Taxas aproximadas mensais
+        # Variação acumulada do índice cadastrado, do mês do vencimento ao último mês fechado
+        series = economic_index_store.get_by_name(index_type)
+        if series is not None:
+            last_closed_month = self.calculation_date - relativedelta(months=1)
+            variation = series.accumulated_variation(due_date, last_closed_month)
+            if variation is not None:
+                return amount * variation
+        
+        # Sem série completa cadastrada: taxas aproximadas mensais
         rates = {
             'INPC': Decimal('0.005'),  # 0.5% ao mês
             'IGPM': Decimal('0.006'),  # 0.6% ao mês
@@ -218,8 +226,8 @@ class ChargeCalculatorService:
         delta = relativedelta(end_date, start_date)
         return delta.years * 12 + delta.months + (1 if delta.days > 0 else 0)
     
-    def generate_debt_spreadsheet(self, charge_id):
-        """Gera planilha detalhada do débito"""
+    def generate_debt_spreadsheet(self, charge_id, projection=None):
+        """Gera planilha detalhada do débito (projection limita os dados da cobrança retornados)"""
         charge = Charge.query.get(charge_id)
         if not charge:
             raise ValueError("Cobrança não encontrada")
@@ -227,6 +235,10 @@ class ChargeCalculatorService:
         # Recalcular para garantir valores atualizados
         calculation_result = self.calculate_charge(charge_id)
         
+        if projection:
+            # Recarrega só as colunas e relacionamentos pedidos
+            charge = projection.apply(Charge.query.filter(Charge.id == charge_id)).first()
+        
         # Buscar itens detalhados
         principal_items = ChargeItem.query.filter(
             ChargeItem.charge_id == charge_id,
@@ -247,7 +259,8 @@ class ChargeCalculatorService:
         ).all()
         
         return {
-            'charge': charge.to_dict(),
+            # Planilha/PDF consomem as datas já em texto (native=False)
+            'charge': projection.serialize(charge, native=False) if projection else charge.to_dict(),
             'calculation_date': self.calculation_date.isoformat(),
             'principal_items': [item.to_dict() for item in principal_items],
             'expense_items': [item.to_dict() for item in expense_items],
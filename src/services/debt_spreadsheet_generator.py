@@ -7,6 +7,7 @@ from openpyxl import Workbook
 from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
 from src.models.database import db, Charge, ChargeItem, ChargeFees
 from src.services.charge_calculator import ChargeCalculatorService
+from src.services.projection import Projection
 import os
 import tempfile
 from datetime import datetime
@@ -17,13 +18,21 @@ class DebtSpreadsheetGenerator:
     def __init__(self):
         self.temp_dir = tempfile.gettempdir()
         self.styles = getSampleStyleSheet()
+    
+    def _charge_projection(self):
+        """Somente os dados da cobrança usados no cabeçalho das planilhas"""
+        return Projection(
+            Charge,
+            fields=['id', 'chargeCode', 'dueDate', 'referencePeriod', 'client.person.name', 'debtor.name'],
+            include=['client.person', 'debtor']
+        )
         
     def generate_pdf(self, charge_id):
         """Gera planilha do débito em PDF"""
         try:
             # Buscar dados da cobrança
             calculator = ChargeCalculatorService()
-            data = calculator.generate_debt_spreadsheet(charge_id)
+            data = calculator.generate_debt_spreadsheet(charge_id, projection=self._charge_projection())
             
             charge = data['charge']
             
@@ -286,7 +295,7 @@ class DebtSpreadsheetGenerator:
         try:
             # Buscar dados da cobrança
             calculator = ChargeCalculatorService()
-            data = calculator.generate_debt_spreadsheet(charge_id)
+            data = calculator.generate_debt_spreadsheet(charge_id, projection=self._charge_projection())
             
             charge = data['charge']
             
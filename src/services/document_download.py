@@ -0,0 +1,39 @@
+import os
+from urllib.parse import quote
+from flask import current_app, send_file, make_response
+from src.services.document_storage import DocumentStorageService
+
+
+def send_document(file_path, download_name, mimetype=None):
+    """
+    Envia um arquivo de documento sem carregá-lo na memória do worker:
+    - Range requests (206), ETag/Last-Modified e GET condicional (304) via send_file(conditional=True)
+    - ETag forte pelo hash SHA-256 quando o arquivo é um blob endereçado por conteúdo
+    - Com DOCUMENT_ACCEL_REDIRECT_PREFIX (nginx) ou USE_X_SENDFILE (Apache/lighttpd),
+      a transferência é delegada ao servidor web
+    """
+    if not file_path or not os.path.isfile(file_path):
+        return None
+
+    etag = DocumentStorageService.sha256_from_path(file_path) or True
+
+    accel_prefix = current_app.config.get('DOCUMENT_ACCEL_REDIRECT_PREFIX')
+    if accel_prefix:
+        # nginx serve o arquivo a partir de uma location interna
+        storage_root = os.path.abspath(current_app.config.get('DOCUMENT_STORAGE_ROOT', '.'))
+        relative_path = os.path.relpath(os.path.abspath(file_path), storage_root)
+        response = make_response('')
+        response.headers['X-Accel-Redirect'] = accel_prefix.rstrip('/') + '/' + relative_path.replace(os.sep, '/')
+        response.headers['Content-Type'] = mimetype or 'application/octet-stream'
+        response.headers['Content-Disposition'] = f"attachment; filename*=UTF-8''{quote(download_name)}"
+        return response
+
+    return send_file(
+        os.path.abspath(file_path),
+        mimetype=mimetype,
+        as_attachment=True,
+        download_name=download_name,
+        conditional=True,
+        etag=etag,
+        max_age=0
+    )
@@ -0,0 +1,119 @@
+import hashlib
+import os
+import tempfile
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from src.models.database import db
+from src.models.document_blob import DocumentBlob
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class DocumentStorageService:
+    """
+    Armazenamento de documentos endereçado por conteúdo:
+    - O upload é copiado para disco em blocos, calculando o SHA-256 no mesmo passo
+    - Cada conteúdo é gravado uma única vez em uploads/blobs/<aa>/<bb>/<sha256>
+    - Documentos que apontam para o mesmo conteúdo compartilham o blob (contagem de referências)
+    - Arquivos sem referências só são apagados após o commit que removeu o blob
+    """
+
+    def __init__(self, base_dir=None):
+        self.base_dir = base_dir or os.getenv('DOCUMENT_STORAGE_DIR', os.path.join('uploads', 'blobs'))
+
+    def blob_path(self, sha256):
+        return os.path.join(self.base_dir, sha256[:2], sha256[2:4], sha256)
+
+    def store(self, stream):
+        """
+        Grava o conteúdo de um stream e retorna o DocumentBlob (com a referência já contada).
+        Não faz commit: o chamador confirma junto com o registro do documento.
+        """
+        os.makedirs(self.base_dir, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+
+        fd, temp_path = tempfile.mkstemp(dir=self.base_dir, prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                while True:
+                    chunk = stream.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    temp_file.write(chunk)
+                    size += len(chunk)
+
+            sha256 = digest.hexdigest()
+            final_path = self.blob_path(sha256)
+
+            blob = DocumentBlob.query.get(sha256)
+            if blob and os.path.exists(blob.storage_path):
+                # Conteúdo já armazenado: descarta a cópia temporária
+                os.remove(temp_path)
+            else:
+                # Um arquivo que fique sem blob (rollback) é reaproveitado no próximo upload do mesmo conteúdo
+                os.makedirs(os.path.dirname(final_path), exist_ok=True)
+                os.replace(temp_path, final_path)
+                if blob:
+                    blob.storage_path = final_path
+
+            if blob is None:
+                try:
+                    with db.session.begin_nested():
+                        blob = DocumentBlob(sha256=sha256, size=size, storage_path=final_path, ref_count=1)
+                        db.session.add(blob)
+                    return blob
+                except IntegrityError:
+                    # Upload simultâneo do mesmo conteúdo já criou o blob: conta a referência nele
+                    blob = DocumentBlob.query.get(sha256)
+
+            self._adjust(blob, 1)
+            return blob
+
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def release(self, sha256):
+        """Remove uma referência ao blob; apaga o arquivo quando não houver mais referências"""
+        blob = DocumentBlob.query.get(sha256) if sha256 else None
+        if not blob:
+            return
+
+        self._adjust(blob, -1)
+        if blob.ref_count <= 0:
+            db.session.info.setdefault('document_blob_deletions', []).append(blob.storage_path)
+            db.session.delete(blob)
+
+    @staticmethod
+    def _adjust(blob, delta):
+        # Incremento no banco (ref_count = ref_count + delta): seguro com uploads simultâneos
+        blob.ref_count = DocumentBlob.ref_count + delta
+        db.session.flush()
+        db.session.refresh(blob)
+
+    @staticmethod
+    def sha256_from_path(file_path):
+        """Extrai o hash de um caminho de blob (documentos antigos retornam None)"""
+        name = os.path.basename(file_path or '')
+        if len(name) == 64 and all(c in '0123456789abcdef' for c in name):
+            return name
+        return None
+
+
+# Arquivos de blobs removidos: apagados somente depois do commit (um rollback mantém o conteúdo)
+@event.listens_for(Session, 'after_commit')
+def _delete_released_files(session):
+    for path in session.info.pop('document_blob_deletions', ()):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+@event.listens_for(Session, 'after_rollback')
+def _keep_released_files(session):
+    session.info.pop('document_blob_deletions', None)
@@ -0,0 +1,254 @@
+import csv
+import io
+import json
+import re
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from sqlalchemy import insert, update
+from src.models.database import db, EconomicIndexValue
+from src.services.economic_index_store import record_index_changes, validate_monthly_variation
+
+MONTHS_PT = {
+    'janeiro': 1, 'fevereiro': 2, 'março': 3, 'marco': 3, 'abril': 4, 'maio': 5, 'junho': 6,
+    'julho': 7, 'agosto': 8, 'setembro': 9, 'outubro': 10, 'novembro': 11, 'dezembro': 12,
+    'jan': 1, 'fev': 2, 'mar': 3, 'abr': 4, 'mai': 5, 'jun': 6,
+    'jul': 7, 'ago': 8, 'set': 9, 'out': 10, 'nov': 11, 'dez': 12
+}
+
+LAYOUTS = ('generic', 'bcb', 'ibge', 'fgv')
+
+# Cabeçalhos das colunas de período e de valor (SIDRA: "Brasil";"Mês";"Variável";"Valor")
+PERIOD_HEADER = re.compile(r'^(m[eê]s|data|date|per[ií]odo|compet[eê]ncia|refer[eê]ncia|reference_?date)\b')
+VALUE_HEADER = re.compile(r'^(valor|value|varia[cç][aã]o|[ií]ndice|taxa)\b')
+
+
+class EconomicIndexImportError(ValueError):
+    """Erro de validação na importação de uma série; `errors` traz os erros por linha"""
+
+    def __init__(self, errors):
+        super().__init__(f'{len(errors)} linha(s) inválida(s) na série importada')
+        self.errors = errors
+
+
+class EconomicIndexImportService:
+    """
+    Importação em lote de séries de índices econômicos (INPC, IGPM, IPCA, CDI).
+
+    Formatos aceitos:
+    - generic: CSV/JSON com reference_date (AAAA-MM-DD ou AAAA-MM) e value
+    - bcb: séries SGS do Banco Central (JSON [{"data": "01/01/2024", "valor": "0.42"}] ou CSV "data";"valor")
+    - ibge: tabelas SIDRA exportadas em CSV ("janeiro 2024";"0,42")
+    - fgv: planilhas FGV exportadas em CSV ("01/2024";"0,42")
+
+    Os valores são variações mensais em % (0,42 = 0,42% no mês); números-índice são
+    rejeitados. Todas as linhas são validadas antes de gravar; a gravação é um upsert por
+    (index_id, reference_date) em uma única transação.
+    """
+
+    def parse(self, content, layout='generic', file_format=None):
+        """Converte o conteúdo bruto em [(reference_date, value)]"""
+        if layout not in LAYOUTS:
+            raise EconomicIndexImportError([{'row': None, 'error': f'Layout desconhecido: {layout}'}])
+
+        if isinstance(content, bytes):
+            content = self._decode(content)
+
+        if isinstance(content, str):
+            stripped = content.lstrip()
+            if file_format == 'json' or (file_format is None and stripped[:1] in ('[', '{')):
+                try:
+                    content = json.loads(content)
+                except json.JSONDecodeError as e:
+                    raise EconomicIndexImportError([{'row': e.lineno, 'error': f'JSON inválido: {e.msg}'}])
+            else:
+                return self._parse_rows(self._read_csv(content), layout)
+
+        if isinstance(content, dict):
+            content = content.get('values') or content.get('data') or []
+        if not isinstance(content, (list, tuple)):
+            raise EconomicIndexImportError([{'row': None, 'error': 'A série deve ser uma lista de valores'}])
+
+        rows = []
+        errors = []
+        for number, item in enumerate(content, start=1):
+            if isinstance(item, dict):
+                rows.append((
+                    item.get('reference_date') or item.get('referenceDate') or item.get('data') or item.get('date'),
+                    item.get('value') if item.get('value') is not None else item.get('valor')
+                ))
+            elif isinstance(item, (list, tuple)) and len(item) >= 2:
+                rows.append(tuple(item[:2]))
+            else:
+                errors.append({'row': number, 'error': 'Item deve ser um objeto ou um par [data, valor]', 'raw': item})
+        if errors:
+            raise EconomicIndexImportError(errors)
+        return self._parse_rows(rows, layout)
+
+    def upsert(self, index_id, values):
+        """
+        Grava a série (sem commit). Retorna contagem de inseridos/atualizados/inalterados.
+        Valores repetidos para o mesmo mês no arquivo: prevalece o último.
+        """
+        by_date = {}
+        for reference_date, value in values:
+            by_date[reference_date] = value
+
+        # Valores já gravados casam por ano/mês (registros antigos podem não estar no dia 1)
+        existing = {}
+        if by_date:
+            last = max(by_date)
+            rows = db.session.query(
+                EconomicIndexValue.id,
+                EconomicIndexValue.reference_date,
+                EconomicIndexValue.value
+            ).filter(
+                EconomicIndexValue.index_id == index_id,
+                EconomicIndexValue.reference_date >= min(by_date),
+                EconomicIndexValue.reference_date < date(last.year + last.month // 12, last.month % 12 + 1, 1)
+            ).all()
+            existing = {self._as_date(row.reference_date).replace(day=1): row for row in rows}
+
+        inserts = []
+        updates = []
+        changed_dates = []
+        unchanged = 0
+        for reference_date, value in sorted(by_date.items()):
+            current = existing.get(reference_date)
+            if current is None:
+                inserts.append({'index_id': index_id, 'reference_date': reference_date, 'value': value})
+            elif Decimal(str(current.value)) != value:
+                updates.append({'id': current.id, 'value': value})
+                reference_date = self._as_date(current.reference_date)
+            else:
+                unchanged += 1
+                continue
+            changed_dates.append(reference_date)
+
+        # INSERT multi-linha e UPDATE em lote por chave primária
+        if inserts:
+            db.session.execute(insert(EconomicIndexValue), inserts)
+        if updates:
+            db.session.execute(update(EconomicIndexValue), updates)
+
+        # Versiona a série para ETag e sincronização incremental
+        record_index_changes(db.session.connection(), [(index_id, d) for d in changed_dates])
+
+        return {
+            'inserted': len(inserts),
+            'updated': len(updates),
+            'unchanged': unchanged,
+            'total': len(by_date)
+        }
+
+    def _parse_rows(self, rows, layout):
+        values = []
+        errors = []
+        for number, (raw_date, raw_value) in enumerate(rows, start=1):
+            try:
+                reference_date = self._parse_date(raw_date, layout)
+                value = validate_monthly_variation(self._parse_decimal(raw_value))
+            except (ValueError, InvalidOperation, TypeError) as e:
+                errors.append({'row': number, 'error': str(e) or 'Valor inválido', 'raw': [raw_date, raw_value]})
+                continue
+            values.append((reference_date, value))
+
+        if errors:
+            raise EconomicIndexImportError(errors)
+        return values
+
+    def _read_csv(self, text):
+        """
+        Linhas (período, valor) do CSV. As colunas vêm do cabeçalho quando ele nomeia
+        o período (exportações do SIDRA trazem antes a coluna territorial);
+        sem cabeçalho, a primeira e a última coluna preenchidas.
+        """
+        sample = text[:4096]
+        # "01/2024";"0,42": a vírgula decimal empata a contagem com o ';'
+        delimiter = ';' if sample.count(';') and sample.count(';') >= sample.count(',') else ','
+        reader = csv.reader(io.StringIO(text), delimiter=delimiter)
+
+        rows = []
+        columns = None
+        for row in reader:
+            row = [cell.strip() for cell in row]
+            if columns is None and not rows and sum(1 for cell in row if cell) >= 2:
+                header = [cell.lower() for cell in row]
+                period = next((i for i, cell in enumerate(header)
+                               if PERIOD_HEADER.match(cell) and 'código' not in cell), None)
+                value = next((i for i, cell in enumerate(header) if VALUE_HEADER.match(cell)), None)
+                if period is not None:
+                    # Coluna de valor nomeada pela variável (ex.: "INPC - Variação mensal (%)"): a última
+                    columns = (period, value if value is not None else len(row) - 1)
+                    continue
+
+            if columns is not None:
+                if len(row) <= max(columns):
+                    continue
+                cells = [row[columns[0]], row[columns[1]]]
+            else:
+                cells = [cell for cell in row if cell]
+                if len(cells) < 2:
+                    continue
+            # Ignorar cabeçalhos e linhas de notas (sem número na coluna de valor)
+            if not re.search(r'\d', cells[-1]) or not re.search(r'\d', cells[0]):
+                continue
+            rows.append((cells[0], cells[-1]))
+        return rows
+
+    def _parse_date(self, raw_date, layout):
+        if isinstance(raw_date, (date, datetime)):
+            return self._as_date(raw_date).replace(day=1)
+
+        text = str(raw_date or '').strip().lower()
+        if not text:
+            raise ValueError('Data de referência ausente')
+
+        # AAAA-MM-DD / AAAA-MM
+        match = re.fullmatch(r'(\d{4})-(\d{1,2})(?:-\d{1,2})?', text)
+        if match:
+            return date(int(match.group(1)), int(match.group(2)), 1)
+
+        # DD/MM/AAAA (BCB) ou MM/AAAA (FGV)
+        match = re.fullmatch(r'(?:\d{1,2}/)?(\d{1,2})/(\d{4})', text)
+        if match:
+            return date(int(match.group(2)), int(match.group(1)), 1)
+
+        # "janeiro 2024" / "jan/2024" (IBGE)
+        match = re.fullmatch(r'([a-zç]+)[\s/-]+(?:de\s+)?(\d{4})', text)
+        if match and match.group(1) in MONTHS_PT:
+            return date(int(match.group(2)), MONTHS_PT[match.group(1)], 1)
+
+        # AAAAMM (código de período do SIDRA)
+        match = re.fullmatch(r'(\d{4})(\d{2})', text)
+        if match and layout == 'ibge':
+            return date(int(match.group(1)), int(match.group(2)), 1)
+
+        raise ValueError(f'Data de referência inválida: {raw_date}')
+
+    def _parse_decimal(self, raw_value):
+        if isinstance(raw_value, (int, float, Decimal)):
+            return Decimal(str(raw_value))
+
+        text = str(raw_value or '').strip().replace('%', '')
+        if not text:
+            raise ValueError('Valor ausente')
+        if ',' in text:
+            # Formato brasileiro: 1.234,56
+            text = text.replace('.', '').replace(',', '.')
+        return Decimal(text)
+
+    def _decode(self, content):
+        for encoding in ('utf-8-sig', 'latin-1'):
+            try:
+                return content.decode(encoding)
+            except UnicodeDecodeError:
+                continue
+        raise EconomicIndexImportError([{'row': None, 'error': 'Codificação de arquivo não suportada'}])
+
+    @staticmethod
+    def _as_date(value):
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, str):
+            return datetime.strptime(value[:10], '%Y-%m-%d').date()
+        return value
@@ -0,0 +1,253 @@
+import os
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from sqlalchemy import event, func, inspect
+from sqlalchemy.orm import Session
+from src.models.database import db, EconomicIndex, EconomicIndexValue
+from src.models.economic_index_change import EconomicIndexChange
+
+
+# Os valores das séries são a variação percentual do mês (0.42 = 0,42% no mês), não
+# números-índice (ex.: IPCA 6.800,00): a acumulação usa o fator (1 + v/100)
+MAX_MONTHLY_VARIATION = Decimal('100')
+
+
+def validate_monthly_variation(value):
+    """Converte e valida uma variação mensal em %; ValueError fora de (-100, 100)"""
+    try:
+        value = Decimal(str(value))
+    except InvalidOperation:
+        raise ValueError(f'Valor inválido: {value}')
+    if not -MAX_MONTHLY_VARIATION < value < MAX_MONTHLY_VARIATION:
+        raise ValueError(
+            f'Valor fora da faixa de uma variação mensal em % (recebido {value}; número-índice?)'
+        )
+    return value
+
+
+def month_key(value):
+    """Converte uma data em um inteiro sequencial de mês (ano * 12 + mês - 1)"""
+    if isinstance(value, str):
+        value = datetime.strptime(value[:7], '%Y-%m').date()
+    return value.year * 12 + value.month - 1
+
+
+def as_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):
+        return datetime.strptime(value[:10], '%Y-%m-%d').date()
+    return value
+
+
+class IndexSeries:
+    """
+    Série mensal de um índice (variações percentuais do mês) em arrays ordenados:
+    - valor do mês: O(1) via dicionário mês -> posição
+    - variação acumulada entre meses: O(1) via produto acumulado dos fatores (1 + v/100)
+    - fatia por período: O(log n) via busca binária
+    """
+
+    def __init__(self, index_id, rows, version=0):
+        self.index_id = index_id
+        self.version = version
+        self.ids = []
+        self.dates = []
+        self.months = []
+        self.values = []
+        self.cumulative = []
+        self.loaded_at = time.monotonic()
+
+        factor = Decimal('1')
+        for value_id, reference_date, value in rows:
+            reference_date = as_date(reference_date)
+            value = Decimal(str(value))
+            factor *= 1 + value / 100
+            self.ids.append(value_id)
+            self.dates.append(reference_date)
+            self.months.append(month_key(reference_date))
+            self.values.append(value)
+            self.cumulative.append(factor)
+
+        self.position = {month: position for position, month in enumerate(self.months)}
+
+    def __len__(self):
+        return len(self.values)
+
+    def value_at(self, reference_date):
+        """Valor (variação % do mês) na data de referência, ou None"""
+        position = self.position.get(month_key(reference_date))
+        return self.values[position] if position is not None else None
+
+    def accumulated_variation(self, start_date, end_date):
+        """
+        Variação acumulada (fração, ex.: 0.0523 = 5,23%) dos meses de start_date a
+        end_date, inclusive. Retorna None se a série não cobrir o período inteiro.
+        """
+        start, end = month_key(start_date), month_key(end_date)
+        if end < start:
+            return Decimal('0')
+
+        start_position = self.position.get(start)
+        end_position = self.position.get(end)
+        if start_position is None or end_position is None or end_position - start_position != end - start:
+            return None
+
+        previous = self.cumulative[start_position - 1] if start_position > 0 else Decimal('1')
+        return self.cumulative[end_position] / previous - 1
+
+    def slice(self, start_date=None, end_date=None):
+        """Posições [início, fim) dos meses entre start_date e end_date, inclusive"""
+        lo = bisect_left(self.months, month_key(start_date)) if start_date else 0
+        hi = bisect_right(self.months, month_key(end_date)) if end_date else len(self.months)
+        return range(lo, hi)
+
+    def to_list(self, start_date=None, end_date=None):
+        return [self._item(position) for position in self.slice(start_date, end_date)]
+
+    def changes_since(self, changed_dates):
+        """Separa os meses alterados em valores atuais e meses removidos da série"""
+        current = []
+        deleted = []
+        for reference_date in sorted(set(changed_dates)):
+            position = self.position.get(month_key(reference_date))
+            if position is None:
+                deleted.append(str(reference_date))
+            else:
+                current.append(self._item(position))
+        return current, deleted
+
+    def _item(self, position):
+        return {
+            "id": self.ids[position],
+            "reference_date": str(self.dates[position]),
+            "value": str(self.values[position])
+        }
+
+
+class EconomicIndexStore:
+    """
+    Cache em processo das séries de índices econômicos. Cada série é carregada
+    uma vez e recarregada quando há escrita (hooks de commit) ou após o TTL,
+    para enxergar alterações feitas por outros processos.
+    """
+
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self._series = {}
+        self._names = {}
+        self._lock = threading.Lock()
+
+    def get(self, index_id, version=None):
+        """Série do índice; com `version`, recarrega se a cópia em memória for mais antiga"""
+        series = self._series.get(index_id)
+        if (
+            series is None
+            or time.monotonic() - series.loaded_at > self.ttl
+            or (version is not None and series.version < version)
+        ):
+            series = self._load(index_id)
+        return series
+
+    def current_version(self, index_id):
+        """Versão atual do índice no banco (maior id do log de alterações)"""
+        version = db.session.query(func.max(EconomicIndexChange.id)).filter(
+            EconomicIndexChange.index_id == index_id
+        ).scalar()
+        return version or 0
+
+    def changed_dates(self, index_id, since_version):
+        """Meses de referência alterados depois de uma versão"""
+        rows = db.session.query(EconomicIndexChange.reference_date).filter(
+            EconomicIndexChange.index_id == index_id,
+            EconomicIndexChange.id > since_version
+        ).distinct().all()
+        return [row.reference_date for row in rows]
+
+    def get_by_name(self, name):
+        """Série pelo nome do índice (ex.: 'INPC'), ou None se o índice não existir"""
+        index_id = self._names.get(name)
+        if index_id is None:
+            index = EconomicIndex.query.filter_by(name=name).first()
+            if not index:
+                return None
+            index_id = self._names[name] = index.id
+        return self.get(index_id)
+
+    def invalidate(self, index_id=None):
+        with self._lock:
+            if index_id is None:
+                self._series.clear()
+                self._names.clear()
+            else:
+                self._series.pop(index_id, None)
+
+    def _load(self, index_id):
+        version = self.current_version(index_id)
+        rows = db.session.query(
+            EconomicIndexValue.id,
+            EconomicIndexValue.reference_date,
+            EconomicIndexValue.value
+        ).filter(
+            EconomicIndexValue.index_id == index_id
+        ).order_by(EconomicIndexValue.reference_date).all()
+
+        series = IndexSeries(index_id, rows, version)
+        with self._lock:
+            self._series[index_id] = series
+        return series
+
+
+economic_index_store = EconomicIndexStore(ttl=int(os.getenv('ECONOMIC_INDEX_STORE_TTL', '300')))
+
+
+def record_index_changes(connection, changes):
+    """Grava no log de alterações os pares (index_id, reference_date) alterados"""
+    rows = [
+        {'index_id': index_id, 'reference_date': as_date(reference_date), 'changed_at': datetime.utcnow()}
+        for index_id, reference_date in set(changes)
+        if index_id is not None and reference_date is not None
+    ]
+    if rows:
+        connection.execute(EconomicIndexChange.__table__.insert(), rows)
+
+
+# Log de alterações e invalidação das séries alteradas pelo ORM (aplicada após o commit)
+@event.listens_for(Session, 'after_flush')
+def _collect_index_changes(session, flush_context):
+    changed = session.info.setdefault('economic_index_changes', set())
+    log = []
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, EconomicIndexValue):
+            changed.add(obj.index_id)
+            log.append((obj.index_id, obj.reference_date))
+            attrs = inspect(obj).attrs
+            previous_dates = attrs.reference_date.history.deleted or [obj.reference_date]
+            log.extend((obj.index_id, previous) for previous in attrs.reference_date.history.deleted)
+            # Valor movido para outro índice: a série antiga também perde o mês
+            for previous_index in attrs.index_id.history.deleted:
+                changed.add(previous_index)
+                log.extend((previous_index, previous) for previous in previous_dates)
+        elif isinstance(obj, EconomicIndex):
+            changed.add(None)
+    record_index_changes(session.connection(), log)
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_index_changes(session):
+    changed = session.info.pop('economic_index_changes', None)
+    if not changed:
+        return
+    if None in changed:
+        economic_index_store.invalidate()
+        return
+    for index_id in changed:
+        economic_index_store.invalidate(index_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_index_changes(session):
+    session.info.pop('economic_index_changes', None)
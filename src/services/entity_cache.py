@@ -0,0 +1,488 @@
+import base64
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, time as dt_time
+from decimal import Decimal
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.session import make_transient_to_detached
+from src.services.metrics import ENTITY_CACHE_LOOKUPS
+
+
+def _encode(value):
+    # Tipos das colunas que o JSON não representa: marcados para reconstrução exata
+    if isinstance(value, datetime):
+        return {'__type': 'datetime', 'value': value.isoformat()}
+    if isinstance(value, date):
+        return {'__type': 'date', 'value': value.isoformat()}
+    if isinstance(value, dt_time):
+        return {'__type': 'time', 'value': value.isoformat()}
+    if isinstance(value, Decimal):
+        return {'__type': 'decimal', 'value': str(value)}
+    if isinstance(value, bytes):
+        return {'__type': 'bytes', 'value': base64.b64encode(value).decode()}
+    raise TypeError(f'Tipo não suportado no cache compartilhado: {type(value).__name__}')
+
+
+DECODERS = {
+    'datetime': datetime.fromisoformat,
+    'date': date.fromisoformat,
+    'time': dt_time.fromisoformat,
+    'decimal': Decimal,
+    'bytes': base64.b64decode,
+}
+
+
+def _decode(obj):
+    decoder = DECODERS.get(obj.get('__type')) if len(obj) == 2 and 'value' in obj else None
+    return decoder(obj['value']) if decoder else obj
+
+
+def dump_snapshot(values):
+    """Snapshot das colunas em JSON (sem pickle: o arquivo compartilhado não executa código ao ser lido)"""
+    return json.dumps(values, default=_encode, separators=(',', ':'))
+
+
+def load_snapshot(text):
+    return json.loads(text, object_hook=_decode)
+
+
+class SharedEntityTier:
+    """
+    Camada compartilhada entre processos (arquivo SQLite local).
+
+    Guarda os snapshots das entidades e um log de invalidações, que cada processo
+    lê periodicamente para descartar as entradas da sua camada em memória.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection().executescript("""
+            CREATE TABLE IF NOT EXISTS entity_cache (
+                key VARCHAR(200) PRIMARY KEY,
+                value BLOB NOT NULL,
+                expires_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS entity_cache_invalidations (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                key VARCHAR(200) NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS entity_cache_settings (
+                name VARCHAR(50) PRIMARY KEY,
+                value VARCHAR(50) NOT NULL
+            );
+        """)
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        # Conexões SQLite não podem atravessar um fork (workers pré-carregados do gunicorn)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def get(self, key):
+        row = self._connection().execute(
+            'SELECT value FROM entity_cache WHERE key = ? AND expires_at > ?', (key, time.time())
+        ).fetchone()
+        if row is None or not isinstance(row[0], str):
+            # Entradas binárias de versões anteriores (pickle) são ignoradas
+            return None
+        return load_snapshot(row[0])
+
+    def set(self, key, value, ttl, since=None):
+        """
+        Grava o snapshot. Com `since` (last_seq() lido antes da consulta ao banco), a gravação
+        é descartada se a chave foi invalidada nesse intervalo (evita recachear um valor antigo).
+        """
+        snapshot = dump_snapshot(value)
+        table = key.split(':', 1)[0]
+        self._connection().execute(
+            'INSERT OR REPLACE INTO entity_cache (key, value, expires_at) '
+            'SELECT ?, ?, ? WHERE NOT EXISTS ('
+            '  SELECT 1 FROM entity_cache_invalidations WHERE seq > ? AND key IN (?, ?, ?))',
+            (key, snapshot, time.time() + ttl, since if since is not None else 2 ** 62, key, f'{table}:*', '*')
+        )
+
+    def invalidate(self, keys):
+        """Remove as chaves (ou prefixos 'tabela:*') e registra a invalidação para os demais processos"""
+        connection = self._connection()
+        now = time.time()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            for key in keys:
+                if key.endswith('*'):
+                    connection.execute('DELETE FROM entity_cache WHERE key LIKE ?', (key[:-1] + '%',))
+                else:
+                    connection.execute('DELETE FROM entity_cache WHERE key = ?', (key,))
+            connection.executemany(
+                'INSERT INTO entity_cache_invalidations (key, created_at) VALUES (?, ?)',
+                [(key, now) for key in keys]
+            )
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+
+    def invalidations_since(self, seq):
+        return self._connection().execute(
+            'SELECT seq, key FROM entity_cache_invalidations WHERE seq > ? ORDER BY seq', (seq,)
+        ).fetchall()
+
+    def last_seq(self):
+        row = self._connection().execute('SELECT MAX(seq) FROM entity_cache_invalidations').fetchone()
+        return row[0] or 0
+
+    def purge(self, older_than):
+        connection = self._connection()
+        connection.execute('DELETE FROM entity_cache WHERE expires_at <= ?', (time.time(),))
+        connection.execute('DELETE FROM entity_cache_invalidations WHERE created_at < ?', (older_than,))
+
+    def clear(self):
+        self._connection().execute('DELETE FROM entity_cache')
+        self.invalidate(['*'])
+
+    def get_setting(self, name):
+        row = self._connection().execute(
+            'SELECT value FROM entity_cache_settings WHERE name = ?', (name,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def set_setting(self, name, value):
+        self._connection().execute(
+            'INSERT OR REPLACE INTO entity_cache_settings (name, value) VALUES (?, ?)', (name, value)
+        )
+
+
+class EntityCache:
+    """
+    Cache read-through de entidades por chave primária (ex.: Charge, User).
+
+    - Camada local: LRU em memória por processo, com TTL curto
+    - Camada compartilhada (opcional): arquivo SQLite usado por todos os workers
+    - Invalidação: entidades alteradas/removidas são descartadas no after_commit;
+      UPDATE/DELETE em lote invalidam a tabela inteira
+    - Chave de desligamento: ENTITY_CACHE_ENABLED=false ou set_enabled(False)
+      (propagado aos demais processos pela camada compartilhada)
+
+    O cache guarda apenas os valores das colunas; get() reconstrói a entidade e a
+    anexa à sessão com merge(load=False), sem SELECT. Relacionamentos continuam
+    sendo carregados normalmente sob demanda. Use apenas em rotas de leitura:
+    rotas que alteram a entidade, inclusive por serviços (ex.: calculate_charge),
+    devem ler do banco, pois a sessão devolveria o snapshot do cache.
+    """
+
+    def __init__(self, maxsize=5000, ttl=300, local_ttl=30, shared_path=None, enabled=True, sync_interval=1.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.local_ttl = local_ttl
+        self.sync_interval = sync_interval
+        self.enabled = enabled
+        self.models = {}
+        self.shared = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Geração local: incrementada a cada invalidação (descarta leituras concorrentes antigas)
+        self._generation = 0
+        self._last_seq = 0
+        self._next_sync = 0
+        self._next_purge = 0
+        self.hits = {'local': 0, 'shared': 0}
+        self.misses = 0
+        if shared_path:
+            self.configure(shared_path=shared_path)
+
+    def configure(self, maxsize=None, ttl=None, local_ttl=None, shared_path=None, enabled=None):
+        if maxsize is not None:
+            self.maxsize = maxsize
+        if ttl is not None:
+            self.ttl = ttl
+        if local_ttl is not None:
+            self.local_ttl = local_ttl
+        if enabled is not None:
+            self.enabled = enabled
+        if shared_path:
+            self.shared = SharedEntityTier(shared_path)
+            self._last_seq = self.shared.last_seq()
+        self.clear(local_only=True)
+
+    def register(self, *models):
+        for model in models:
+            self.models[model.__table__.name] = model
+
+    def get(self, model, entity_id):
+        """Retorna a entidade (anexada à sessão do modelo) ou None se não existir"""
+        session = model.query.session
+        if not self.enabled or model.__table__.name not in self.models or entity_id is None:
+            return session.get(model, entity_id)
+
+        self._sync()
+        if not self.enabled:
+            return session.get(model, entity_id)
+
+        # Já carregada nesta sessão: identity map, sem consulta
+        identity_key = inspect(model).identity_key_from_primary_key([entity_id])
+        if identity_key in session.identity_map:
+            return session.identity_map[identity_key]
+
+        key = self._key(model.__table__.name, entity_id)
+        values = self._get_local(key)
+        tier = 'local'
+        if values is None and self.shared is not None:
+            values = self.shared.get(key)
+            tier = 'shared'
+            if values is not None:
+                self._set_local(key, values)
+
+        if values is None:
+            self.misses += 1
+            ENTITY_CACHE_LOOKUPS.labels(model.__table__.name, 'miss').inc()
+            # Marcas lidas antes da consulta: uma invalidação durante a leitura impede o set
+            token = self._token()
+            entity = session.get(model, entity_id)
+            if entity is not None:
+                self.set(entity, token=token)
+            return entity
+
+        self.hits[tier] += 1
+        ENTITY_CACHE_LOOKUPS.labels(model.__table__.name, f'{tier}_hit').inc()
+        entity = inspect(model).class_manager.new_instance()
+        for name, value in values.items():
+            setattr(entity, name, value)
+        make_transient_to_detached(entity)
+        return session.merge(entity, load=False)
+
+    def exists(self, model, entity_id):
+        return self.get(model, entity_id) is not None
+
+    def set(self, entity, token=None):
+        """Guarda o snapshot da entidade. `token` (de _token()) descarta a gravação se houve invalidação desde então."""
+        state = inspect(entity)
+        table = state.mapper.local_table.name
+        if not self.enabled or table not in self.models:
+            return
+        values = {attr.key: state.dict[attr.key] for attr in state.mapper.column_attrs if attr.key in state.dict}
+        if len(values) < len(state.mapper.column_attrs):
+            # Entidade carregada parcialmente (load_only/deferred): não cachear
+            return
+        key = self._key(table, state.identity[0])
+        generation, since = token or (None, None)
+        self._set_local(key, values, generation)
+        if self.shared is not None:
+            try:
+                self.shared.set(key, values, self.ttl, since)
+            except TypeError:
+                # Coluna de tipo sem representação JSON: fica somente na camada local
+                pass
+
+    def _token(self):
+        return self._generation, self.shared.last_seq() if self.shared is not None else None
+
+    def invalidate(self, keys):
+        keys = list(keys)
+        if not keys:
+            return
+        self._evict_local(keys)
+        if self.shared is not None:
+            self.shared.invalidate(keys)
+
+    def clear(self, local_only=False):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+        if self.shared is not None and not local_only:
+            self.shared.clear()
+
+    def set_enabled(self, enabled):
+        """Chave de desligamento em tempo de execução (todos os processos, se houver camada compartilhada)"""
+        self.enabled = enabled
+        self.clear(local_only=True)
+        if self.shared is not None:
+            self.shared.set_setting('enabled', 'true' if enabled else 'false')
+            self._next_sync = 0
+
+    def stats(self):
+        hits = self.hits['local'] + self.hits['shared']
+        lookups = hits + self.misses
+        return {
+            'enabled': self.enabled,
+            'sharedTier': self.shared.path if self.shared is not None else None,
+            'entities': sorted(self.models),
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'ttl': self.ttl,
+            'localTtl': self.local_ttl,
+            'localHits': self.hits['local'],
+            'sharedHits': self.hits['shared'],
+            'misses': self.misses,
+            'hitRatio': round(hits / lookups, 4) if lookups else None
+        }
+
+    @staticmethod
+    def _key(table, entity_id):
+        return f'{table}:{entity_id}'
+
+    def _get_local(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def _set_local(self, key, values, generation=None):
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._entries[key] = (values, time.monotonic() + min(self.local_ttl, self.ttl))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def _evict_local(self, keys):
+        with self._lock:
+            self._generation += 1
+            for key in keys:
+                if key == '*':
+                    self._entries.clear()
+                elif key.endswith('*'):
+                    for cached in [k for k in self._entries if k.startswith(key[:-1])]:
+                        del self._entries[cached]
+                else:
+                    self._entries.pop(key, None)
+
+    def _sync(self):
+        """Aplica invalidações e a chave de desligamento vindas de outros processos (no máximo 1x/intervalo)"""
+        if self.shared is None or time.monotonic() < self._next_sync:
+            return
+        self._next_sync = time.monotonic() + self.sync_interval
+
+        setting = self.shared.get_setting('enabled')
+        if setting is not None and (setting == 'true') != self.enabled:
+            self.enabled = setting == 'true'
+            self.clear(local_only=True)
+
+        rows = self.shared.invalidations_since(self._last_seq)
+        if rows:
+            self._last_seq = rows[-1][0]
+            self._evict_local([row[1] for row in rows])
+
+        # O log de invalidações só precisa cobrir o TTL da camada local
+        if time.monotonic() >= self._next_purge:
+            self._next_purge = time.monotonic() + 60
+            self.shared.purge(time.time() - max(self.local_ttl, 60) * 2)
+
+
+entity_cache = EntityCache()
+
+
+class InvalidationFeed:
+    """
+    Invalidações entre processos para outros caches em memória (telefones, identidades),
+    pelo mesmo log da camada compartilhada do entity_cache, com chaves '<prefix><id>'.
+
+    poll() devolve os ids invalidados por qualquer processo desde a última leitura,
+    ALL quando o cache inteiro deve ser descartado ('<prefix>*', '*' ou trecho do log
+    já removido) e nada se não houver camada compartilhada.
+    """
+
+    ALL = object()
+
+    def __init__(self, prefix, sync_interval=1.0):
+        self.prefix = prefix
+        self.sync_interval = sync_interval
+        self._last_seq = None
+        self._next_sync = 0
+
+    def publish(self, ids):
+        if entity_cache.shared is not None and ids:
+            entity_cache.shared.invalidate([f'{self.prefix}{entity_id}' for entity_id in ids])
+
+    def publish_clear(self):
+        if entity_cache.shared is not None:
+            entity_cache.shared.invalidate([self.prefix + '*'])
+
+    def poll(self):
+        shared = entity_cache.shared
+        if shared is None or time.monotonic() < self._next_sync:
+            return ()
+        self._next_sync = time.monotonic() + self.sync_interval
+        if self._last_seq is None:
+            self._last_seq = shared.last_seq()
+            return ()
+        rows = shared.invalidations_since(self._last_seq)
+        if not rows:
+            return ()
+        gap = rows[0][0] != self._last_seq + 1
+        self._last_seq = rows[-1][0]
+        keys = [row[1] for row in rows]
+        if gap or '*' in keys or self.prefix + '*' in keys:
+            return self.ALL
+        return [key[len(self.prefix):] for key in keys if key.startswith(self.prefix)]
+
+
+def init_entity_cache(app, *models):
+    """Configura o cache a partir do ambiente e registra os modelos cacheados"""
+    shared_path = os.getenv('ENTITY_CACHE_SHARED_PATH')
+    if shared_path is None:
+        shared_path = os.path.join(app.instance_path, 'entity_cache.db')
+    entity_cache.configure(
+        maxsize=int(os.getenv('ENTITY_CACHE_MAXSIZE', '5000')),
+        ttl=int(os.getenv('ENTITY_CACHE_TTL', '300')),
+        local_ttl=int(os.getenv('ENTITY_CACHE_LOCAL_TTL', '30')),
+        shared_path=shared_path or None,
+        enabled=os.getenv('ENTITY_CACHE_ENABLED', 'true').lower() == 'true'
+    )
+    entity_cache.register(*models)
+    app.extensions['entity_cache'] = entity_cache
+
+
+# Invalidação das entidades alteradas pelo ORM (aplicada após o commit)
+@event.listens_for(Session, 'after_flush')
+def _collect_entity_changes(session, flush_context):
+    if not entity_cache.models:
+        return
+    changed = session.info.setdefault('entity_cache_changes', set())
+    for obj in list(session.dirty) + list(session.deleted):
+        state = inspect(obj)
+        table = state.mapper.local_table.name
+        if table in entity_cache.models and state.identity:
+            changed.add(EntityCache._key(table, state.identity[0]))
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _collect_bulk_changes(orm_execute_state):
+    # UPDATE/DELETE em lote não passam pelo flush: invalida a tabela inteira
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.local_table.name in entity_cache.models:
+        changed = orm_execute_state.session.info.setdefault('entity_cache_changes', set())
+        changed.add(f'{mapper.local_table.name}:*')
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_entity_changes(session):
+    changed = session.info.pop('entity_cache_changes', None)
+    if changed:
+        entity_cache.invalidate(changed)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_entity_changes(session):
+    session.info.pop('entity_cache_changes', None)
@@ -0,0 +1,30 @@
+import gzip
+from flask import request
+
+MIN_COMPRESS_SIZE = 1024
+
+
+def is_not_modified(etag):
+    """Verifica If-None-Match contra o ETag (comparação fraca)"""
+    return request.if_none_match.contains_weak(etag)
+
+
+def compress_response(response, min_size=MIN_COMPRESS_SIZE):
+    """Comprime com gzip quando o cliente aceita e o corpo é grande o suficiente"""
+    response.vary.add('Accept-Encoding')
+
+    if (
+        response.direct_passthrough
+        or response.status_code != 200
+        or 'Content-Encoding' in response.headers
+        or 'gzip' not in request.accept_encodings
+    ):
+        return response
+
+    data = response.get_data()
+    if len(data) < min_size:
+        return response
+
+    response.set_data(gzip.compress(data, compresslevel=6))
+    response.headers['Content-Encoding'] = 'gzip'
+    return response
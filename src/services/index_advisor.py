@@ -0,0 +1,107 @@
+from datetime import date
+from sqlalchemy import select
+from src.models.database import (
+    db, Charge, ChargeItem, ChargeFees, ChargeProgress, ChargeDocument,
+    WhatsAppMessage, Unit, UnitOwner, CalculationParameter, EconomicIndexValue
+)
+from src.models.phone_index import PersonPhoneIndex
+
+SAMPLE_ID = '00000000-0000-0000-0000-000000000000'
+OPEN_STATUSES = ['PENDING', 'OVERDUE', 'NEGOTIATED', 'NEGOTIATING']
+
+
+def registered_query_shapes():
+    """Formatos de consulta usados pelas rotas e serviços (nome -> SELECT)"""
+    today = date.today()
+    return {
+        'charges.check_unit_status': select(Charge).where(
+            Charge.unit_id == SAMPLE_ID, Charge.is_active == True, Charge.status.in_(OPEN_STATUSES)
+        ),
+        'charges.unit_history': select(Charge).where(
+            Charge.unit_id == SAMPLE_ID, Charge.is_active == True
+        ).order_by(Charge.created_at.desc()),
+        'calculator.items': select(ChargeItem).where(
+            ChargeItem.charge_id == SAMPLE_ID, ChargeItem.category == 'PRINCIPAL', ChargeItem.is_active == True
+        ),
+        'calculator.fees': select(ChargeFees).where(
+            ChargeFees.charge_id == SAMPLE_ID, ChargeFees.fee_type == 'EXTRAJUDICIAL', ChargeFees.is_active == True
+        ),
+        'calculator.parameters': select(CalculationParameter).where(
+            CalculationParameter.client_id == SAMPLE_ID,
+            CalculationParameter.is_active == True,
+            CalculationParameter.start_date <= today
+        ),
+        'progress.list': select(ChargeProgress).where(
+            ChargeProgress.charge_id == SAMPLE_ID, ChargeProgress.is_active == True
+        ).order_by(ChargeProgress.progress_date.desc()),
+        'progress.documents': select(ChargeDocument).where(
+            ChargeDocument.charge_id == SAMPLE_ID, ChargeDocument.is_active == True
+        ).order_by(ChargeDocument.upload_date.desc()),
+        'progress.whatsapp': select(WhatsAppMessage).where(
+            WhatsAppMessage.charge_id == SAMPLE_ID, WhatsAppMessage.is_active == True
+        ).order_by(WhatsAppMessage.sent_at.desc()),
+        'webhook.dedup': select(WhatsAppMessage.message_id).where(
+            WhatsAppMessage.message_id.in_(['wamid.1', 'wamid.2'])
+        ),
+        'webhook.phone_lookup': select(PersonPhoneIndex.person_id).where(
+            PersonPhoneIndex.phone_e164.in_(['+5511987654321'])
+        ),
+        'webhook.open_charges': select(Charge).where(
+            Charge.debtor_id.in_([SAMPLE_ID]),
+            Charge.status.in_(['PENDING', 'OVERDUE', 'NEGOTIATING']),
+            Charge.is_active == True
+        ),
+        'clients.unit_count': select(Unit.id).where(Unit.client_id == SAMPLE_ID, Unit.is_active == True),
+        'clients.unit_code_check': select(Unit).where(Unit.client_id == SAMPLE_ID, Unit.unit_code == 'A-101'),
+        'clients.unit_owners': select(UnitOwner).where(UnitOwner.unit_id == SAMPLE_ID, UnitOwner.is_active == True),
+        'economic_indices.values': select(EconomicIndexValue).where(
+            EconomicIndexValue.index_id == 1
+        ).order_by(EconomicIndexValue.reference_date),
+    }
+
+
+class IndexAdvisor:
+    """Executa EXPLAIN nos formatos de consulta registrados e aponta varreduras completas"""
+
+    def __init__(self, engine=None):
+        self.engine = engine or db.engine
+
+    def analyze(self):
+        results = []
+        with self.engine.connect() as connection:
+            for name, statement in registered_query_shapes().items():
+                plan = self._explain(connection, statement)
+                results.append({
+                    'query': name,
+                    'plan': plan,
+                    'fullScans': self._full_scans(plan)
+                })
+        return results
+
+    def _explain(self, connection, statement):
+        dialect = connection.dialect
+        compiled = statement.compile(dialect=dialect, compile_kwargs={'render_postcompile': True})
+        if compiled.positional:
+            params = tuple(compiled.params[key] for key in compiled.positiontup)
+        else:
+            params = compiled.params
+
+        prefix = 'EXPLAIN QUERY PLAN ' if dialect.name == 'sqlite' else 'EXPLAIN '
+        rows = connection.exec_driver_sql(prefix + str(compiled), params).fetchall()
+
+        if dialect.name == 'sqlite':
+            return [row[-1] for row in rows]
+        if dialect.name == 'mysql':
+            return [f"table={row[2]} type={row[4]} key={row[6]}" for row in rows]
+        return [row[0] for row in rows]
+
+    def _full_scans(self, plan):
+        flagged = []
+        for line in plan:
+            if line.startswith('SCAN ') and 'INDEX' not in line:
+                flagged.append(line)          # SQLite
+            elif 'Seq Scan on' in line:
+                flagged.append(line.strip())  # PostgreSQL
+            elif ' type=ALL ' in line:
+                flagged.append(line)          # MySQL
+        return flagged
@@ -0,0 +1,67 @@
+import os
+from collections.abc import Mapping
+from decimal import Decimal
+from flask import current_app
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson é opcional
+    orjson = None
+
+
+def _default(value):
+    """Tipos que o orjson não serializa nativamente (datetime/date/UUID/dataclass já são nativos)"""
+    if isinstance(value, Decimal):
+        # Mesma saída do provider padrão do Flask (texto, sem perda de precisão)
+        return str(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, Mapping):
+        return dict(value)
+    if hasattr(value, 'to_dict'):
+        return value.to_dict()
+    raise TypeError(f'Objeto do tipo {type(value).__name__} não é serializável em JSON')
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Provider JSON baseado em orjson: serializa direto para bytes, com suporte nativo
+    a datetime/date/UUID (mesmo formato de isoformat()) e Decimal como texto, igual ao
+    provider padrão. Subclasses de dict (OrderedDict, defaultdict) são serializadas como dict.
+    """
+
+    def dumps(self, obj, **kwargs):
+        return self._dumps_bytes(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self._dumps_bytes(obj), mimetype=self.mimetype)
+
+    def _dumps_bytes(self, obj):
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if self.compact is False:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=_default, option=option)
+
+
+def serializes_natively(app=None):
+    """
+    Indica se o provider da aplicação grava date/datetime/time direto em bytes: nesse caso
+    a serialização de modelos (Projection.serialize) dispensa o isoformat() prévio.
+    """
+    app = app or current_app
+    return orjson is not None and isinstance(app.json, OrjsonProvider)
+
+
+def init_json_provider(app):
+    """Seleciona o provider JSON (JSON_PROVIDER=orjson|default); usa o padrão se orjson não estiver instalado"""
+    if os.getenv('JSON_PROVIDER', 'orjson') == 'orjson' and orjson is not None:
+        app.json = OrjsonProvider(app)
+        # Ordenação de chaves tem custo e nenhum cliente depende dela
+        app.json.sort_keys = False
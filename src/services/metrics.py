@@ -0,0 +1,134 @@
+import hmac
+import os
+import time
+from flask import Response, g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest
+)
+from prometheus_client import multiprocess
+from sqlalchemy import event
+from sqlalchemy.pool import Pool
+
+# Com PROMETHEUS_MULTIPROC_DIR definido (antes de iniciar os workers), cada processo
+# grava suas métricas em arquivos mmap e o endpoint agrega todos os processos.
+MULTIPROCESS = bool(os.getenv('PROMETHEUS_MULTIPROC_DIR'))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+REQUESTS = Counter(
+    'http_requests_total', 'Requisições HTTP por rota',
+    ['method', 'blueprint', 'endpoint', 'status']
+)
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Latência das requisições HTTP por rota',
+    ['method', 'blueprint', 'endpoint'], buckets=LATENCY_BUCKETS
+)
+IN_FLIGHT = Gauge(
+    'http_requests_in_flight', 'Requisições em andamento',
+    multiprocess_mode='livesum'
+)
+DB_POOL_IN_USE = Gauge(
+    'db_pool_connections_in_use', 'Conexões do pool em uso',
+    multiprocess_mode='livesum'
+)
+DB_POOL_OPEN = Gauge(
+    'db_pool_connections_open', 'Conexões abertas pelo pool',
+    multiprocess_mode='livesum'
+)
+EXPORT_DURATION = Histogram(
+    'export_job_duration_seconds', 'Duração da geração de planilhas exportadas',
+    ['format'], buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+)
+
+ENTITY_CACHE_LOOKUPS = Counter(
+    'entity_cache_lookups_total', 'Consultas ao cache de entidades por resultado',
+    ['entity', 'result']
+)
+
+RATE_LIMIT_CHECKS = Counter(
+    'rate_limit_checks_total', 'Verificações do limitador de requisições por resultado',
+    ['limit', 'key', 'result']
+)
+
+
+@event.listens_for(Pool, 'connect')
+def _pool_connect(dbapi_connection, connection_record):
+    DB_POOL_OPEN.inc()
+
+
+@event.listens_for(Pool, 'close')
+def _pool_close(dbapi_connection, connection_record):
+    DB_POOL_OPEN.dec()
+
+
+@event.listens_for(Pool, 'checkout')
+def _pool_checkout(dbapi_connection, connection_record, connection_proxy):
+    DB_POOL_IN_USE.inc()
+
+
+@event.listens_for(Pool, 'checkin')
+def _pool_checkin(dbapi_connection, connection_record):
+    DB_POOL_IN_USE.dec()
+
+
+class track_export:
+    """Context manager que registra a duração de uma exportação (pdf, excel)"""
+
+    def __init__(self, export_format):
+        self.export_format = export_format
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        EXPORT_DURATION.labels(self.export_format).observe(time.perf_counter() - self.started)
+        return False
+
+
+def init_metrics(app):
+    """
+    Registra a coleta de métricas por rota e o endpoint Prometheus /api/metrics.
+    O endpoint exige METRICS_TOKEN (Authorization: Bearer <token>); sem token configurado
+    fica fechado, exceto em modo debug ou com METRICS_ALLOW_ANONYMOUS=true.
+    """
+    allow_anonymous = os.getenv('METRICS_ALLOW_ANONYMOUS', 'false').lower() == 'true'
+
+    @app.before_request
+    def _start_request_metrics():
+        g.metrics_started = time.perf_counter()
+        IN_FLIGHT.inc()
+
+    @app.teardown_request
+    def _finish_request_metrics(exc):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return
+        IN_FLIGHT.dec()
+
+        rule = request.url_rule.rule if request.url_rule else 'unmatched'
+        blueprint = request.blueprint or 'app'
+        status = g.pop('metrics_status', 500 if exc else 200)
+        REQUEST_LATENCY.labels(request.method, blueprint, rule).observe(time.perf_counter() - started)
+        REQUESTS.labels(request.method, blueprint, rule, str(status)).inc()
+
+    @app.after_request
+    def _capture_status(response):
+        g.metrics_status = response.status_code
+        return response
+
+    @app.route('/api/metrics')
+    def metrics():
+        token = os.getenv('METRICS_TOKEN')
+        if token:
+            if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+                return Response('Unauthorized', status=401)
+        elif not (allow_anonymous or app.debug):
+            return Response('Unauthorized (configure METRICS_TOKEN)', status=401)
+
+        if MULTIPROCESS:
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        else:
+            registry = REGISTRY
+        return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
@@ -0,0 +1,407 @@
+import csv
+import io
+import re
+import unicodedata
+import uuid
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from sqlalchemy import insert, select, update
+from src.models.database import db, Person, Unit, UnitOwner
+from src.services.phone_index import sync_phone_index
+
+# Coluna canônica -> cabeçalhos aceitos (sem acentos, em minúsculas, com _ no lugar de espaços e símbolos)
+COLUMNS = {
+    'unit_code': ('unit_code', 'unidade', 'codigo_unidade', 'cod_unidade'),
+    'unit_type': ('unit_type', 'tipo_unidade'),
+    'block': ('block', 'bloco', 'torre'),
+    'floor': ('floor', 'andar'),
+    'number': ('number', 'numero'),
+    'area': ('area', 'area_m2'),
+    'ideal_fraction': ('ideal_fraction', 'fracao_ideal'),
+    'document': ('document', 'documento', 'cpf_cnpj', 'cpf', 'cnpj'),
+    'name': ('name', 'nome', 'razao_social'),
+    'email': ('email', 'e_mail'),
+    'phone': ('phone', 'telefone', 'celular', 'whatsapp'),
+    'address': ('address', 'endereco'),
+    'owner_type': ('owner_type', 'tipo_vinculo', 'vinculo'),
+    'ownership_percentage': ('ownership_percentage', 'percentual', 'participacao'),
+    'is_responsible_for_charges': ('is_responsible_for_charges', 'responsavel', 'responsavel_cobranca'),
+    'start_date': ('start_date', 'data_inicio', 'inicio'),
+}
+HEADER_ALIASES = {alias: column for column, aliases in COLUMNS.items() for alias in aliases}
+
+UNIT_TYPES_PT = {'APARTAMENTO': 'APARTMENT', 'SALA': 'COMMERCIAL', 'LOJA': 'COMMERCIAL',
+                 'COMERCIAL': 'COMMERCIAL', 'GARAGEM': 'PARKING', 'VAGA': 'PARKING'}
+OWNER_TYPES_PT = {'PROPRIETARIO': 'OWNER', 'INQUILINO': 'TENANT', 'LOCATARIO': 'TENANT'}
+TRUE_VALUES = {'1', 'true', 'sim', 's', 'yes', 'x'}
+FALSE_VALUES = {'0', 'false', 'nao', 'n', 'no'}
+
+
+class OnboardingImportError(ValueError):
+    """Erro que impede a leitura do arquivo inteiro (formato, cabeçalho)"""
+
+
+def _plain(text):
+    text = unicodedata.normalize('NFKD', str(text)).encode('ascii', 'ignore').decode()
+    return re.sub(r'[^a-z0-9]+', '_', text.lower()).strip('_')
+
+
+def _check_digit(digits, weights):
+    remainder = sum(int(d) * w for d, w in zip(digits, weights)) % 11
+    return '0' if remainder < 2 else str(11 - remainder)
+
+
+def normalize_document(raw):
+    """
+    CPF/CNPJ -> (tipo PF/PJ, somente dígitos), validando os dígitos verificadores.
+    Valores numéricos de planilhas perdem os zeros à esquerda e são completados.
+    """
+    if isinstance(raw, float) and raw.is_integer():
+        raw = int(raw)
+    digits = re.sub(r'\D', '', str(raw))
+    if isinstance(raw, int):
+        digits = digits.zfill(11 if len(digits) <= 11 else 14)
+
+    if len(digits) == 11 and len(set(digits)) > 1:
+        if digits[9:] == _check_digit(digits[:9], range(10, 1, -1)) + \
+                _check_digit(digits[:10], range(11, 1, -1)):
+            return 'PF', digits
+        raise ValueError(f'CPF inválido: {raw}')
+    if len(digits) == 14 and len(set(digits)) > 1:
+        first = _check_digit(digits[:12], (5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2))
+        second = _check_digit(digits[:13], (6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2))
+        if digits[12:] == first + second:
+            return 'PJ', digits
+        raise ValueError(f'CNPJ inválido: {raw}')
+    raise ValueError(f'Documento inválido (CPF/CNPJ): {raw}')
+
+
+def read_rows(stream, file_format='csv', encoding='utf-8-sig'):
+    """
+    Lê o arquivo em streaming (sem carregá-lo inteiro): gera (número da linha, {coluna: valor}).
+    Colunas desconhecidas são ignoradas; a coluna unit_code é obrigatória.
+    """
+    if file_format == 'xlsx':
+        # Import tardio: openpyxl só é carregado quando há planilha a importar
+        from openpyxl import load_workbook
+        workbook = load_workbook(stream, read_only=True, data_only=True)
+        rows = workbook.active.iter_rows(values_only=True)
+    else:
+        text = io.TextIOWrapper(stream, encoding=encoding, newline='')
+        first_line = text.readline()
+        delimiter = ';' if first_line.count(';') > first_line.count(',') else ','
+        rows = csv.reader(_chain_line(first_line, text), delimiter=delimiter)
+
+    header = next(rows, None)
+    if header is None:
+        raise OnboardingImportError('Arquivo vazio')
+    columns = [HEADER_ALIASES.get(_plain(name)) if name is not None else None for name in header]
+    if 'unit_code' not in columns:
+        raise OnboardingImportError('Coluna obrigatória ausente: unit_code (unidade)')
+
+    for number, values in enumerate(rows, start=2):
+        row = {}
+        for column, value in zip(columns, values):
+            if column is None:
+                continue
+            if isinstance(value, str):
+                value = value.strip()
+            if value not in (None, ''):
+                row[column] = value
+        if row:
+            yield number, row
+
+
+def _chain_line(first_line, text):
+    yield first_line
+    yield from text
+
+
+class OnboardingImportService:
+    """
+    Importação em lote de unidades, pessoas (proprietários/inquilinos) e vínculos
+    de um cliente a partir de CSV/XLSX (uma linha por vínculo unidade-pessoa;
+    linhas sem documento cadastram só a unidade).
+
+    - Pessoas são deduplicadas pelo CPF/CNPJ normalizado em um índice hash em memória,
+      carregado uma vez (e não uma consulta de duplicidade por linha)
+    - Códigos de unidade e vínculos existentes do cliente também são resolvidos em memória
+    - Cada lote de linhas é gravado com insert()/update() em lote e commit próprio;
+      um lote que falhe no banco é desfeito e suas linhas entram no relatório de erros
+    - Linhas inválidas não interrompem a importação: o relatório traz {row, error}
+    - Erro de leitura no meio do arquivo (codificação, CSV malformado) interrompe a
+      importação, mas os lotes anteriores já foram gravados: o relatório traz
+      readError {row, error} junto com o que foi importado até ali
+    """
+
+    def __init__(self, client_id, batch_size=1000):
+        self.client_id = client_id
+        self.batch_size = batch_size
+        self.summary = {
+            'rows': 0,
+            'people': {'inserted': 0, 'updated': 0},
+            'units': {'inserted': 0, 'updated': 0},
+            'unitOwners': {'inserted': 0, 'updated': 0}
+        }
+        self.errors = []
+        self.read_error = None
+        self._people = {}
+        self._units = {}
+        self._owners = {}
+
+    def run(self, rows):
+        """Processa (número da linha, dados) de read_rows(). Retorna o resumo com os erros."""
+        self._load_indexes()
+        batch = []
+        number = 1
+        try:
+            for number, row in rows:
+                self.summary['rows'] += 1
+                batch.append((number, row))
+                if len(batch) >= self.batch_size:
+                    self._process(batch)
+                    batch = []
+        except (UnicodeDecodeError, csv.Error) as e:
+            # O arquivo é lido em streaming: o erro aparece depois de lotes já gravados
+            self.read_error = {'row': number + 1, 'error': f'Erro de leitura a partir desta linha: {e}'}
+        if batch:
+            self._process(batch)
+        return {
+            **self.summary,
+            'errorCount': len(self.errors),
+            'errors': self.errors,
+            'readError': self.read_error
+        }
+
+    def _load_indexes(self):
+        # documento normalizado -> [id, telefone]
+        for person_id, document, phone in db.session.execute(
+            select(Person.id, Person.document, Person.phone).execution_options(yield_per=10000)
+        ):
+            digits = re.sub(r'\D', '', document or '')
+            if digits:
+                self._people.setdefault(digits, [person_id, phone])
+
+        self._units = dict(db.session.execute(
+            select(Unit.unit_code, Unit.id).where(Unit.client_id == self.client_id)
+        ).all())
+        self._owners = {
+            (unit_id, person_id): owner_id
+            for owner_id, unit_id, person_id in db.session.execute(
+                select(UnitOwner.id, UnitOwner.unit_id, UnitOwner.person_id)
+                .join(Unit, Unit.id == UnitOwner.unit_id)
+                .where(Unit.client_id == self.client_id, UnitOwner.is_active == True)
+            )
+        }
+
+    def _process(self, batch):
+        now = datetime.utcnow()
+        pending = {
+            'people': ([], {}), 'units': ([], {}), 'unitOwners': ([], {})
+        }
+        phones = {}
+        # Alterações nos índices em memória: (índice, chave, valor anterior ou None se a chave é nova)
+        added = []
+        rows = []
+
+        for number, row in batch:
+            try:
+                record = self._parse(row)
+                self._plan(record, now, pending, phones, added)
+            except ValueError as e:
+                self.errors.append({'row': number, 'error': str(e) or 'Valor inválido'})
+                continue
+            rows.append(number)
+
+        try:
+            for key, model in (('people', Person), ('units', Unit), ('unitOwners', UnitOwner)):
+                inserts, updates = pending[key]
+                if inserts:
+                    db.session.execute(insert(model), inserts)
+                if updates:
+                    db.session.execute(update(model), list(updates.values()))
+            # insert()/update() em lote não passam pelos eventos do mapper
+            sync_phone_index(db.session.connection(), phones)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            # Desfaz as alterações do lote nos índices em memória (em ordem inversa)
+            for index, key, previous in reversed(added):
+                if previous is None:
+                    index.pop(key, None)
+                else:
+                    index[key] = previous
+            message = str(e).splitlines()[0]
+            self.errors.extend({'row': number, 'error': f'Erro ao gravar o lote: {message}'} for number in rows)
+            return
+
+        for key, (inserts, updates) in pending.items():
+            self.summary[key]['inserted'] += len(inserts)
+            self.summary[key]['updated'] += len(updates)
+
+    def _plan(self, record, now, pending, phones, added):
+        """Resolve a linha contra os índices em memória e agenda inserções/atualizações"""
+        timestamps = {'created_at': now, 'updated_at': now, 'is_active': True}
+        unit_id = self._units.get(record['unit_code'])
+        unit_fields = {k: record[k] for k in ('unit_type', 'block', 'floor', 'number', 'area', 'ideal_fraction')
+                       if k in record}
+        person_fields = {k: record[k] for k in ('name', 'email', 'phone', 'address') if k in record}
+        person = self._people.get(record['document'][1]) if 'document' in record else None
+
+        # Validação antes de alterar os índices: uma linha rejeitada não grava nada
+        if unit_id is None:
+            for field, label in (('unit_type', 'tipo da unidade'), ('number', 'número')):
+                if field not in unit_fields:
+                    raise ValueError(f'Campo obrigatório para nova unidade: {label}')
+        if 'document' in record and person is None and 'name' not in person_fields:
+            raise ValueError('Campo obrigatório para nova pessoa: nome')
+
+        if unit_id is None:
+            unit_id = str(uuid.uuid4())
+            pending['units'][0].append({
+                'id': unit_id, 'client_id': self.client_id, 'unit_code': record['unit_code'],
+                'block': None, 'floor': None, 'area': None, 'ideal_fraction': None, 'status': 'ACTIVE',
+                **unit_fields, **timestamps
+            })
+            self._units[record['unit_code']] = unit_id
+            added.append((self._units, record['unit_code'], None))
+        elif unit_fields:
+            self._merge(pending['units'][1], unit_id, unit_fields, now)
+
+        if 'document' not in record:
+            return
+
+        person_type, document = record['document']
+        if person is None:
+            person_id = str(uuid.uuid4())
+            pending['people'][0].append({
+                'id': person_id, 'type': person_type, 'document': document, 'email': None, 'phone': None,
+                'address': None, 'classification': 'REGULAR', **person_fields, **timestamps
+            })
+            if person_fields.get('phone'):
+                phones[person_id] = (person_fields['phone'], None)
+            self._people[document] = [person_id, person_fields.get('phone')]
+            added.append((self._people, document, None))
+        else:
+            person_id, old_phone = person
+            if person_fields:
+                self._merge(pending['people'][1], person_id, person_fields, now)
+            if 'phone' in person_fields and person_fields['phone'] != old_phone:
+                phones[person_id] = (person_fields['phone'], phones.get(person_id, (None, old_phone))[1])
+                added.append((self._people, document, [person_id, old_phone]))
+                person[1] = person_fields['phone']
+
+        owner_type = record.get('owner_type', 'OWNER')
+        owner_fields = {
+            'owner_type': owner_type,
+            'ownership_percentage': record.get('ownership_percentage', Decimal('100.00')),
+            'is_responsible_for_charges': record.get('is_responsible_for_charges', owner_type == 'OWNER'),
+        }
+        if 'start_date' in record:
+            owner_fields['start_date'] = record['start_date']
+        owner_id = self._owners.get((unit_id, person_id))
+        if owner_id is None:
+            owner_id = str(uuid.uuid4())
+            pending['unitOwners'][0].append({
+                'id': owner_id, 'unit_id': unit_id, 'person_id': person_id, 'start_date': now.date(),
+                'end_date': None, **owner_fields, **timestamps
+            })
+            self._owners[(unit_id, person_id)] = owner_id
+            added.append((self._owners, (unit_id, person_id), None))
+        else:
+            self._merge(pending['unitOwners'][1], owner_id, owner_fields, now)
+
+    @staticmethod
+    def _merge(updates, entity_id, fields, now):
+        # Várias linhas para a mesma entidade no lote: um único UPDATE (prevalece a última)
+        updates.setdefault(entity_id, {'id': entity_id}).update(fields, updated_at=now)
+
+    def _parse(self, row):
+        if 'unit_code' not in row:
+            raise ValueError('Código da unidade ausente')
+        record = {'unit_code': self._text(Unit, 'unit_code', row['unit_code'])}
+
+        if 'unit_type' in row:
+            record['unit_type'] = self._choice(Unit, 'unit_type', row['unit_type'], UNIT_TYPES_PT)
+        for field in ('block', 'floor', 'number'):
+            if field in row:
+                record[field] = self._text(Unit, field, row[field])
+        if 'area' in row:
+            record['area'] = self._decimal(row['area'])
+        if 'ideal_fraction' in row:
+            record['ideal_fraction'] = self._decimal(row['ideal_fraction'])
+
+        if 'document' in row:
+            record['document'] = normalize_document(row['document'])
+            for field in ('name', 'email', 'phone', 'address'):
+                if field in row:
+                    record[field] = self._text(Person, field, row[field])
+            if 'owner_type' in row:
+                record['owner_type'] = self._choice(UnitOwner, 'owner_type', row['owner_type'], OWNER_TYPES_PT)
+            if 'ownership_percentage' in row:
+                percentage = self._decimal(row['ownership_percentage'])
+                if not 0 < percentage <= 100:
+                    raise ValueError(f'Percentual inválido: {row["ownership_percentage"]}')
+                record['ownership_percentage'] = percentage
+            if 'is_responsible_for_charges' in row:
+                record['is_responsible_for_charges'] = self._bool(row['is_responsible_for_charges'])
+            if 'start_date' in row:
+                record['start_date'] = self._date(row['start_date'])
+        elif any(field in row for field in ('name', 'email', 'phone', 'owner_type')):
+            raise ValueError('CPF/CNPJ ausente para o proprietário/inquilino')
+        return record
+
+    @staticmethod
+    def _text(model, column, raw):
+        value = str(int(raw)) if isinstance(raw, float) and raw.is_integer() else str(raw)
+        length = getattr(model.__table__.c[column].type, 'length', None)
+        if length and len(value) > length:
+            raise ValueError(f'Valor muito longo para {column} (máximo {length}): {value}')
+        return value
+
+    @staticmethod
+    def _choice(model, column, raw, aliases):
+        value = _plain(raw).upper()
+        value = aliases.get(value, value)
+        allowed = getattr(model.__table__.c[column].type, 'enums', None)
+        if allowed and value not in allowed:
+            raise ValueError(f'Valor inválido para {column}: {raw}')
+        return value
+
+    @staticmethod
+    def _decimal(raw):
+        if isinstance(raw, (int, float, Decimal)):
+            return Decimal(str(raw))
+        text = str(raw).replace('%', '').strip()
+        if ',' in text:
+            # Formato brasileiro: 1.234,56
+            text = text.replace('.', '').replace(',', '.')
+        try:
+            return Decimal(text)
+        except InvalidOperation:
+            raise ValueError(f'Número inválido: {raw}')
+
+    @staticmethod
+    def _bool(raw):
+        if isinstance(raw, bool):
+            return raw
+        value = _plain(raw)
+        if value in TRUE_VALUES:
+            return True
+        if value in FALSE_VALUES:
+            return False
+        raise ValueError(f'Valor booleano inválido: {raw}')
+
+    @staticmethod
+    def _date(raw):
+        if isinstance(raw, datetime):
+            return raw.date()
+        if isinstance(raw, date):
+            return raw
+        text = str(raw).strip()
+        for pattern in ('%d/%m/%Y', '%Y-%m-%d'):
+            try:
+                return datetime.strptime(text, pattern).date()
+            except ValueError:
+                continue
+        raise ValueError(f'Data inválida: {raw}')
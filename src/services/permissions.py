@@ -0,0 +1,46 @@
+from functools import wraps
+from flask import jsonify
+from flask_jwt_extended import get_jwt, get_jwt_identity, get_jwt_request_location, verify_jwt_in_request
+from src.models.user import User
+
+
+def current_user_is_admin(optional=False):
+    """Verifica se o token JWT da requisição pertence a um administrador ativo"""
+    verify_jwt_in_request(optional=optional)
+    user_id = get_jwt_identity()
+    if user_id is None:
+        return False
+    # Papel lido sempre do banco: o cache de identidades é por processo e um admin
+    # rebaixado ou desativado manteria o acesso nos demais workers até o TTL
+    user = User.query.session.query(User.role, User.is_active).filter(User.id == user_id).first()
+    if user is None or not user.is_active:
+        return False
+    role = getattr(user.role, 'value', user.role)
+    return str(role or '').upper() == 'ADMIN'
+
+
+def admin_required(view):
+    """Restringe um endpoint a administradores"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not current_user_is_admin():
+            return jsonify({'error': 'Acesso restrito a administradores'}), 403
+        return view(*args, **kwargs)
+    return wrapper
+
+
+STREAM_TICKET_SCOPE = 'timeline-stream'
+
+
+def stream_jwt_required(view):
+    """
+    Autenticação dos streams SSE: EventSource não envia cabeçalhos, então além do
+    Authorization aceita ?jwt=<ticket>, desde que seja um ticket de stream (curta duração)
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        verify_jwt_in_request(locations=['headers', 'query_string'])
+        if get_jwt_request_location() == 'query_string' and get_jwt().get('scope') != STREAM_TICKET_SCOPE:
+            return jsonify({'error': 'Use um ticket de stream na query string'}), 401
+        return view(*args, **kwargs)
+    return wrapper
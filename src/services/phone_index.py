@@ -0,0 +1,274 @@
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, inspect, select
+from src.models.database import db, Person
+from src.models.phone_index import PersonPhoneIndex
+from src.services.entity_cache import InvalidationFeed
+
+DEFAULT_COUNTRY_CODE = '55'
+
+
+def normalize_phone(raw_phone, default_country_code=DEFAULT_COUNTRY_CODE):
+    """
+    Normaliza um telefone para E.164 (+5511987654321).
+    - Remove prefixo 'whatsapp:', espaços, parênteses, hífens
+    - Números nacionais (DDD + número) recebem o código do país
+    - Celulares brasileiros sem o nono dígito (formato antigo usado pelo WhatsApp) são completados
+    Retorna None se o número não puder ser normalizado.
+    """
+    if not raw_phone:
+        return None
+
+    phone = str(raw_phone).strip().lower().replace('whatsapp:', '')
+    has_plus = phone.startswith('+')
+    digits = re.sub(r'\D', '', phone)
+
+    if not has_plus:
+        if digits.startswith('00'):
+            digits = digits[2:]
+        elif digits.startswith('0'):
+            # Prefixo de operadora/longa distância nacional (0xx)
+            digits = digits.lstrip('0')
+            if len(digits) > 11:
+                digits = digits[2:]
+            digits = default_country_code + digits
+        elif len(digits) in (10, 11):
+            digits = default_country_code + digits
+
+    if digits.startswith('55'):
+        national = digits[2:]
+        # Celular com 8 dígitos (sem o 9 inicial): DDD + [6-9]xxxxxxx
+        if len(national) == 10 and national[2] in '6789':
+            national = national[:2] + '9' + national[2:]
+        if len(national) not in (10, 11):
+            return None
+        digits = '55' + national
+
+    if not 8 <= len(digits) <= 15:
+        return None
+
+    return f'+{digits}'
+
+
+class PhoneLookupCache:
+    """
+    Cache LRU em memória (com TTL) de telefone normalizado -> ids de pessoas.
+
+    As invalidações são aplicadas após o commit e publicadas no log de invalidações
+    da camada compartilhada do entity_cache (chaves 'phone:<E.164>'), que cada
+    processo lê no máximo uma vez por `sync_interval`.
+    """
+
+    def __init__(self, maxsize=10000, ttl=300, sync_interval=1.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.feed = InvalidationFeed('phone:', sync_interval)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def token(self):
+        """Geração atual: lida antes da consulta ao banco e repassada a set()"""
+        self._sync()
+        return self._generation
+
+    def get(self, phone):
+        self._sync()
+        with self._lock:
+            entry = self._entries.get(phone)
+            if entry is None or entry[1] < time.monotonic():
+                self.misses += 1
+                return None
+            self._entries.move_to_end(phone)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, phone, person_ids, generation=None):
+        with self._lock:
+            # Invalidação entre a consulta e o set: não recacheia o valor antigo
+            if generation is not None and generation != self._generation:
+                return
+            self._entries[phone] = (person_ids, time.monotonic() + self.ttl)
+            self._entries.move_to_end(phone)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *phones):
+        """Remove os telefones deste processo e publica a invalidação para os demais"""
+        self._evict(phones)
+        self.feed.publish(phones)
+
+    def clear(self, local_only=False):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+        if not local_only:
+            self.feed.publish_clear()
+
+    def _evict(self, phones):
+        with self._lock:
+            self._generation += 1
+            for phone in phones:
+                self._entries.pop(phone, None)
+
+    def _sync(self):
+        """Aplica as invalidações publicadas por outros processos (no máximo 1x/intervalo)"""
+        phones = self.feed.poll()
+        if phones is InvalidationFeed.ALL:
+            self.clear(local_only=True)
+        elif phones:
+            self._evict(phones)
+
+
+phone_cache = PhoneLookupCache(
+    maxsize=int(os.getenv('PHONE_CACHE_SIZE', '10000')),
+    ttl=int(os.getenv('PHONE_CACHE_TTL', '300')),
+    sync_interval=float(os.getenv('PHONE_CACHE_SYNC_INTERVAL', '1.0'))
+)
+
+
+class PhoneIndexService:
+    """Consulta e manutenção do índice de telefones normalizados"""
+
+    def lookup_many(self, phones):
+        """Resolve telefones (qualquer formato) para ids de pessoas: {telefone_original: [person_id, ...]}"""
+        normalized = {phone: normalize_phone(phone) for phone in phones}
+
+        resolved = {}
+        missing = set()
+        for phone_e164 in set(normalized.values()) - {None}:
+            person_ids = phone_cache.get(phone_e164)
+            if person_ids is None:
+                missing.add(phone_e164)
+            else:
+                resolved[phone_e164] = person_ids
+
+        if missing:
+            generation = phone_cache.token()
+            found = {phone_e164: [] for phone_e164 in missing}
+            rows = db.session.query(PersonPhoneIndex.phone_e164, PersonPhoneIndex.person_id).filter(
+                PersonPhoneIndex.phone_e164.in_(missing)
+            ).all()
+            for phone_e164, person_id in rows:
+                found[phone_e164].append(person_id)
+            for phone_e164, person_ids in found.items():
+                phone_cache.set(phone_e164, person_ids, generation)
+            resolved.update(found)
+
+        return {phone: resolved.get(phone_e164, []) for phone, phone_e164 in normalized.items()}
+
+    def rebuild(self, batch_size=5000):
+        """Reconstrói o índice a partir da tabela people. Retorna o número de entradas."""
+        total = rebuild_phone_index(db.session.connection(), batch_size)
+        db.session.commit()
+        phone_cache.clear()
+        return total
+
+
+def rebuild_phone_index(connection, batch_size=5000):
+    """
+    Regrava o índice inteiro a partir da tabela people na conexão dada (usado pelo
+    comando rebuild-phone-index e pela migração que preenche o índice). Não faz commit.
+    """
+    table = PersonPhoneIndex.__table__
+    people = Person.__table__
+    connection.execute(table.delete())
+
+    total = 0
+    batch = []
+    result = connection.execution_options(yield_per=batch_size).execute(
+        select(people.c.id, people.c.phone).where(people.c.phone.isnot(None))
+    )
+    for person_id, phone in result:
+        phone_e164 = normalize_phone(phone)
+        if not phone_e164:
+            continue
+        batch.append({'person_id': person_id, 'phone_e164': phone_e164})
+        if len(batch) >= batch_size:
+            connection.execute(table.insert(), batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        connection.execute(table.insert(), batch)
+        total += len(batch)
+    return total
+
+
+def sync_phone_index(connection, phones):
+    """
+    Atualiza o índice para pessoas gravadas com insert()/update() em lote, que não
+    disparam os eventos do mapper. phones = {person_id: (telefone, telefone_anterior)}
+    """
+    if not phones:
+        return
+    table = PersonPhoneIndex.__table__
+    connection.execute(table.delete().where(table.c.person_id.in_(list(phones))))
+    rows = []
+    stale = set()
+    for person_id, (phone, old_phone) in phones.items():
+        phone_e164 = normalize_phone(phone)
+        if phone_e164:
+            rows.append({'person_id': person_id, 'phone_e164': phone_e164})
+            stale.add(phone_e164)
+        old_e164 = normalize_phone(old_phone)
+        if old_e164:
+            stale.add(old_e164)
+    if rows:
+        connection.execute(table.insert(), rows)
+    _defer_invalidation(db.session, stale)
+
+
+def _defer_invalidation(session, phones):
+    # O cache só é invalidado após o commit (antes disso, outra requisição recachearia o valor antigo)
+    if session is not None:
+        session.info.setdefault('phone_cache_invalidations', set()).update(p for p in phones if p)
+
+
+# Manutenção do índice na escrita de pessoas
+def _sync_person_phone(connection, person, old_phone=None):
+    table = PersonPhoneIndex.__table__
+    phone_e164 = normalize_phone(person.phone)
+    connection.execute(table.delete().where(table.c.person_id == person.id))
+    if phone_e164:
+        connection.execute(table.insert().values(person_id=person.id, phone_e164=phone_e164))
+    _defer_invalidation(inspect(person).session, (phone_e164, normalize_phone(old_phone)))
+
+
+@event.listens_for(Person, 'after_insert')
+def _person_inserted(mapper, connection, person):
+    _sync_person_phone(connection, person)
+
+
+@event.listens_for(Person, 'after_update')
+def _person_updated(mapper, connection, person):
+    history = inspect(person).attrs.phone.history
+    if not history.has_changes():
+        return
+    old_phone = history.deleted[0] if history.deleted else None
+    _sync_person_phone(connection, person, old_phone)
+
+
+# Antes do DELETE em people: a linha do índice referencia people.id (FK)
+@event.listens_for(Person, 'before_delete')
+def _person_deleted(mapper, connection, person):
+    table = PersonPhoneIndex.__table__
+    connection.execute(table.delete().where(table.c.person_id == person.id))
+    _defer_invalidation(inspect(person).session, (normalize_phone(person.phone),))
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_phone_invalidations(session):
+    phones = session.info.pop('phone_cache_invalidations', None)
+    if phones:
+        phone_cache.invalidate(*phones)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_phone_invalidations(session):
+    session.info.pop('phone_cache_invalidations', None)
@@ -0,0 +1,131 @@
+import cProfile
+import io
+import os
+import pstats
+import random
+import re
+import time
+from datetime import datetime
+from flask import g, request
+from src.services.permissions import current_user_is_admin
+
+PROFILE_NAME = re.compile(r'^[\w.-]+\.prof$')
+SORT_KEYS = frozenset(key.value for key in pstats.SortKey)
+
+
+class RequestProfiler:
+    """
+    Perfilamento sob demanda de requisições com cProfile:
+    - administradores enviam o cabeçalho X-Profile: 1
+    - ou uma fração das requisições é amostrada (PROFILER_SAMPLE_RATE)
+    Os resultados (.prof, formato pstats; aceitos por snakeviz/flameprof) ficam em um
+    diretório local limitado a PROFILER_MAX_FILES arquivos.
+    """
+
+    def __init__(self, directory, sample_rate=0.0, max_files=50):
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.max_files = max_files
+
+    def should_profile(self):
+        if request.headers.get('X-Profile') == '1':
+            try:
+                return current_user_is_admin(optional=True)
+            except Exception:
+                return False
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def start(self):
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Outro profiler já está ativo neste processo
+            return None
+        return profiler
+
+    def save(self, profiler, elapsed):
+        os.makedirs(self.directory, exist_ok=True)
+        endpoint = re.sub(r'[^\w]+', '_', request.endpoint or 'unmatched')
+        name = f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}_{request.method}_{endpoint}_{int(elapsed * 1000)}ms.prof"
+        profiler.dump_stats(os.path.join(self.directory, name))
+        self._prune()
+        return name
+
+    def list(self):
+        if not os.path.isdir(self.directory):
+            return []
+        profiles = []
+        for name in sorted(os.listdir(self.directory), reverse=True):
+            if not PROFILE_NAME.match(name):
+                continue
+            path = os.path.join(self.directory, name)
+            stat = os.stat(path)
+            profiles.append({
+                'name': name,
+                'size': stat.st_size,
+                'createdAt': datetime.utcfromtimestamp(stat.st_mtime).isoformat()
+            })
+        return profiles
+
+    def path_for(self, name):
+        if not PROFILE_NAME.match(name):
+            return None
+        path = os.path.join(self.directory, name)
+        return path if os.path.isfile(path) else None
+
+    def summary(self, name, limit=40, sort='cumulative'):
+        """Resumo textual do perfil (funções mais caras); sort deve ser um valor de pstats.SortKey"""
+        if sort not in SORT_KEYS:
+            raise ValueError(f"Ordenação inválida: {sort} (use {', '.join(sorted(SORT_KEYS))})")
+        path = self.path_for(name)
+        if path is None:
+            return None
+        output = io.StringIO()
+        stats = pstats.Stats(path, stream=output)
+        stats.strip_dirs().sort_stats(sort).print_stats(limit)
+        return output.getvalue()
+
+    def _prune(self):
+        profiles = sorted(
+            (name for name in os.listdir(self.directory) if PROFILE_NAME.match(name)),
+            reverse=True
+        )
+        for name in profiles[self.max_files:]:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+
+def init_profiler(app):
+    profiler = RequestProfiler(
+        directory=os.getenv('PROFILER_DIR', os.path.join(app.instance_path, 'profiles')),
+        sample_rate=float(os.getenv('PROFILER_SAMPLE_RATE', '0')),
+        max_files=int(os.getenv('PROFILER_MAX_FILES', '50'))
+    )
+    app.extensions['request_profiler'] = profiler
+
+    @app.before_request
+    def _start_profiler():
+        if request.path.startswith('/api/admin/profiles') or not profiler.should_profile():
+            return
+        active = profiler.start()
+        if active is not None:
+            g.request_profiler = (active, time.perf_counter())
+
+    @app.after_request
+    def _save_profile(response):
+        state = g.pop('request_profiler', None)
+        if state is None:
+            return response
+        active, started = state
+        active.disable()
+        response.headers['X-Profile-Id'] = profiler.save(active, time.perf_counter() - started)
+        return response
+
+    @app.teardown_request
+    def _discard_profiler(exc):
+        state = g.pop('request_profiler', None)
+        if state is not None:
+            state[0].disable()
@@ -0,0 +1,137 @@
+from datetime import date, datetime
+from decimal import Decimal
+from flask import request
+from sqlalchemy import inspect
+from sqlalchemy.orm import load_only, selectinload
+from src.services.json_provider import serializes_natively
+
+
+class ProjectionError(ValueError):
+    """Campo ou relacionamento inexistente em ?fields= / ?include="""
+
+
+def to_camel(name):
+    head, *tail = name.split('_')
+    return head + ''.join(part.capitalize() for part in tail)
+
+
+def _serialize_value(value):
+    # Mesmas conversões feitas pelos to_dict() dos modelos
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _native_value(value):
+    # Provider orjson: date/datetime seguem nativos até os bytes (mesmo texto de isoformat())
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+class Projection:
+    """
+    Projeção de campos e relacionamentos de uma resposta (?fields= e ?include=).
+
+    - fields: chaves camelCase do to_dict(), com prefixo para relacionamentos
+      (ex.: fields=chargeCode,dueDate,debtor.name)
+    - include: relacionamentos a carregar, aninhados com ponto (ex.: include=client.person,debtor)
+
+    As colunas pedidas viram load_only() e os relacionamentos incluídos viram
+    selectinload(); relacionamentos não pedidos nunca são acessados na serialização,
+    portanto nunca disparam lazy load.
+    """
+
+    def __init__(self, model, fields=None, include=None):
+        self.model = model
+        self.mapper = inspect(model)
+        self.columns = {to_camel(attr.key): attr.key for attr in self.mapper.column_attrs}
+        self.relationships = {to_camel(rel.key): rel for rel in self.mapper.relationships}
+
+        fields = [f for f in (fields or []) if f]
+        include = [i for i in (include or []) if i]
+
+        self.fields = []
+        nested_fields = {}
+        for field in fields:
+            name, _, rest = field.partition('.')
+            if rest:
+                nested_fields.setdefault(name, []).append(rest)
+            elif name in self.columns:
+                self.fields.append(name)
+            else:
+                raise ProjectionError(f'Campo desconhecido: {field}')
+
+        nested_include = {}
+        for relation in include:
+            name, _, rest = relation.partition('.')
+            nested_include.setdefault(name, [])
+            if rest:
+                nested_include[name].append(rest)
+
+        for name in nested_fields:
+            nested_include.setdefault(name, [])
+
+        self.includes = {}
+        for name, sub_include in nested_include.items():
+            if name not in self.relationships:
+                raise ProjectionError(f'Relacionamento desconhecido: {name}')
+            related = self.relationships[name].mapper.class_
+            self.includes[name] = Projection(related, nested_fields.get(name), sub_include)
+
+    @classmethod
+    def from_request(cls, model, default_fields=None):
+        """Projeção a partir da query string, ou None quando não houver ?fields= nem ?include="""
+        fields = request.args.get('fields')
+        include = request.args.get('include')
+        if not fields and not include:
+            return None
+        return cls(model, fields.split(',') if fields else default_fields, include.split(',') if include else None)
+
+    @property
+    def selected_columns(self):
+        """Atributos de coluna a carregar: campos pedidos (ou todos), PK e FKs dos relacionamentos incluídos"""
+        names = {self.columns[field] for field in self.fields} if self.fields else set(self.columns.values())
+        names.update(column.key for column in self.mapper.primary_key)
+        for name in self.includes:
+            for column in self.relationships[name].local_columns:
+                names.add(self.mapper.get_property_by_column(column).key)
+        return [getattr(self.model, name) for name in names]
+
+    def loader_options(self, path=None):
+        options = []
+        for name, nested in self.includes.items():
+            relationship = getattr(self.model, self.relationships[name].key)
+            loader = path.selectinload(relationship) if path is not None else selectinload(relationship)
+            options.append(loader.load_only(*nested.selected_columns))
+            options.extend(nested.loader_options(loader))
+        return options
+
+    def apply(self, query, *extra_columns):
+        """Aplica load_only (mais colunas extras usadas pelo endpoint) e eager loading à consulta"""
+        columns = {column.key: column for column in self.selected_columns + list(extra_columns)}
+        return query.options(load_only(*columns.values()), *self.loader_options())
+
+    def serialize(self, obj, native=None):
+        """
+        Dict no formato do to_dict(). Com o provider orjson (native), datas não são
+        convertidas aqui: o provider as grava direto nos bytes da resposta.
+        """
+        if obj is None:
+            return None
+        if native is None:
+            native = serializes_natively()
+        convert = _native_value if native else _serialize_value
+
+        field_names = self.fields or list(self.columns)
+        data = {field: convert(getattr(obj, self.columns[field])) for field in field_names}
+
+        for name, nested in self.includes.items():
+            value = getattr(obj, self.relationships[name].key)
+            if self.relationships[name].uselist:
+                data[name] = [nested.serialize(item, native) for item in value]
+            else:
+                data[name] = nested.serialize(value, native)
+        return data
@@ -0,0 +1,84 @@
+import os
+import re
+import time
+from collections import Counter
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_IN_LIST = re.compile(r'\((?:\s*(?:\?|%s|%\(\w+\)s|:\w+)\s*,)+\s*(?:\?|%s|%\(\w+\)s|:\w+)\s*\)')
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+_SPACES = re.compile(r'\s+')
+
+
+def statement_shape(statement):
+    """Normaliza um SQL para agrupar execuções do mesmo formato (listas IN e literais colapsados)"""
+    shape = _IN_LIST.sub('(?)', statement)
+    shape = _LITERALS.sub('?', shape)
+    return _SPACES.sub(' ', shape).strip()
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'query_stats' in g:
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if not (has_request_context() and 'query_stats' in g):
+        return
+    starts = conn.info.get('query_start')
+    if not starts:
+        return
+
+    stats = g.query_stats
+    stats['count'] += 1
+    stats['time'] += time.perf_counter() - starts.pop()
+    stats['shapes'][statement_shape(statement)] += 1
+
+
+@event.listens_for(Engine, 'handle_error')
+def _handle_error(exception_context):
+    # Consulta com erro não chega ao after_cursor_execute: descarta o início pendente
+    connection = exception_context.connection
+    if connection is not None and exception_context.execution_context is not None:
+        starts = connection.info.get('query_start')
+        if starts:
+            starts.pop()
+
+
+def init_query_stats(app):
+    """
+    Instrumentação por requisição: número de consultas e tempo total de banco.
+    - Cabeçalhos X-Query-Count e Server-Timing com QUERY_STATS_HEADERS=true (desligados por padrão)
+    - Alerta de N+1 quando o mesmo formato de SQL roda mais de N vezes na requisição
+    """
+    app.config.setdefault('QUERY_STATS_HEADERS', os.getenv('QUERY_STATS_HEADERS', 'false').lower() == 'true')
+    app.config.setdefault('N_PLUS_ONE_THRESHOLD', int(os.getenv('N_PLUS_ONE_THRESHOLD', '10')))
+
+    @app.before_request
+    def _start_query_stats():
+        g.query_stats = {'count': 0, 'time': 0.0, 'shapes': Counter()}
+
+    @app.after_request
+    def _report_query_stats(response):
+        stats = g.pop('query_stats', None)
+        if stats is None:
+            return response
+
+        threshold = app.config['N_PLUS_ONE_THRESHOLD']
+        for shape, executions in stats['shapes'].items():
+            if executions > threshold:
+                app.logger.warning(
+                    'Possível N+1 em %s %s: %d execuções de: %s',
+                    request.method, request.path, executions, shape[:500]
+                )
+
+        if app.config['QUERY_STATS_HEADERS']:
+            response.headers['X-Query-Count'] = str(stats['count'])
+            response.headers.add(
+                'Server-Timing',
+                f'db;dur={stats["time"] * 1000:.2f};desc="{stats["count"]} queries"'
+            )
+        return response
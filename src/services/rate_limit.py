@@ -0,0 +1,266 @@
+import fcntl
+import hashlib
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, jsonify, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from src.services.metrics import RATE_LIMIT_CHECKS
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+# Limites padrão (sobrescritos por RATELIMIT_<NOME>_<CHAVE>, ex.: RATELIMIT_LOGIN_IP=20/minute)
+DEFAULT_LIMITS = {
+    'login:ip': '10/minute',
+    'login:user': '5/minute',
+    'webhook:ip': '600/minute'
+}
+
+
+def parse_limit(text):
+    """'10/minute' -> (capacidade, tokens por segundo)"""
+    amount, _, period = text.strip().partition('/')
+    amount = int(amount)
+    seconds = PERIODS.get(period.strip() or 'second')
+    if seconds is None or amount <= 0:
+        raise ValueError(f'Limite inválido: {text}')
+    return amount, amount / seconds
+
+
+def _bucket(tokens, updated_at, capacity, rate, now):
+    """Token bucket: repõe os tokens pelo tempo decorrido e consome um, se houver"""
+    tokens = min(capacity, tokens + (now - updated_at) * rate)
+    if tokens >= 1:
+        return True, tokens - 1, 0.0
+    return False, tokens, (1 - tokens) / rate
+
+
+class MemoryBucketStore:
+    """
+    Buckets em memória (um processo), em LRU limitado a `maxsize` chaves.
+
+    Um bucket parado até se encher de novo equivale a um bucket novo: só esses são
+    descartados, o que não altera o resultado dos limites. Com o armazenamento cheio
+    de buckets ainda em uso, uma chave nova é recusada (falha fechada) em vez de
+    apagar o estado de outra chave; aumente RATELIMIT_SLOTS se isso ocorrer.
+    """
+
+    # Buckets examinados (a partir do menos recente) ao procurar um já cheio para descartar
+    SCAN = 32
+
+    def __init__(self, maxsize=65536):
+        self.maxsize = maxsize
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key, capacity, rate, now):
+        with self._lock:
+            self._expire(now)
+            state = self._buckets.pop(key, None)
+            if state is None:
+                if len(self._buckets) >= self.maxsize and not self._evict_full(now):
+                    return False, self._next_full_at() - now
+                state = (capacity, now, now)
+            tokens, updated_at, _ = state
+            allowed, tokens, retry_after = _bucket(tokens, updated_at, capacity, rate, now)
+            # (tokens, última atualização, instante em que volta a ficar cheio)
+            self._buckets[key] = (tokens, now, now + (capacity - tokens) / rate)
+        return allowed, retry_after
+
+    def _expire(self, now):
+        # Descarta do início da LRU os buckets que já se encheram
+        buckets = self._buckets
+        while buckets and buckets[next(iter(buckets))][2] <= now:
+            buckets.popitem(last=False)
+
+    def _evict_full(self, now):
+        for count, (key, state) in enumerate(self._buckets.items()):
+            if count >= self.SCAN:
+                break
+            if state[2] <= now:
+                del self._buckets[key]
+                return True
+        return False
+
+    def _next_full_at(self):
+        return min(state[2] for _, state in zip(range(self.SCAN), self._buckets.values()))
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class SharedBucketStore:
+    """
+    Buckets compartilhados entre processos em um arquivo mapeado em memória (mmap).
+
+    Tabela hash de tamanho fixo com endereçamento aberto; cada slot guarda o hash
+    da chave, os tokens, o instante da última atualização e o instante em que o
+    bucket volta a ficar cheio. A exclusão mútua usa lockf no arquivo (entre
+    processos; ao contrário do flock, não é compartilhado com processos filhos
+    após o fork) e um Lock (entre threads do processo).
+    Só slots de buckets já cheios (equivalentes a buckets novos) são reaproveitados;
+    sem nenhum livre entre as sondagens, a chave nova é recusada (falha fechada).
+    """
+
+    SLOT = struct.Struct('<Qddd')
+    PROBES = 8
+
+    def __init__(self, path, slots=65536):
+        self.path = path
+        self.slots = slots
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        size = slots * self.SLOT.size
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(self._fd).st_size != size:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX)
+            try:
+                if os.fstat(self._fd).st_size != size:
+                    # Tamanho ou formato de slot diferente: recomeça com a tabela zerada
+                    os.ftruncate(self._fd, 0)
+                    os.ftruncate(self._fd, size)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN)
+        self._map = mmap.mmap(self._fd, size)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _hash(key):
+        # Hash estável entre processos (hash() do Python é aleatorizado por processo)
+        return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), 'little') or 1
+
+    def hit(self, key, capacity, rate, now):
+        key_hash = self._hash(key)
+        start = key_hash % self.slots
+        unpack_from, pack_into, slot_size = self.SLOT.unpack_from, self.SLOT.pack_into, self.SLOT.size
+
+        with self._lock:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX)
+            try:
+                target = None
+                free = None
+                next_full_at = None
+                for probe in range(self.PROBES):
+                    offset = ((start + probe) % self.slots) * slot_size
+                    slot_hash, tokens, updated_at, full_at = unpack_from(self._map, offset)
+                    if slot_hash == key_hash:
+                        target = (offset, tokens, updated_at)
+                        break
+                    if slot_hash == 0 or full_at <= now:
+                        if free is None:
+                            free = offset
+                        if slot_hash == 0:
+                            break
+                    elif next_full_at is None or full_at < next_full_at:
+                        next_full_at = full_at
+                if target is None:
+                    if free is None:
+                        return False, next_full_at - now
+                    target = (free, capacity, now)
+
+                offset, tokens, updated_at = target
+                allowed, tokens, retry_after = _bucket(tokens, updated_at, capacity, rate, now)
+                pack_into(self._map, offset, key_hash, tokens, now, now + (capacity - tokens) / rate)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN)
+        return allowed, retry_after
+
+
+class RateLimiter:
+    """Limites por rota e por chave (IP, usuário) com token bucket"""
+
+    def __init__(self, store, limits):
+        self.store = store
+        self.limits = {name: parse_limit(limit) for name, limit in limits.items()}
+
+    def check(self, name, identifiers):
+        """
+        Consome um token de cada bucket (name:chave) aplicável.
+        Retorna None se permitido ou os segundos até liberar (Retry-After).
+        """
+        now = time.time()
+        retry_after = None
+        for key_type, value in identifiers:
+            limit = self.limits.get(f'{name}:{key_type}')
+            if limit is None or value is None:
+                continue
+            allowed, wait = self.store.hit(f'{name}:{key_type}:{value}', limit[0], limit[1], now)
+            RATE_LIMIT_CHECKS.labels(name, key_type, 'allowed' if allowed else 'limited').inc()
+            if not allowed:
+                retry_after = max(retry_after or 0, wait)
+        return retry_after
+
+
+def _client_ip():
+    # Atrás de proxy, configurar ProxyFix para que remote_addr seja o IP real
+    return request.remote_addr
+
+
+def _user_key():
+    """Usuário autenticado (JWT) ou, no login, o email informado"""
+    try:
+        verify_jwt_in_request(optional=True)
+        identity = get_jwt_identity()
+    except Exception:
+        identity = None
+    if identity is None:
+        body = request.get_json(silent=True)
+        identity = body.get('email') if isinstance(body, dict) else None
+    return str(identity).strip().lower() if identity else None
+
+
+KEY_FUNCTIONS = {'ip': _client_ip, 'user': _user_key}
+
+
+def rate_limit(name, by=('ip',)):
+    """Aplica os limites configurados para `name` (ex.: login:ip, login:user) ao endpoint"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            limiter = current_app.extensions.get('rate_limiter')
+            if limiter is None:
+                return view(*args, **kwargs)
+
+            retry_after = limiter.check(name, [(key_type, KEY_FUNCTIONS[key_type]()) for key_type in by])
+            if retry_after is not None:
+                seconds = max(1, math.ceil(retry_after))
+                response = jsonify({'error': f'Muitas requisições. Tente novamente em {seconds} segundos.'})
+                response.status_code = 429
+                response.headers['Retry-After'] = str(seconds)
+                return response
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def init_rate_limiter(app):
+    """
+    Configura o limitador a partir do ambiente:
+    - RATELIMIT_ENABLED (padrão true)
+    - RATELIMIT_STORAGE: 'memory' (um processo) ou caminho do arquivo compartilhado
+      (padrão instance/ratelimit.bin)
+    - RATELIMIT_SLOTS: chaves em memória / slots do arquivo (padrão 65536)
+    - RATELIMIT_<NOME>_<CHAVE>: limites no formato N/second|minute|hour|day
+    """
+    if os.getenv('RATELIMIT_ENABLED', 'true').lower() != 'true':
+        return
+
+    storage = os.getenv('RATELIMIT_STORAGE', os.path.join(app.instance_path, 'ratelimit.bin'))
+    slots = int(os.getenv('RATELIMIT_SLOTS', '65536'))
+    if storage == 'memory':
+        store = MemoryBucketStore(maxsize=slots)
+    else:
+        store = SharedBucketStore(storage, slots=slots)
+
+    limits = {
+        name: os.getenv(f"RATELIMIT_{name.replace(':', '_').upper()}", default)
+        for name, default in DEFAULT_LIMITS.items()
+    }
+    app.extensions['rate_limiter'] = RateLimiter(store, limits)
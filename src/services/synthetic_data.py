@@ -0,0 +1,536 @@
+import math
+import random
+import uuid
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from sqlalchemy import bindparam, insert, select, text
+from src.models.database import (
+    db, Person, Client, Unit, UnitOwner, Charge, ChargeItem, ChargeProgress, WhatsAppMessage
+)
+from src.models.phone_index import PersonPhoneIndex
+from src.services.phone_index import normalize_phone
+
+# Valores dos enums dos modelos usados na geração
+UNIT_TYPES = ('APARTMENT', 'COMMERCIAL', 'PARKING')
+OWNER_TYPES = ('OWNER', 'TENANT')
+CHARGE_STATUSES = (('PENDING', 45), ('OVERDUE', 25), ('NEGOTIATING', 8), ('NEGOTIATED', 7), ('PAID', 15))
+CHARGE_CATEGORY = 'CONDOMINIUM_FEE'
+ITEM_CATEGORY = 'PRINCIPAL'
+
+FIRST_NAMES = (
+    'Ana', 'Bruno', 'Carla', 'Daniel', 'Eduarda', 'Felipe', 'Gabriela', 'Henrique', 'Isabela', 'João',
+    'Larissa', 'Marcos', 'Natália', 'Otávio', 'Patrícia', 'Rafael', 'Sabrina', 'Thiago', 'Vanessa', 'Wagner'
+)
+LAST_NAMES = (
+    'Silva', 'Santos', 'Oliveira', 'Souza', 'Rodrigues', 'Ferreira', 'Alves', 'Pereira', 'Lima', 'Gomes',
+    'Costa', 'Ribeiro', 'Martins', 'Carvalho', 'Almeida', 'Lopes', 'Soares', 'Fernandes', 'Vieira', 'Barbosa'
+)
+INBOUND_MESSAGES = (
+    'Bom dia, gostaria de negociar o débito', 'Pode me enviar o boleto atualizado?',
+    'Consigo pagar em 3 parcelas?', 'Já efetuei o pagamento, segue o comprovante'
+)
+OUTBOUND_MESSAGES = (
+    'Olá, identificamos pendências na sua unidade', 'Segue proposta de acordo para quitação',
+    'Lembrete: o acordo vence amanhã'
+)
+DDDS = ('11', '21', '31', '41', '47', '48', '51', '61', '71', '81', '85')
+
+# Documentos: namespace * 10^7 + contador precisa caber nos 9 dígitos da base do CPF
+MAX_NAMESPACE = 99
+MAX_PEOPLE_PER_NAMESPACE = 10 ** 7 - 1
+
+
+def _check_digit(digits, weights):
+    remainder = sum(int(d) * w for d, w in zip(digits, weights)) % 11
+    return '0' if remainder < 2 else str(11 - remainder)
+
+
+def make_cpf(number):
+    """CPF válido (somente dígitos) derivado de um número sequencial (< 10^9)"""
+    if not 0 <= number < 10 ** 9:
+        raise ValueError(f'Número fora da faixa do CPF: {number}')
+    base = f'{number:09d}'
+    base += _check_digit(base, range(10, 1, -1))
+    return base + _check_digit(base, range(11, 1, -1))
+
+
+def make_cnpj(number):
+    """CNPJ válido (somente dígitos) derivado de um número sequencial (raiz + filial, sem repetição até 10^12)"""
+    branch, root = divmod(number, 10 ** 8)
+    base = f'{root:08d}{branch + 1:04d}'
+    base += _check_digit(base, (5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2))
+    return base + _check_digit(base, (6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2))
+
+
+class SyntheticDataGenerator:
+    """
+    Gerador determinístico de dados sintéticos (mesma semente -> mesmas linhas).
+
+    Os métodos retornam dicts no formato das colunas, prontos para insert() em lote.
+    Documentos (CPF/CNPJ) e códigos são derivados de `namespace` e de contadores,
+    então execuções com namespaces diferentes não colidem nas chaves únicas.
+    A semente do RNG combina `seed` e `namespace` (ids distintos entre namespaces).
+    """
+
+    def __init__(self, seed=42, namespace=0, now=None):
+        if not 0 <= namespace <= MAX_NAMESPACE:
+            raise ValueError(f'namespace deve estar entre 0 e {MAX_NAMESPACE}')
+        self.rng = random.Random(f'{seed}:{namespace}')
+        self.namespace = namespace
+        self.now = now or datetime(2025, 1, 1, 12, 0, 0)
+        self._people = 0
+        self._charges = 0
+
+    def uuid(self):
+        return str(uuid.UUID(int=self.rng.getrandbits(128), version=4))
+
+    def phone(self):
+        return f'+55{self.rng.choice(DDDS)}9{self.rng.randrange(10 ** 8):08d}'
+
+    def timestamps(self, days_back=730):
+        created_at = self.now - timedelta(seconds=self.rng.randrange(days_back * 86400))
+        return {'created_at': created_at, 'updated_at': created_at, 'is_active': True}
+
+    def person(self, person_type=None):
+        if self._people >= MAX_PEOPLE_PER_NAMESPACE:
+            raise ValueError(f'Limite de {MAX_PEOPLE_PER_NAMESPACE} pessoas por namespace atingido')
+        self._people += 1
+        number = self.namespace * 10 ** 7 + self._people
+        person_type = person_type or ('PJ' if self.rng.random() < 0.05 else 'PF')
+        if person_type == 'PJ':
+            name = f'{self.rng.choice(LAST_NAMES)} {self.rng.choice(LAST_NAMES)} Ltda'
+            document = make_cnpj(number)
+        else:
+            name = f'{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)} {self.rng.choice(LAST_NAMES)}'
+            document = make_cpf(number)
+        return {
+            'id': self.uuid(),
+            'type': person_type,
+            'name': name,
+            'document': document,
+            'email': f'{document}@exemplo.com.br',
+            'phone': self.phone(),
+            'address': None,
+            'classification': 'REGULAR',
+            **self.timestamps()
+        }
+
+    def client(self, person_id, number):
+        return {
+            'id': self.uuid(),
+            'client_code': f'C{self.namespace:04d}{number:06d}',
+            'person_id': person_id,
+            'contract_start_date': date(2023, 1, 1) + timedelta(days=self.rng.randrange(365)),
+            'contract_end_date': None,
+            **self.timestamps()
+        }
+
+    def unit(self, client_id, block, floor, number):
+        return {
+            'id': self.uuid(),
+            'client_id': client_id,
+            'unit_code': f'{block}-{floor}{number:02d}',
+            'unit_type': UNIT_TYPES[0] if self.rng.random() < 0.9 else self.rng.choice(UNIT_TYPES[1:]),
+            'block': block,
+            'floor': str(floor),
+            'number': f'{floor}{number:02d}',
+            'area': Decimal(self.rng.randrange(4500, 18000)) / 100,
+            'ideal_fraction': Decimal('0.004000'),
+            'status': 'ACTIVE',
+            **self.timestamps()
+        }
+
+    def unit_owner(self, unit_id, person_id, owner_type='OWNER'):
+        return {
+            'id': self.uuid(),
+            'unit_id': unit_id,
+            'person_id': person_id,
+            'owner_type': owner_type,
+            'ownership_percentage': Decimal('100.00'),
+            'is_responsible_for_charges': owner_type == 'OWNER',
+            'start_date': date(2020, 1, 1) + timedelta(days=self.rng.randrange(1500)),
+            'end_date': None,
+            **self.timestamps()
+        }
+
+    def charge(self, client_id, debtor_id, unit_id, status=None, due_date=None):
+        """Cobrança mensal com um item principal: (charge, item)"""
+        self._charges += 1
+        timestamps = self.timestamps()
+        if due_date is None:
+            due_date = timestamps['created_at'].date().replace(day=10)
+        else:
+            created_at = datetime.combine(due_date - timedelta(days=10), self.now.time())
+            timestamps.update(created_at=created_at, updated_at=created_at)
+        principal = Decimal(self.rng.randrange(35000, 250000)) / 100
+        status = status or self.rng.choices(
+            [status for status, _ in CHARGE_STATUSES], weights=[weight for _, weight in CHARGE_STATUSES]
+        )[0]
+        charge_id = self.uuid()
+        charge = {
+            'id': charge_id,
+            'charge_code': f'COB{self.namespace:04d}{self._charges:010d}'[:20],
+            'client_id': client_id,
+            'debtor_id': debtor_id,
+            'unit_id': unit_id,
+            'charge_date': due_date - timedelta(days=10),
+            'due_date': due_date,
+            'status': status,
+            'category': CHARGE_CATEGORY,
+            'description': f'Taxa condominial {due_date:%m/%Y}',
+            'reference_period': f'{due_date:%m/%Y}',
+            'principal_amount': principal,
+            'expenses_amount': Decimal('0.00'),
+            'extrajudicial_fees': Decimal('0.00'),
+            'execution_fees': Decimal('0.00'),
+            'art_523_fine': Decimal('0.00'),
+            'total_amount': principal,
+            'paid_amount': principal if status == 'PAID' else Decimal('0.00'),
+            'balance_amount': Decimal('0.00') if status == 'PAID' else principal,
+            **timestamps
+        }
+        item = {
+            'id': self.uuid(),
+            'charge_id': charge_id,
+            'category': ITEM_CATEGORY,
+            'due_date': due_date,
+            'description': charge['description'],
+            'nominal_amount': principal,
+            'monetary_correction_rate': Decimal('0'),
+            'monetary_correction': Decimal('0.00'),
+            'interest_rate': Decimal('1.0000'),
+            'interest_amount': Decimal('0.00'),
+            'fine_rate': Decimal('2.0000'),
+            'fine_amount': Decimal('0.00'),
+            'subtotal': principal,
+            **timestamps
+        }
+        return charge, item
+
+    def contact(self, charge, phone, sent_at):
+        """Mensagem do WhatsApp vinculada à cobrança e o andamento correspondente: (message, progress)"""
+        inbound = self.rng.random() < 0.6
+        message_id = f'wamid.{self.uuid()}'
+        content = self.rng.choice(INBOUND_MESSAGES if inbound else OUTBOUND_MESSAGES)
+        timestamps = {'created_at': sent_at, 'updated_at': sent_at, 'is_active': True}
+        message = {
+            'id': self.uuid(),
+            'charge_id': charge['id'],
+            'message_id': message_id,
+            'phone_number': phone,
+            'contact_name': None,
+            'message_type': 'TEXT',
+            'direction': 'INBOUND' if inbound else 'OUTBOUND',
+            'content': content,
+            'media_url': None,
+            'media_type': None,
+            'status': 'RECEIVED' if inbound else 'DELIVERED',
+            'sent_at': sent_at,
+            'delivered_at': None if inbound else sent_at,
+            'read_at': None,
+            'webhook_data': None,
+            **timestamps
+        }
+        progress = {
+            'id': self.uuid(),
+            'charge_id': charge['id'],
+            'progress_date': sent_at,
+            'progress_type': 'WHATSAPP_CONTACT',
+            'title': 'Mensagem recebida via WhatsApp' if inbound else 'Mensagem enviada via WhatsApp',
+            'description': content,
+            'user_id': None,
+            'responsible_name': None,
+            'whatsapp_message_id': message_id,
+            'email_id': None,
+            'phone_number': phone,
+            'priority': 'MEDIUM',
+            'is_milestone': False,
+            **timestamps
+        }
+        return message, progress
+
+
+def seed_tenant(units=200, seed=42, blocks=4):
+    """
+    Cria (uma única vez por semente) um condomínio sintético: cliente, unidades,
+    proprietários e uma cobrança em aberto por unidade. Retorna os ids gerados.
+    Idempotente: se o cliente da semente já existir, apenas carrega os ids.
+    A semente também é o namespace dos documentos, portanto vai de 0 a MAX_NAMESPACE
+    (sementes distintas nunca colidem nos CPFs/CNPJs e códigos gerados).
+    """
+    if not 0 <= seed <= MAX_NAMESPACE:
+        raise ValueError(f'seed deve estar entre 0 e {MAX_NAMESPACE}')
+    generator = SyntheticDataGenerator(seed=seed, namespace=seed)
+    client_code = f'C{seed:04d}{1:06d}'
+
+    existing = db.session.execute(select(Client.id).where(Client.client_code == client_code)).scalar()
+    if existing is None:
+        manager = generator.person('PJ')
+        client = generator.client(manager['id'], 1)
+        people, unit_rows, owners, charges, items = [manager], [], [], [], []
+        per_block = max(1, units // blocks)
+        for position in range(units):
+            block = chr(ord('A') + position // per_block)
+            floor, number = divmod(position % per_block, 4)
+            unit = generator.unit(client['id'], block, floor + 1, number + 1)
+            owner = generator.person('PF')
+            charge, item = generator.charge(client['id'], owner['id'], unit['id'], status='OVERDUE')
+            people.append(owner)
+            unit_rows.append(unit)
+            owners.append(generator.unit_owner(unit['id'], owner['id']))
+            charges.append(charge)
+            items.append(item)
+
+        # insert() em lote não passa pelos eventos do mapper: índice de telefones gravado aqui
+        phones = [{'person_id': person['id'], 'phone_e164': normalize_phone(person['phone'])} for person in people]
+
+        for model, rows in ((Person, people), (PersonPhoneIndex, phones), (Client, [client]), (Unit, unit_rows),
+                            (UnitOwner, owners), (Charge, charges), (ChargeItem, items)):
+            db.session.execute(insert(model), rows)
+        db.session.commit()
+        existing = client['id']
+
+    rows = db.session.execute(
+        select(Unit.id, UnitOwner.person_id, Person.phone, Charge.id)
+        .join(UnitOwner, UnitOwner.unit_id == Unit.id)
+        .join(Person, Person.id == UnitOwner.person_id)
+        .join(Charge, Charge.unit_id == Unit.id)
+        .where(Unit.client_id == existing)
+    ).all()
+    return {
+        'clientId': existing,
+        'clientCode': client_code,
+        'unitIds': sorted({row[0] for row in rows}),
+        'people': sorted({(row[1], row[2]) for row in rows}),
+        'chargeIds': sorted({row[3] for row in rows})
+    }
+
+
+class SyntheticDataSeeder:
+    """
+    Carga em volume (milhões de linhas) de condomínios sintéticos, referencialmente
+    consistentes, para testes de desempenho.
+
+    Distribuições:
+    - unidades por condomínio: log-normal (mediana ~80, entre 8 e 600)
+    - cada unidade tem um proprietário; 25% têm inquilino e 10% dos proprietários
+      possuem outras unidades no mesmo condomínio
+    - 1 a 24 cobranças mensais por unidade; a maioria das unidades paga em dia e
+      uma minoria concentra a inadimplência (OVERDUE/NEGOTIATING/NEGOTIATED)
+    - cobranças em aberto recebem de 0 a 4 contatos pelo WhatsApp (mensagem + andamento)
+
+    As linhas são acumuladas por tabela e gravadas com insert() em lote (executemany),
+    na ordem das chaves estrangeiras, com um commit por lote. `tables` permite apontar
+    para tabelas refletidas de outro banco (padrão: tabelas dos modelos).
+    """
+
+    TABLE_ORDER = (
+        'people', 'person_phone_index', 'clients', 'units', 'unit_owners',
+        'charges', 'charge_items', 'whatsapp_messages', 'charge_progress'
+    )
+
+    def __init__(self, connection, seed=42, namespace=1, batch_size=10000, tables=None):
+        self.connection = connection
+        self.generator = SyntheticDataGenerator(seed=seed, namespace=namespace)
+        self.rng = self.generator.rng
+        self.batch_size = batch_size
+        self.tables = tables or {
+            model.__table__.name: model.__table__
+            for model in (Person, PersonPhoneIndex, Client, Unit, UnitOwner, Charge, ChargeItem,
+                          WhatsAppMessage, ChargeProgress)
+        }
+        self.counts = dict.fromkeys(self.TABLE_ORDER, 0)
+        self._pending = {name: [] for name in self.TABLE_ORDER}
+        self._pending_rows = 0
+        self._statements = {}
+        self._clients = 0
+
+    def run(self, charges, progress=None, defer_indexes=False):
+        """
+        Gera condomínios até atingir `charges` cobranças. progress(counts) é chamado
+        a cada lote. Com defer_indexes, os índices secundários são removidos antes
+        da carga e recriados ao final (uma ordenação em vez de milhões de inserções);
+        só é permitido com as tabelas vazias, nunca em um banco em uso.
+        """
+        if defer_indexes and not self._tables_empty():
+            raise ValueError('defer_indexes exige tabelas vazias (os índices seriam removidos de um banco em uso)')
+        self._tune()
+        try:
+            indexes = self._drop_indexes() if defer_indexes else []
+            try:
+                while self.counts['charges'] + len(self._pending['charges']) < charges:
+                    self._tenant(charges)
+                    if self._pending_rows >= self.batch_size:
+                        self.flush()
+                        if progress:
+                            progress(self.counts)
+                self.flush()
+            finally:
+                self._create_indexes(indexes)
+        finally:
+            self._restore()
+        return self.counts
+
+    def _add(self, table, row):
+        self._pending[table].append(row)
+        self._pending_rows += 1
+
+    def _person(self, person_type=None):
+        person = self.generator.person(person_type)
+        self._add('people', person)
+        # Telefones gerados já estão em E.164 (dispensa normalize_phone)
+        self._add('person_phone_index', {'person_id': person['id'], 'phone_e164': person['phone']})
+        return person
+
+    def _tenant(self, limit):
+        rng, generator = self.rng, self.generator
+        self._clients += 1
+        client = generator.client(self._person('PJ')['id'], self._clients)
+        self._add('clients', client)
+
+        units = int(min(600, max(8, rng.lognormvariate(math.log(80), 0.8))))
+        per_block = 4 * rng.randrange(8, 21)
+        today = generator.now.date().replace(day=10)
+        owners = []
+
+        for position in range(units):
+            block = chr(ord('A') + position // per_block)
+            floor, number = divmod(position % per_block, 4)
+            unit = generator.unit(client['id'], block, floor + 1, number + 1)
+            self._add('units', unit)
+
+            owner = rng.choice(owners) if owners and rng.random() < 0.1 else self._person()
+            owners.append(owner)
+            self._add('unit_owners', generator.unit_owner(unit['id'], owner['id']))
+            residents = [owner]
+            if rng.random() < 0.25:
+                tenant = self._person('PF')
+                residents.append(tenant)
+                self._add('unit_owners', generator.unit_owner(unit['id'], tenant['id'], 'TENANT'))
+
+            # Propensão à inadimplência da unidade (poucas unidades concentram os débitos)
+            default_rate = rng.choice((0.35, 0.6)) if rng.random() < 0.15 else 0.02
+            for months_back in range(rng.randrange(1, 25)):
+                if self.counts['charges'] + len(self._pending['charges']) >= limit:
+                    return
+                due_date = _months_before(today, months_back)
+                if months_back == 0:
+                    status = 'PENDING'
+                elif rng.random() < default_rate:
+                    status = rng.choices(('OVERDUE', 'NEGOTIATING', 'NEGOTIATED'), (75, 15, 10))[0]
+                else:
+                    status = 'PAID'
+                charge, item = generator.charge(client['id'], owner['id'], unit['id'], status, due_date)
+                self._add('charges', charge)
+                self._add('charge_items', item)
+
+                if status in ('OVERDUE', 'NEGOTIATING', 'NEGOTIATED'):
+                    sent_at = datetime.combine(due_date, generator.now.time())
+                    for _ in range(rng.choices((0, 1, 2, 3, 4), (20, 35, 25, 12, 8))[0]):
+                        sent_at += timedelta(minutes=rng.randrange(60, 14 * 1440))
+                        if sent_at > generator.now:
+                            break
+                        message, entry = generator.contact(charge, rng.choice(residents)['phone'], sent_at)
+                        self._add('whatsapp_messages', message)
+                        self._add('charge_progress', entry)
+
+    def flush(self):
+        for name in self.TABLE_ORDER:
+            rows = self._pending[name]
+            if not rows:
+                continue
+            table = self.tables.get(name)
+            if table is not None:
+                self._insert(table, rows)
+                self.counts[name] += len(rows)
+            self._pending[name] = []
+        self._pending_rows = 0
+        self.connection.commit()
+
+    def _insert(self, table, rows):
+        """
+        executemany direto no driver com o INSERT compilado uma vez por tabela.
+        Os conversores de tipo do dialeto (Decimal, datetime, bool) são aplicados aqui,
+        evitando a montagem de parâmetros do SQLAlchemy linha a linha (a maior parte
+        do tempo de carga).
+        """
+        compiled = self._statements.get(table.name)
+        if compiled is None:
+            dialect = self.connection.dialect
+            statement = table.insert().compile(dialect=dialect, column_keys=list(rows[0]))
+            keys = statement.positiontup or list(statement.binds)
+            processors = [
+                (key, table.c[key].type.dialect_impl(dialect).bind_processor(dialect)) for key in keys
+            ]
+            compiled = self._statements[table.name] = (statement.string, processors, bool(statement.positiontup))
+        sql, processors, positional = compiled
+
+        params = [
+            tuple([processor(row[key]) if processor else row[key] for key, processor in processors]) for row in rows
+        ]
+        if not positional:
+            keys = [key for key, _ in processors]
+            params = [dict(zip(keys, values)) for values in params]
+        self.connection.exec_driver_sql(sql, params)
+
+    # Ajustes de sessão para carga em volume (desfeitos ao final)
+
+    def _tune(self):
+        dialect = self.connection.dialect.name
+        if dialect == 'sqlite':
+            for pragma in ('synchronous = OFF', 'cache_size = -262144', 'temp_store = MEMORY'):
+                self.connection.exec_driver_sql(f'PRAGMA {pragma}')
+        elif dialect == 'postgresql':
+            self.connection.exec_driver_sql('SET synchronous_commit TO OFF')
+        elif dialect == 'mysql':
+            self.connection.exec_driver_sql('SET unique_checks = 0, foreign_key_checks = 0')
+        self.connection.commit()
+
+    def _restore(self):
+        # A conexão ajustada não volta ao pool (os ajustes valem para a sessão inteira)
+        self.connection.rollback()
+        self.connection.invalidate()
+
+    def _tables_empty(self):
+        for name in self.TABLE_ORDER:
+            table = self.tables.get(name)
+            if table is not None and self.connection.execute(select(1).select_from(table).limit(1)).first():
+                return False
+        return True
+
+    def _secondary_indexes(self):
+        """Índices das tabelas carregadas, exceto chaves primárias e únicos: [(nome, CREATE INDEX)]"""
+        dialect = self.connection.dialect.name
+        names = [name for name in self.TABLE_ORDER if name in self.tables]
+        if dialect == 'sqlite':
+            query = text(
+                "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL "
+                "AND sql NOT LIKE 'CREATE UNIQUE%' AND tbl_name IN :tables"
+            ).bindparams(bindparam('tables', expanding=True))
+        elif dialect == 'postgresql':
+            query = text(
+                "SELECT indexname, indexdef FROM pg_indexes WHERE schemaname = current_schema() "
+                "AND tablename = ANY(:tables) AND indexdef NOT LIKE 'CREATE UNIQUE%'"
+            )
+        else:
+            # MySQL: unique_checks/foreign_key_checks desligados já aliviam a carga
+            return []
+        return [(row[0], row[1]) for row in self.connection.execute(query, {'tables': names})]
+
+    def _drop_indexes(self):
+        indexes = self._secondary_indexes()
+        for name, _ in indexes:
+            self.connection.exec_driver_sql(f'DROP INDEX {name}')
+        self.connection.commit()
+        return indexes
+
+    def _create_indexes(self, indexes):
+        self.connection.rollback()
+        for _, sql in indexes:
+            self.connection.exec_driver_sql(sql)
+        self.connection.commit()
+
+
+def _months_before(day, months):
+    month = day.year * 12 + day.month - 1 - months
+    return day.replace(year=month // 12, month=month % 12 + 1)
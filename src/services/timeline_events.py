@@ -0,0 +1,303 @@
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from flask import current_app
+
+
+class TimelineEventLog:
+    """
+    Log de eventos de timeline compartilhado entre processos (arquivo SQLite local).
+
+    O id AUTOINCREMENT é persistente e monotônico: serve como `id:` do SSE em
+    qualquer worker e continua válido após reinícios. Os eventos mais antigos
+    são removidos mantendo os últimos `retention`.
+    """
+
+    def __init__(self, path, retention=10000):
+        self.path = path
+        self.retention = retention
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection().execute("""
+            CREATE TABLE IF NOT EXISTS timeline_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                charge_id VARCHAR(36),
+                client_id VARCHAR(36),
+                payload TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        # Conexões SQLite não podem atravessar um fork (workers pré-carregados do gunicorn)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def append(self, event):
+        cursor = self._connection().execute(
+            'INSERT INTO timeline_events (charge_id, client_id, payload, created_at) VALUES (?, ?, ?, ?)',
+            (
+                str(event['chargeId']) if event['chargeId'] is not None else None,
+                str(event['clientId']) if event['clientId'] is not None else None,
+                json.dumps(event, default=str),
+                time.time()
+            )
+        )
+        return cursor.lastrowid
+
+    def since(self, last_id, until=None, limit=1000):
+        query = 'SELECT id, payload FROM timeline_events WHERE id > ?'
+        params = [last_id]
+        if until is not None:
+            query += ' AND id <= ?'
+            params.append(until)
+        query += ' ORDER BY id LIMIT ?'
+        params.append(limit)
+        return [{**json.loads(payload), 'id': event_id}
+                for event_id, payload in self._connection().execute(query, params)]
+
+    def bounds(self):
+        """(menor id, maior id) presentes no log; (None, None) se vazio"""
+        return self._connection().execute('SELECT MIN(id), MAX(id) FROM timeline_events').fetchone()
+
+    def last_id(self):
+        row = self._connection().execute("SELECT seq FROM sqlite_sequence WHERE name = 'timeline_events'").fetchone()
+        return row[0] if row else 0
+
+    def purge(self):
+        self._connection().execute('DELETE FROM timeline_events WHERE id <= ?', (self.last_id() - self.retention,))
+
+
+class TimelineEventBroker:
+    """
+    Fan-out dos eventos de timeline das cobranças entre todos os workers.
+
+    - publish() grava o evento no log compartilhado; cada processo acompanha o
+      log com uma thread (intervalo curto) e entrega aos seus assinantes
+    - O id do evento é o id do log (persistente), usado como `id:` do SSE;
+      Last-Event-ID retoma de qualquer worker a partir do log
+    - Id desconhecido (maior que o último do log, ex.: log recriado) ou já removido
+      do log gera um evento `reset` (o cliente deve recarregar a timeline)
+    - Cada assinante tem uma fila limitada; assinantes lentos são
+      desconectados e devem reconectar com Last-Event-ID
+    """
+
+    def __init__(self, path=None, subscriber_queue_size=100, max_subscribers=500, poll_interval=0.5,
+                 retention=10000):
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._last_id = None
+        self._thread = None
+        self._thread_pid = None
+        self._wake = threading.Event()
+        self.log = None
+        self.retention = retention
+        self.poll_interval = poll_interval
+        self.subscriber_queue_size = subscriber_queue_size
+        self.max_subscribers = max_subscribers
+        if path:
+            self.configure(path)
+
+    def configure(self, path, poll_interval=None, retention=None, max_subscribers=None):
+        if max_subscribers is not None:
+            self.max_subscribers = max_subscribers
+        if poll_interval is not None:
+            self.poll_interval = poll_interval
+        if retention is not None:
+            self.retention = retention
+        self.log = TimelineEventLog(path, retention=self.retention)
+        with self._lock:
+            self._last_id = None
+
+    def publish(self, event_type, charge_id, client_id, data, date=None):
+        """Publica um evento para os assinantes da cobrança e do cliente (em todos os workers)"""
+        event = {
+            'type': event_type,
+            'chargeId': charge_id,
+            'clientId': client_id,
+            'date': date,
+            'data': data
+        }
+        event['id'] = self.log.append(event)
+        # Entrega local sem esperar o próximo ciclo da thread
+        self._wake.set()
+        return event
+
+    def subscribe(self, charge_id=None, client_id=None, last_event_id=None):
+        """
+        Registra um assinante. Retorna (subscription, replay, reset), onde
+        replay são os eventos perdidos desde last_event_id e reset indica que
+        o log já não cobre esse intervalo ou não conhece o id (o cliente deve
+        recarregar a timeline).
+        """
+        self._ensure_thread()
+        subscription = TimelineSubscription(self, charge_id, client_id, self.subscriber_queue_size)
+
+        # Alcança o log antes de calcular o replay (eventos até _last_id vão no replay,
+        # os seguintes chegam pela thread)
+        self._advance()
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                raise OverflowError('Limite de conexões de timeline atingido')
+
+            replay = []
+            reset = False
+            if last_event_id is not None:
+                oldest_id, _ = self.log.bounds()
+                if last_event_id > self._last_id:
+                    reset = True
+                else:
+                    if oldest_id is None or last_event_id < oldest_id - 1:
+                        reset = last_event_id < self._last_id
+                    replay = [
+                        event for event in self.log.since(last_event_id, until=self._last_id, limit=self.retention)
+                        if subscription.matches(event)
+                    ]
+
+            self._subscribers.add(subscription)
+
+        return subscription, replay, reset
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    @property
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def _advance(self):
+        """Lê os eventos novos do log e os entrega aos assinantes deste processo"""
+        with self._lock:
+            if self._last_id is None or not self._subscribers:
+                # Sem assinantes não há o que entregar: só acompanha a posição do log
+                self._last_id = self.log.last_id()
+                return
+            events = self.log.since(self._last_id)
+            if not events:
+                return
+            self._last_id = events[-1]['id']
+            subscribers = list(self._subscribers)
+
+        for event in events:
+            for subscription in subscribers:
+                if subscription.matches(event):
+                    subscription.put(event)
+
+    def _ensure_thread(self):
+        # Threads não sobrevivem ao fork: cada worker inicia a sua no primeiro assinante
+        with self._lock:
+            if self._thread is not None and self._thread_pid == os.getpid() and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='timeline-events', daemon=True)
+            self._thread_pid = os.getpid()
+            self._last_id = None
+            self._thread.start()
+
+    def _run(self):
+        next_purge = 0
+        while True:
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            try:
+                self._advance()
+                if time.monotonic() >= next_purge:
+                    next_purge = time.monotonic() + 60
+                    self.log.purge()
+            except sqlite3.Error:
+                # Log temporariamente bloqueado: tenta de novo no próximo ciclo
+                time.sleep(self.poll_interval)
+
+
+class TimelineSubscription:
+    """Assinatura de um stream de timeline (cobrança ou cliente)"""
+
+    def __init__(self, broker, charge_id, client_id, queue_size):
+        self.broker = broker
+        self.charge_id = charge_id
+        self.client_id = client_id
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.overflowed = False
+
+    def matches(self, event):
+        if self.charge_id is not None and str(event['chargeId']) != str(self.charge_id):
+            return False
+        if self.client_id is not None and str(event['clientId']) != str(self.client_id):
+            return False
+        return True
+
+    def put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            # Assinante lento: encerra o stream, ele retoma via Last-Event-ID
+            self.overflowed = True
+            self.broker.unsubscribe(self)
+
+    def get(self, timeout):
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+def format_sse(event):
+    """Formata um evento no protocolo text/event-stream"""
+    payload = json.dumps(event, default=str)
+    return f"id: {event['id']}\nevent: timeline\ndata: {payload}\n\n"
+
+
+timeline_broker = TimelineEventBroker()
+
+
+def publish_timeline_event(event_type, charge, data, date=None):
+    """
+    Publica um evento de timeline para uma cobrança já persistida.
+
+    Chamado após o commit: uma falha no log de eventos não pode desfazer nem
+    repetir a gravação, então é apenas registrada (os streams abertos perdem
+    o evento e o cliente o vê ao recarregar a timeline). Retorna None nesse caso.
+    """
+    try:
+        return timeline_broker.publish(
+            event_type,
+            charge_id=charge.id,
+            client_id=charge.client_id,
+            data=data,
+            date=date.isoformat() if date else None
+        )
+    except Exception as e:
+        current_app.logger.error('Falha ao publicar evento de timeline %s da cobrança %s: %s', event_type, charge.id, e)
+        return None
+
+
+def init_timeline_events(app):
+    """
+    Configura o log compartilhado dos eventos de timeline:
+    - TIMELINE_EVENTS_PATH (padrão instance/timeline_events.db)
+    - TIMELINE_EVENTS_POLL_INTERVAL (segundos, padrão 0.5) e TIMELINE_EVENTS_RETENTION (padrão 10000)
+    - TIMELINE_MAX_SUBSCRIBERS: streams simultâneos por processo (padrão 500; sob gthread
+      o gunicorn.conf.py limita a metade das threads, pois cada stream ocupa uma thread)
+    """
+    timeline_broker.configure(
+        os.getenv('TIMELINE_EVENTS_PATH', os.path.join(app.instance_path, 'timeline_events.db')),
+        poll_interval=float(os.getenv('TIMELINE_EVENTS_POLL_INTERVAL', '0.5')),
+        retention=int(os.getenv('TIMELINE_EVENTS_RETENTION', '10000')),
+        max_subscribers=int(os.getenv('TIMELINE_MAX_SUBSCRIBERS', '500'))
+    )
+    app.extensions['timeline_broker'] = timeline_broker
@@ -0,0 +1,311 @@
+import hashlib
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from flask_jwt_extended import get_jwt, get_jwt_identity
+from sqlalchemy import delete, event, inspect
+from sqlalchemy.orm import Session
+from src.models.database import db
+from src.models.revoked_token import RevokedToken
+from src.models.user import User
+from src.services.entity_cache import InvalidationFeed, entity_cache
+
+# Tolerância para commits em andamento e relógios levemente diferentes entre servidores
+SYNC_MARGIN = timedelta(seconds=5)
+
+
+class BloomFilter:
+    """Filtro de Bloom em bytearray (falsos positivos possíveis, falsos negativos nunca)"""
+
+    def __init__(self, capacity, error_rate):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, value):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+class TokenRevocationStore:
+    """
+    Lista de revogação de JWTs (jti) com caminho rápido em memória.
+
+    - Filtro de Bloom por processo: jti ausente no filtro = token válido, sem consulta
+    - Tabela revoked_tokens: fonte da verdade, consultada só quando o filtro acusa
+      (revogado de fato ou falso positivo); o resultado fica memorizado
+    - Sincronização: a cada sync_interval segundos o processo carrega as revogações
+      feitas pelos demais workers; a cada rebuild_interval reconstrói o filtro só com
+      as entradas não expiradas. Uma única requisição por vez faz a atualização; as
+      demais seguem com o filtro atual
+    - Entradas expiradas (tokens que já seriam recusados pelo exp) são removidas fora
+      do caminho das requisições: purge_expired(), comando flask purge-revoked-tokens
+    """
+
+    def __init__(self, capacity=100000, error_rate=0.001, sync_interval=5, rebuild_interval=3600, memo_size=10000):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_interval = sync_interval
+        self.rebuild_interval = rebuild_interval
+        self.memo_size = memo_size
+        self.bloom = None
+        self._memo = OrderedDict()
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._synced_until = None
+        self._next_sync = 0
+        self._next_rebuild = 0
+
+    def configure(self, capacity=None, error_rate=None, sync_interval=None, rebuild_interval=None):
+        if capacity is not None:
+            self.capacity = capacity
+        if error_rate is not None:
+            self.error_rate = error_rate
+        if sync_interval is not None:
+            self.sync_interval = sync_interval
+        if rebuild_interval is not None:
+            self.rebuild_interval = rebuild_interval
+        with self._lock:
+            self.bloom = None
+            self._memo.clear()
+
+    def revoke(self, jti, expires_at, user_id=None, token_type='access'):
+        """Registra a revogação (sem commit); o filtro deste processo é atualizado após o commit"""
+        db.session.merge(RevokedToken(
+            jti=jti,
+            user_id=str(user_id) if user_id is not None else None,
+            token_type=token_type,
+            revoked_at=datetime.utcnow(),
+            expires_at=expires_at
+        ))
+        db.session.info.setdefault('revoked_jtis', []).append(jti)
+
+    def apply(self, jtis):
+        """Aplica revogações já confirmadas no banco ao filtro e à memória deste processo"""
+        with self._lock:
+            for jti in jtis:
+                if self.bloom is not None:
+                    self.bloom.add(jti)
+                self._remember(jti, True)
+
+    def is_revoked(self, jti):
+        self._refresh()
+        with self._lock:
+            if jti not in self.bloom:
+                return False
+            if jti in self._memo:
+                self._memo.move_to_end(jti)
+                return self._memo[jti]
+
+        revoked = db.session.query(RevokedToken.jti).filter(RevokedToken.jti == jti).first() is not None
+        with self._lock:
+            self._remember(jti, revoked)
+        return revoked
+
+    def stats(self):
+        return {
+            'bloomBits': self.bloom.size if self.bloom else 0,
+            'bloomHashes': self.bloom.hashes if self.bloom else 0,
+            'revokedLoaded': self.bloom.count if self.bloom else 0,
+            'memoized': len(self._memo)
+        }
+
+    def _remember(self, jti, revoked):
+        self._memo[jti] = revoked
+        self._memo.move_to_end(jti)
+        while len(self._memo) > self.memo_size:
+            self._memo.popitem(last=False)
+
+    def purge_expired(self):
+        """Remove do banco as revogações de tokens já expirados. Retorna a quantidade."""
+        with db.engine.begin() as connection:
+            result = connection.execute(delete(RevokedToken).where(RevokedToken.expires_at <= datetime.utcnow()))
+        return result.rowcount
+
+    def _refresh(self):
+        now = time.monotonic()
+        if self.bloom is not None and now < self._next_sync and now < self._next_rebuild:
+            return
+        # Sem filtro ainda, todos esperam o primeiro; depois, só uma requisição atualiza
+        if not self._refresh_lock.acquire(blocking=self.bloom is None):
+            return
+        try:
+            now = time.monotonic()
+            if self.bloom is None or now >= self._next_rebuild:
+                self._rebuild()
+            elif now >= self._next_sync:
+                self._sync()
+        finally:
+            self._refresh_lock.release()
+
+    def _rebuild(self):
+        started = datetime.utcnow()
+        bloom = BloomFilter(self.capacity, self.error_rate)
+        rows = db.session.query(RevokedToken.jti).filter(RevokedToken.expires_at > started)
+        for row in rows.yield_per(5000):
+            bloom.add(row.jti)
+
+        with self._lock:
+            self.bloom = bloom
+            self._memo.clear()
+            self._synced_until = started - SYNC_MARGIN
+            self._next_sync = time.monotonic() + self.sync_interval
+            self._next_rebuild = time.monotonic() + self.rebuild_interval
+
+    def _sync(self):
+        started = datetime.utcnow()
+        rows = db.session.query(RevokedToken.jti).filter(
+            RevokedToken.revoked_at >= self._synced_until,
+            RevokedToken.expires_at > started
+        ).all()
+
+        with self._lock:
+            for row in rows:
+                self.bloom.add(row.jti)
+                self._remember(row.jti, True)
+            self._synced_until = started - SYNC_MARGIN
+            self._next_sync = time.monotonic() + self.sync_interval
+
+
+class IdentityCache:
+    """
+    Dados do usuário (to_dict) por token (jti), válidos até o exp do token ou o TTL.
+
+    Alterações no usuário são descartadas após o commit neste processo e, pelo log de
+    invalidações compartilhado (chaves 'identity:<user_id>'), nos demais workers em até
+    `sync_interval`. Não usar para autorização; verificações de papel leem do banco
+    (permissions.current_user_is_admin).
+    """
+
+    def __init__(self, maxsize=10000, ttl=300, sync_interval=1.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.feed = InvalidationFeed('identity:', sync_interval)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, jti):
+        self._sync()
+        with self._lock:
+            entry = self._entries.get(jti)
+            if entry is None:
+                return None
+            if entry[2] < time.monotonic():
+                del self._entries[jti]
+                return None
+            self._entries.move_to_end(jti)
+            return entry[1]
+
+    def set(self, jti, user_id, identity, ttl):
+        with self._lock:
+            self._entries[jti] = (str(user_id), identity, time.monotonic() + min(ttl, self.ttl))
+            self._entries.move_to_end(jti)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def evict(self, jti):
+        with self._lock:
+            self._entries.pop(jti, None)
+
+    def evict_user(self, user_id):
+        """Descarta as identidades do usuário neste processo e publica para os demais"""
+        self._evict_users({str(user_id)})
+        self.feed.publish([user_id])
+
+    def _evict_users(self, user_ids):
+        with self._lock:
+            for jti in [jti for jti, entry in self._entries.items() if entry[0] in user_ids]:
+                del self._entries[jti]
+
+    def _sync(self):
+        user_ids = self.feed.poll()
+        if user_ids is InvalidationFeed.ALL:
+            with self._lock:
+                self._entries.clear()
+        elif user_ids:
+            self._evict_users(set(user_ids))
+
+
+token_revocation = TokenRevocationStore()
+identity_cache = IdentityCache()
+
+
+def current_identity():
+    """Usuário do token atual (dict do to_dict()), sem consulta ao banco quando já em cache"""
+    claims = get_jwt()
+    identity = identity_cache.get(claims['jti'])
+    if identity is not None:
+        return identity
+
+    user_id = get_jwt_identity()
+    user = entity_cache.get(User, user_id)
+    if user is None:
+        return None
+    identity = user.to_dict()
+    identity_cache.set(claims['jti'], user_id, identity, max(0, claims.get('exp', 0) - time.time()))
+    return identity
+
+
+def revoke_current_token():
+    """Revoga o token da requisição atual (sem commit)"""
+    claims = get_jwt()
+    token_revocation.revoke(
+        claims['jti'],
+        datetime.utcfromtimestamp(claims['exp']) if 'exp' in claims else datetime.utcnow() + timedelta(days=365),
+        user_id=claims.get('sub'),
+        token_type=claims.get('type', 'access')
+    )
+    identity_cache.evict(claims['jti'])
+
+
+def init_token_revocation(app, jwt_manager):
+    """Configura a revogação a partir do ambiente e registra o blocklist loader do flask_jwt_extended"""
+    token_revocation.configure(
+        capacity=int(os.getenv('JWT_REVOCATION_CAPACITY', '100000')),
+        error_rate=float(os.getenv('JWT_REVOCATION_ERROR_RATE', '0.001')),
+        sync_interval=float(os.getenv('JWT_REVOCATION_SYNC_INTERVAL', '5')),
+        rebuild_interval=float(os.getenv('JWT_REVOCATION_REBUILD_INTERVAL', '3600'))
+    )
+    identity_cache.ttl = int(os.getenv('JWT_IDENTITY_CACHE_TTL', '300'))
+
+    @jwt_manager.token_in_blocklist_loader
+    def _token_is_revoked(jwt_header, jwt_payload):
+        return token_revocation.is_revoked(jwt_payload['jti'])
+
+    app.extensions['token_revocation'] = token_revocation
+
+
+# Usuário alterado/removido: descarta as identidades em cache dos seus tokens
+@event.listens_for(Session, 'after_flush')
+def _collect_user_changes(session, flush_context):
+    changed = session.info.setdefault('identity_cache_changes', set())
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User) and inspect(obj).identity:
+            changed.add(inspect(obj).identity[0])
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_user_changes(session):
+    for user_id in session.info.pop('identity_cache_changes', ()):
+        identity_cache.evict_user(user_id)
+    token_revocation.apply(session.info.pop('revoked_jtis', ()))
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_user_changes(session):
+    session.info.pop('identity_cache_changes', None)
+    session.info.pop('revoked_jtis', None)
@@ -0,0 +1,234 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+
+class WebhookQueue:
+    """
+    Fila durável local (journal SQLite) para payloads de webhooks recebidos.
+
+    O webhook apenas grava o payload no journal e responde imediatamente;
+    os workers (WebhookWorkerPool) drenam a fila em lotes, com novas
+    tentativas e tabela de dead-letter. O journal fica em um arquivo
+    separado do banco principal, então a latência do webhook não depende
+    da carga do banco da aplicação.
+    """
+
+    def __init__(self, path, max_attempts=5, visibility_timeout=300):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.visibility_timeout = visibility_timeout
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._create_tables()
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        # Conexões SQLite não podem atravessar um fork (workers pré-carregados do gunicorn)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def _create_tables(self):
+        connection = self._connection()
+        connection.executescript("""
+            CREATE TABLE IF NOT EXISTS webhook_journal (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                source VARCHAR(50) NOT NULL,
+                payload TEXT NOT NULL,
+                received_at REAL NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL,
+                claimed_at REAL,
+                last_error TEXT
+            );
+            CREATE INDEX IF NOT EXISTS ix_webhook_journal_next_attempt
+                ON webhook_journal (next_attempt_at);
+            CREATE TABLE IF NOT EXISTS webhook_dead_letter (
+                id INTEGER PRIMARY KEY,
+                source VARCHAR(50) NOT NULL,
+                payload TEXT NOT NULL,
+                received_at REAL NOT NULL,
+                attempts INTEGER NOT NULL,
+                last_error TEXT,
+                failed_at REAL NOT NULL
+            );
+        """)
+
+    def enqueue(self, source, payload):
+        """Grava um payload no journal. Retorna o id da entrada."""
+        now = time.time()
+        cursor = self._connection().execute(
+            'INSERT INTO webhook_journal (source, payload, received_at, next_attempt_at) VALUES (?, ?, ?, ?)',
+            (source, json.dumps(payload), now, now)
+        )
+        return cursor.lastrowid
+
+    def claim(self, batch_size):
+        """Reserva um lote de entradas prontas para processamento"""
+        connection = self._connection()
+        now = time.time()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            rows = connection.execute(
+                """SELECT id, source, payload, attempts FROM webhook_journal
+                   WHERE next_attempt_at <= ? AND (claimed_at IS NULL OR claimed_at <= ?)
+                   ORDER BY id LIMIT ?""",
+                (now, now - self.visibility_timeout, batch_size)
+            ).fetchall()
+            if rows:
+                connection.executemany(
+                    'UPDATE webhook_journal SET claimed_at = ? WHERE id = ?',
+                    [(now, row[0]) for row in rows]
+                )
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+
+        return [
+            {'id': row[0], 'source': row[1], 'payload': json.loads(row[2]), 'attempts': row[3]}
+            for row in rows
+        ]
+
+    def ack(self, entry_ids):
+        """Remove entradas processadas com sucesso"""
+        if entry_ids:
+            self._connection().executemany(
+                'DELETE FROM webhook_journal WHERE id = ?',
+                [(entry_id,) for entry_id in entry_ids]
+            )
+
+    def fail(self, entry, error):
+        """Registra falha: agenda nova tentativa com backoff ou move para dead-letter"""
+        connection = self._connection()
+        attempts = entry['attempts'] + 1
+        now = time.time()
+
+        if attempts >= self.max_attempts:
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                connection.execute(
+                    """INSERT OR REPLACE INTO webhook_dead_letter
+                       (id, source, payload, received_at, attempts, last_error, failed_at)
+                       SELECT id, source, payload, received_at, ?, ?, ? FROM webhook_journal WHERE id = ?""",
+                    (attempts, str(error), now, entry['id'])
+                )
+                connection.execute('DELETE FROM webhook_journal WHERE id = ?', (entry['id'],))
+                connection.execute('COMMIT')
+            except Exception:
+                connection.execute('ROLLBACK')
+                raise
+            return
+
+        # Backoff exponencial: 2s, 4s, 8s, ...
+        connection.execute(
+            """UPDATE webhook_journal
+               SET attempts = ?, next_attempt_at = ?, claimed_at = NULL, last_error = ?
+               WHERE id = ?""",
+            (attempts, now + 2 ** attempts, str(error), entry['id'])
+        )
+
+    def requeue_dead_letters(self, entry_ids=None):
+        """Devolve entradas da dead-letter para a fila. Retorna a quantidade."""
+        connection = self._connection()
+        now = time.time()
+        where, params = '', ()
+        if entry_ids:
+            where = f" WHERE id IN ({','.join('?' * len(entry_ids))})"
+            params = tuple(entry_ids)
+
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            cursor = connection.execute(
+                f"""INSERT INTO webhook_journal (source, payload, received_at, next_attempt_at)
+                    SELECT source, payload, received_at, {now} FROM webhook_dead_letter{where}""",
+                params
+            )
+            connection.execute(f'DELETE FROM webhook_dead_letter{where}', params)
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        return cursor.rowcount
+
+    def stats(self):
+        connection = self._connection()
+        pending = connection.execute('SELECT COUNT(*) FROM webhook_journal').fetchone()[0]
+        retrying = connection.execute('SELECT COUNT(*) FROM webhook_journal WHERE attempts > 0').fetchone()[0]
+        dead = connection.execute('SELECT COUNT(*) FROM webhook_dead_letter').fetchone()[0]
+        oldest = connection.execute('SELECT MIN(received_at) FROM webhook_journal').fetchone()[0]
+        return {
+            'pending': pending,
+            'retrying': retrying,
+            'deadLetter': dead,
+            'oldestPendingAt': datetime.utcfromtimestamp(oldest).isoformat() if oldest else None
+        }
+
+
+class WebhookWorkerPool:
+    """Pool de threads que drena a fila de webhooks em lotes"""
+
+    def __init__(self, app, queue, handlers, workers=2, batch_size=50, poll_interval=1.0):
+        self.app = app
+        self.queue = queue
+        self.handlers = handlers
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        for number in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f'webhook-worker-{number}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                processed = self.drain_once()
+            except Exception as e:
+                self.app.logger.error('Erro no worker de webhooks: %s', e)
+                processed = 0
+            if not processed:
+                self._stop.wait(self.poll_interval)
+
+    def drain_once(self):
+        """Processa um lote da fila. Retorna quantas entradas foram reservadas."""
+        entries = self.queue.claim(self.batch_size)
+        if not entries:
+            return 0
+
+        with self.app.app_context():
+            acked = []
+            for entry in entries:
+                handler = self.handlers.get(entry['source'])
+                try:
+                    if handler is None:
+                        raise ValueError(f"Nenhum processador para a origem {entry['source']}")
+                    handler(entry['payload'])
+                    acked.append(entry['id'])
+                except Exception as e:
+                    # Falha isolada: somente esta entrada volta para a fila
+                    self.app.logger.warning('Falha ao processar webhook %s: %s', entry['id'], e)
+                    self.queue.fail(entry, e)
+            self.queue.ack(acked)
+
+        return len(entries)
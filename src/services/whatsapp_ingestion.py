@@ -0,0 +1,177 @@
+import hashlib
+import json
+import os
+import time
+from datetime import datetime
+from flask import current_app
+from src.models.database import db, Charge, ChargeProgress, WhatsAppMessage
+from src.services.phone_index import PhoneIndexService
+
+OPEN_CHARGE_STATUSES = ['PENDING', 'OVERDUE', 'NEGOTIATING']
+
+
+class WhatsAppIngestionService:
+    """
+    Ingestão em lote das mensagens recebidas pelo webhook do WhatsApp:
+    1. Deduplicação do payload inteiro com uma única consulta IN
+    2. Resolução telefone -> devedor pelo índice de telefones normalizados e
+       devedor -> cobrança aberta com uma única consulta
+    3. Inserção em lote de mensagens e andamentos automáticos
+    """
+
+    def __init__(self):
+        # Meta de vazão (mensagens/segundo) por requisição; abaixo disso gera alerta no log
+        self.target_rate = float(os.getenv('WHATSAPP_WEBHOOK_TARGET_RATE', '500'))
+
+    def ingest(self, messages):
+        """Processa uma lista de mensagens do provedor. Não faz commit."""
+        started = time.perf_counter()
+
+        parsed = self._parse_messages(messages)
+        without_id = sum(1 for m in parsed if m['generated_id'])
+        if without_id:
+            current_app.logger.warning(
+                'Webhook WhatsApp: %d mensagens sem id do provedor (id derivado do conteúdo)', without_id
+            )
+        new_messages = self._filter_existing(parsed)
+        charges_by_phone = self._resolve_open_charges({m['phone_number'] for m in new_messages})
+
+        whatsapp_messages = []
+        progress_entries = []
+        timeline_events = []
+        now = datetime.utcnow()
+
+        for message in new_messages:
+            phone_number = message['phone_number']
+            content = message['content']
+            charge = charges_by_phone.get(phone_number)
+
+            whatsapp_message = WhatsAppMessage(
+                message_id=message['message_id'],
+                phone_number=phone_number,
+                contact_name=message['contact_name'],
+                message_type=message['message_type'],
+                direction='INBOUND',
+                content=content,
+                media_url=message['media_url'],
+                media_type=message['media_type'],
+                status='RECEIVED',
+                sent_at=now,
+                webhook_data=message['raw'],
+                charge_id=charge.id if charge else None
+            )
+            whatsapp_messages.append(whatsapp_message)
+
+            if charge:
+                # Criar andamento automático
+                progress = ChargeProgress(
+                    charge_id=charge.id,
+                    progress_type='WHATSAPP_CONTACT',
+                    title=f'Mensagem WhatsApp recebida de {phone_number}',
+                    description=f'Conteúdo: {content[:100]}...' if len(content) > 100 else content,
+                    responsible_name='Sistema WhatsApp',
+                    whatsapp_message_id=message['message_id'],
+                    phone_number=phone_number,
+                    priority='MEDIUM'
+                )
+                progress_entries.append(progress)
+                timeline_events.append((charge, whatsapp_message, progress))
+
+        # Um único flush: o SQLAlchemy agrupa os INSERTs em instruções multi-linha
+        db.session.add_all(whatsapp_messages)
+        db.session.add_all(progress_entries)
+        db.session.flush()
+
+        elapsed = time.perf_counter() - started
+        rate = len(parsed) / elapsed if elapsed > 0 else float('inf')
+        if parsed and rate < self.target_rate:
+            current_app.logger.warning(
+                'Webhook WhatsApp abaixo da meta: %d mensagens em %.1f ms (%.0f msg/s, meta %.0f msg/s)',
+                len(parsed), elapsed * 1000, rate, self.target_rate
+            )
+
+        return {
+            'received': len(messages),
+            'created': len(whatsapp_messages),
+            'duplicates': len(parsed) - len(new_messages),
+            'withoutId': without_id,
+            'matchedCharges': len(progress_entries),
+            'elapsedMs': round(elapsed * 1000, 2),
+            'messagesPerSecond': round(rate, 1) if elapsed > 0 else None
+        }, timeline_events
+
+    def _parse_messages(self, messages):
+        """Normaliza o payload do provedor"""
+        # Estrutura pode variar dependendo do provedor (Twilio, WhatsApp Business API, etc.)
+        parsed = []
+        for position, message_data in enumerate(messages):
+            # Sem id do provedor: id local derivado do conteúdo e da posição no payload,
+            # estável entre novas tentativas da fila (não duplica mensagem nem andamento)
+            generated_id = not message_data.get('id')
+            parsed.append({
+                'message_id': self._local_id(message_data, position) if generated_id else message_data.get('id'),
+                'generated_id': generated_id,
+                'phone_number': message_data.get('from', '').replace('whatsapp:', ''),
+                'content': message_data.get('body', ''),
+                'message_type': message_data.get('type', 'text').upper(),
+                'contact_name': message_data.get('profile', {}).get('name', ''),
+                'media_url': message_data.get('media_url'),
+                'media_type': message_data.get('media_type'),
+                'raw': message_data
+            })
+        return parsed
+
+    @staticmethod
+    def _local_id(message_data, position):
+        content = json.dumps([position, message_data], sort_keys=True, default=str)
+        return f'local-{hashlib.sha256(content.encode()).hexdigest()[:32]}'
+
+    def _filter_existing(self, parsed):
+        """Remove mensagens já gravadas ou repetidas dentro do mesmo payload"""
+        message_ids = {m['message_id'] for m in parsed if m['message_id']}
+        existing = set()
+        if message_ids:
+            existing = {
+                row.message_id for row in db.session.query(WhatsAppMessage.message_id).filter(
+                    WhatsAppMessage.message_id.in_(message_ids)
+                )
+            }
+
+        seen = set()
+        new_messages = []
+        for message in parsed:
+            message_id = message['message_id']
+            if message_id in existing or message_id in seen:
+                continue
+            seen.add(message_id)
+            new_messages.append(message)
+        return new_messages
+
+    def _resolve_open_charges(self, phone_numbers):
+        """Busca, em uma consulta, a cobrança aberta mais recente de cada telefone"""
+        if not phone_numbers:
+            return {}
+
+        # Telefone (qualquer formato) -> devedores, via índice E.164 + cache LRU
+        people_by_phone = PhoneIndexService().lookup_many(phone_numbers)
+        debtor_ids = {person_id for person_ids in people_by_phone.values() for person_id in person_ids}
+        if not debtor_ids:
+            return {}
+
+        charges = Charge.query.filter(
+            Charge.debtor_id.in_(debtor_ids),
+            Charge.status.in_(OPEN_CHARGE_STATUSES),
+            Charge.is_active == True
+        ).order_by(Charge.created_at.desc()).all()
+
+        phones_by_debtor = {}
+        for phone, person_ids in people_by_phone.items():
+            for person_id in person_ids:
+                phones_by_debtor.setdefault(person_id, []).append(phone)
+
+        # Telefone compartilhado por várias pessoas: vale a cobrança mais recente entre todas
+        charges_by_phone = {}
+        for charge in charges:
+            for phone in phones_by_debtor.get(charge.debtor_id, ()):
+                charges_by_phone.setdefault(phone, charge)
+        return charges_by_phone
@@ -0,0 +1,15 @@
+"""
+Ponto de entrada WSGI de produção.
+
+    gunicorn -c gunicorn.conf.py src.wsgi:app
+
+A configuração (workers, threads, timeouts, preload) fica em gunicorn.conf.py.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.main import create_app
+
+app = create_app()
@@ -0,0 +1,50 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+try:
+    from src.services.economic_index_import import EconomicIndexImportError, EconomicIndexImportService
+except ImportError as e:
+    # Depende dos modelos EconomicIndex/EconomicIndexValue de src.models.database
+    pytest.skip(f'modelos de índices econômicos indisponíveis: {e}', allow_module_level=True)
+
+
+@pytest.fixture
+def service():
+    return EconomicIndexImportService()
+
+
+def test_parse_bcb_json(service):
+    content = '[{"data": "01/01/2024", "valor": "0.42"}, {"data": "01/02/2024", "valor": "0.83"}]'
+
+    assert service.parse(content, 'bcb') == [(date(2024, 1, 1), Decimal('0.42')), (date(2024, 2, 1), Decimal('0.83'))]
+
+
+def test_parse_sidra_csv_locates_columns_from_header(service):
+    content = '"Brasil";"Mês";"Variável";"Valor"\n"Brasil";"janeiro 2024";"IPCA";"0,42"\n'
+
+    assert service.parse(content.encode('latin-1'), 'ibge') == [(date(2024, 1, 1), Decimal('0.42'))]
+
+
+def test_parse_rejects_index_numbers(service):
+    with pytest.raises(EconomicIndexImportError) as error:
+        service.parse('[["2024-01", "6543.21"]]')
+    assert error.value.errors[0]['row'] == 1
+
+
+def test_malformed_json_is_an_import_error(service):
+    with pytest.raises(EconomicIndexImportError) as error:
+        service.parse('[{"data": "01/01/2024"', 'bcb')
+    assert 'JSON inválido' in error.value.errors[0]['error']
+
+
+def test_scalar_items_are_import_errors(service):
+    with pytest.raises(EconomicIndexImportError) as error:
+        service.parse('[1, ["2024-01"]]')
+    assert [item['row'] for item in error.value.errors] == [1, 2]
+
+
+def test_non_list_payload_is_an_import_error(service):
+    with pytest.raises(EconomicIndexImportError):
+        service.parse('"2024-01"', file_format='json')
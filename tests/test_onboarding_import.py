@@ -0,0 +1,63 @@
+import io
+
+import pytest
+
+from src.services.onboarding_import import (
+    OnboardingImportError, OnboardingImportService, normalize_document, read_rows
+)
+
+
+def test_normalize_document_validates_check_digits():
+    assert normalize_document('529.982.247-25') == ('PF', '52998224725')
+    assert normalize_document('11.222.333/0001-81') == ('PJ', '11222333000181')
+    # Planilhas perdem os zeros à esquerda de documentos numéricos
+    assert normalize_document(1234567890.0) == ('PF', '01234567890')
+    for invalid in ('529.982.247-26', '111.111.111-11', '123'):
+        with pytest.raises(ValueError):
+            normalize_document(invalid)
+
+
+def test_read_rows_maps_header_aliases_and_skips_blank_values():
+    content = 'Unidade;Tipo Unidade;CPF/CNPJ;Nome;Coluna Extra\nA-101;Apartamento;52998224725;Maria;x\n;;;;\n'
+
+    rows = list(read_rows(io.BytesIO(content.encode())))
+
+    assert rows == [(2, {'unit_code': 'A-101', 'unit_type': 'Apartamento', 'document': '52998224725', 'name': 'Maria'})]
+
+
+def test_read_rows_detects_comma_delimiter_and_bom():
+    content = '﻿unidade,numero\nA-101,101\n'
+
+    assert list(read_rows(io.BytesIO(content.encode('utf-8')))) == [(2, {'unit_code': 'A-101', 'number': '101'})]
+
+
+def test_read_rows_requires_unit_code_column():
+    with pytest.raises(OnboardingImportError):
+        list(read_rows(io.BytesIO(b'nome;cpf\nMaria;52998224725\n')))
+    with pytest.raises(OnboardingImportError):
+        list(read_rows(io.BytesIO(b'')))
+
+
+def test_read_error_mid_file_keeps_imported_batches_in_the_report(monkeypatch):
+    batches = []
+    monkeypatch.setattr(OnboardingImportService, '_load_indexes', lambda self: None)
+    monkeypatch.setattr(OnboardingImportService, '_process', lambda self, batch: batches.append(len(batch)))
+    content = b'unidade;numero\n' + b'A-101;101\n' * 5000 + b'\xff\xfe\n' * 3
+
+    report = OnboardingImportService('client', batch_size=1000).run(read_rows(io.BytesIO(content)))
+
+    # Os lotes lidos antes do erro são gravados e o relatório aponta onde a leitura parou
+    assert sum(batches) == report['rows'] > 0
+    assert report['readError']['row'] == report['rows'] + 2
+    assert 'utf-8' in report['readError']['error']
+
+
+def test_report_without_read_error(monkeypatch):
+    monkeypatch.setattr(OnboardingImportService, '_load_indexes', lambda self: None)
+    monkeypatch.setattr(OnboardingImportService, '_process', lambda self, batch: None)
+
+    report = OnboardingImportService('client').run(read_rows(io.BytesIO(b'unidade\nA-101\nA-102\n')))
+
+    assert report['rows'] == 2
+    assert report['readError'] is None
+    assert report['errorCount'] == 0
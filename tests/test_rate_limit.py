@@ -0,0 +1,120 @@
+import pytest
+
+from src.services.rate_limit import MemoryBucketStore, RateLimiter, SharedBucketStore, parse_limit
+
+CAPACITY, RATE = 5, 5 / 60
+
+
+@pytest.fixture(params=['memory', 'shared'])
+def make_store(request, tmp_path):
+    def make(size):
+        if request.param == 'memory':
+            return MemoryBucketStore(maxsize=size)
+        store = SharedBucketStore(str(tmp_path / 'ratelimit.bin'), slots=size)
+        store.PROBES = size
+        return store
+    return make
+
+
+def test_parse_limit():
+    assert parse_limit('10/minute') == (10, 10 / 60)
+    assert parse_limit('2') == (2, 2)
+    with pytest.raises(ValueError):
+        parse_limit('10/week')
+    with pytest.raises(ValueError):
+        parse_limit('0/minute')
+
+
+def test_bucket_limits_after_capacity_and_refills(make_store):
+    store = make_store(16)
+
+    assert all(store.hit('login:user:a', CAPACITY, RATE, 0)[0] for _ in range(CAPACITY))
+    allowed, retry_after = store.hit('login:user:a', CAPACITY, RATE, 0)
+    assert not allowed
+    assert retry_after == pytest.approx(12)
+
+    # Um token a cada 12 s
+    assert store.hit('login:user:a', CAPACITY, RATE, 12)[0]
+    assert not store.hit('login:user:a', CAPACITY, RATE, 12)[0]
+
+
+def test_keys_are_independent(make_store):
+    store = make_store(16)
+    for _ in range(CAPACITY):
+        store.hit('login:user:a', CAPACITY, RATE, 0)
+
+    assert not store.hit('login:user:a', CAPACITY, RATE, 0)[0]
+    assert store.hit('login:user:b', CAPACITY, RATE, 0)[0]
+
+
+def test_rotating_more_keys_than_slots_does_not_reset_buckets(make_store):
+    store = make_store(2)
+    results = [store.hit(f'login:user:{number % 3}', CAPACITY, RATE, number * 0.1)[0] for number in range(30)]
+
+    assert results.count(False) > 0
+
+
+def test_full_store_does_not_evict_a_bucket_in_use(make_store):
+    store = make_store(2)
+    for _ in range(CAPACITY):
+        store.hit('login:user:victim', CAPACITY, RATE, 0)
+
+    store.hit('login:user:a', CAPACITY, RATE, 1)
+    allowed, retry_after = store.hit('login:user:b', CAPACITY, RATE, 1)
+
+    # Sem slot livre, a chave nova é recusada e a vítima continua limitada
+    assert not allowed
+    assert retry_after > 0
+    assert not store.hit('login:user:victim', CAPACITY, RATE, 1)[0]
+
+
+def test_refilled_buckets_are_reused(make_store):
+    store = make_store(2)
+    store.hit('login:user:a', CAPACITY, RATE, 0)
+    store.hit('login:user:b', CAPACITY, RATE, 0)
+
+    # Depois de 12 s os dois buckets estão cheios de novo: equivalem a buckets novos
+    assert store.hit('login:user:c', CAPACITY, RATE, 12)[0]
+
+
+def test_memory_store_drops_idle_buckets():
+    store = MemoryBucketStore(maxsize=100)
+    for number in range(10):
+        store.hit(f'webhook:ip:{number}', CAPACITY, RATE, 0)
+
+    store.hit('webhook:ip:new', CAPACITY, RATE, 60)
+
+    assert len(store) == 1
+
+
+def test_shared_store_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / 'ratelimit.bin')
+    first, second = SharedBucketStore(path, slots=64), SharedBucketStore(path, slots=64)
+
+    for _ in range(CAPACITY):
+        first.hit('login:ip:1.2.3.4', CAPACITY, RATE, 0)
+
+    assert not second.hit('login:ip:1.2.3.4', CAPACITY, RATE, 0)[0]
+
+
+def test_shared_store_resets_a_file_with_another_layout(tmp_path):
+    path = tmp_path / 'ratelimit.bin'
+    path.write_bytes(b'\xff' * 100)
+
+    store = SharedBucketStore(str(path), slots=8)
+
+    assert path.stat().st_size == 8 * SharedBucketStore.SLOT.size
+    assert store.hit('login:ip:1.2.3.4', CAPACITY, RATE, 0)[0]
+
+
+def test_rate_limiter_checks_every_applicable_bucket():
+    limiter = RateLimiter(MemoryBucketStore(), {'login:ip': '3/minute', 'login:user': '2/minute'})
+    identifiers = [('ip', '1.2.3.4'), ('user', 'a@b.com')]
+
+    assert limiter.check('login', identifiers) is None
+    assert limiter.check('login', identifiers) is None
+    # O limite por usuário (2/minuto) é atingido antes do limite por IP
+    assert limiter.check('login', identifiers) == pytest.approx(30, abs=1)
+    # Chaves sem valor (ex.: login sem email) e sem limite configurado são ignoradas
+    assert limiter.check('login', [('ip', '5.6.7.8'), ('user', None)]) is None
+    assert limiter.check('webhook', identifiers) is None
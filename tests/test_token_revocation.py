@@ -0,0 +1,111 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask
+
+from src.models.database import db
+from src.models.revoked_token import RevokedToken
+from src.services.token_revocation import BloomFilter, TokenRevocationStore
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'test.db'}"
+    db.init_app(app)
+    with app.app_context():
+        RevokedToken.__table__.create(db.engine)
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def store(app):
+    return TokenRevocationStore(capacity=1000, error_rate=0.001, sync_interval=0, rebuild_interval=3600)
+
+
+def _insert(jti, expires_in=timedelta(hours=1), revoked_at=None):
+    now = datetime.utcnow()
+    db.session.add(RevokedToken(jti=jti, revoked_at=revoked_at or now, expires_at=now + expires_in))
+    db.session.commit()
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(1000, 0.01)
+    values = [f'jti-{number}' for number in range(1000)]
+    for value in values:
+        bloom.add(value)
+
+    assert all(value in bloom for value in values)
+    false_positives = sum(f'other-{number}' in bloom for number in range(10000))
+    assert false_positives < 300
+
+
+def test_revoke_applies_after_commit(store):
+    assert not store.is_revoked('jti-1')
+
+    store.revoke('jti-1', datetime.utcnow() + timedelta(hours=1), user_id=7)
+    db.session.commit()
+    store.apply(db.session.info.pop('revoked_jtis', ()))
+
+    assert store.is_revoked('jti-1')
+    assert not store.is_revoked('jti-2')
+
+
+def test_revocations_from_other_processes_are_synced(store):
+    assert not store.is_revoked('jti-1')
+
+    # Revogação gravada por outro worker: visível no próximo sync
+    _insert('jti-1')
+
+    assert store.is_revoked('jti-1')
+
+
+def test_rebuild_ignores_expired_revocations(store):
+    _insert('expired', expires_in=timedelta(seconds=-1))
+    _insert('valid')
+
+    store._rebuild()
+
+    assert 'valid' in store.bloom
+    assert store.stats()['revokedLoaded'] == 1
+
+
+def test_purge_expired_removes_only_expired_rows(store):
+    _insert('expired', expires_in=timedelta(seconds=-1))
+    _insert('valid')
+
+    assert store.purge_expired() == 1
+    assert [row.jti for row in db.session.query(RevokedToken.jti)] == ['valid']
+
+
+def test_only_one_request_refreshes_the_filter(store, monkeypatch):
+    store._refresh()
+    calls = []
+
+    def slow_rebuild():
+        calls.append(threading.get_ident())
+        time.sleep(0.2)
+        store._next_rebuild = time.monotonic() + 3600
+        store._next_sync = time.monotonic() + 3600
+
+    monkeypatch.setattr(store, '_rebuild', slow_rebuild)
+    store._next_rebuild = 0
+    durations = []
+
+    def request():
+        started = time.monotonic()
+        store._refresh()
+        durations.append(time.monotonic() - started)
+
+    threads = [threading.Thread(target=request) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    # As demais requisições seguem com o filtro atual, sem esperar a reconstrução
+    assert sum(duration < 0.1 for duration in durations) == 7
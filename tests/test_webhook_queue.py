@@ -0,0 +1,125 @@
+import time
+
+import pytest
+from flask import Flask
+
+from src.services.webhook_queue import WebhookQueue, WebhookWorkerPool
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return WebhookQueue(str(tmp_path / 'webhook_queue.db'), max_attempts=3, visibility_timeout=60)
+
+
+def test_claim_returns_payloads_in_order_and_ack_removes_them(queue):
+    first = queue.enqueue('whatsapp', {'messages': [1]})
+    second = queue.enqueue('whatsapp', {'messages': [2]})
+
+    entries = queue.claim(10)
+
+    assert [entry['id'] for entry in entries] == [first, second]
+    assert entries[0]['payload'] == {'messages': [1]}
+    assert entries[0]['attempts'] == 0
+
+    queue.ack([first, second])
+    assert queue.stats()['pending'] == 0
+
+
+def test_claimed_entries_are_invisible_until_the_visibility_timeout(queue):
+    queue.enqueue('whatsapp', {})
+
+    assert len(queue.claim(10)) == 1
+    assert queue.claim(10) == []
+
+    queue.visibility_timeout = 0
+    assert len(queue.claim(10)) == 1
+
+
+def test_claim_respects_batch_size(queue):
+    for number in range(5):
+        queue.enqueue('whatsapp', {'n': number})
+
+    assert [entry['payload']['n'] for entry in queue.claim(2)] == [0, 1]
+    assert [entry['payload']['n'] for entry in queue.claim(10)] == [2, 3, 4]
+
+
+def test_fail_schedules_a_retry_with_backoff(queue):
+    queue.enqueue('whatsapp', {})
+    entry = queue.claim(1)[0]
+
+    queue.fail(entry, RuntimeError('banco indisponível'))
+
+    # Backoff de 2 s: a entrada ainda não está pronta
+    assert queue.claim(1) == []
+    stats = queue.stats()
+    assert stats['pending'] == 1
+    assert stats['retrying'] == 1
+
+
+def test_fail_moves_to_dead_letter_after_max_attempts(queue):
+    entry_id = queue.enqueue('whatsapp', {'messages': []})
+
+    queue.fail({'id': entry_id, 'attempts': queue.max_attempts - 1}, RuntimeError('erro'))
+
+    stats = queue.stats()
+    assert stats['pending'] == 0
+    assert stats['deadLetter'] == 1
+
+
+def test_requeue_dead_letters_returns_entries_to_the_queue(queue):
+    entry_id = queue.enqueue('whatsapp', {'messages': ['x']})
+    queue.fail({'id': entry_id, 'attempts': queue.max_attempts - 1}, RuntimeError('erro'))
+
+    assert queue.requeue_dead_letters() == 1
+
+    entries = queue.claim(10)
+    assert [entry['payload'] for entry in entries] == [{'messages': ['x']}]
+    assert entries[0]['attempts'] == 0
+    assert queue.stats()['deadLetter'] == 0
+
+
+def test_requeue_dead_letters_only_the_given_ids(queue):
+    ids = [queue.enqueue('whatsapp', {'n': number}) for number in range(2)]
+    for entry_id in ids:
+        queue.fail({'id': entry_id, 'attempts': queue.max_attempts - 1}, RuntimeError('erro'))
+
+    assert queue.requeue_dead_letters([ids[0]]) == 1
+    assert queue.stats()['deadLetter'] == 1
+
+
+def test_worker_pool_acks_successes_and_retries_failures_in_isolation(queue):
+    processed = []
+
+    def handler(payload):
+        if payload.get('fail'):
+            raise ValueError('payload inválido')
+        processed.append(payload['n'])
+
+    pool = WebhookWorkerPool(Flask(__name__), queue, handlers={'whatsapp': handler}, workers=1)
+    queue.enqueue('whatsapp', {'n': 1})
+    queue.enqueue('whatsapp', {'fail': True})
+    queue.enqueue('whatsapp', {'n': 2})
+    queue.enqueue('unknown', {'n': 3})
+
+    assert pool.drain_once() == 4
+
+    assert processed == [1, 2]
+    stats = queue.stats()
+    assert stats['pending'] == 2
+    assert stats['retrying'] == 2
+
+
+def test_worker_pool_start_and_stop(queue):
+    processed = []
+    pool = WebhookWorkerPool(Flask(__name__), queue, handlers={'whatsapp': processed.append},
+                             workers=1, poll_interval=0.01)
+    queue.enqueue('whatsapp', {'n': 1})
+
+    pool.start()
+    deadline = time.monotonic() + 5
+    while not processed and time.monotonic() < deadline:
+        time.sleep(0.01)
+    pool.stop()
+
+    assert processed == [{'n': 1}]
+    assert queue.stats()['pending'] == 0